@@ -0,0 +1,11 @@
+"""
+Puts slideshow-generator/ on sys.path so this script folder can import the
+shared generator_common package. Every module that uses generator_common
+imports this first, so it works whatever runs or imports it.
+"""
+import sys
+from pathlib import Path
+
+SLIDESHOW_ROOT = str(Path(__file__).resolve().parents[2])
+if SLIDESHOW_ROOT not in sys.path:
+    sys.path.append(SLIDESHOW_ROOT)
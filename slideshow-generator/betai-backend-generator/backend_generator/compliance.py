@@ -0,0 +1,61 @@
+from functools import lru_cache
+
+import _paths  # noqa: F401  (generator_common on sys.path)
+from config import get_config
+from regenerate import regenerate_slide
+from generator_common.compliance import ComplianceStats, TermFilter, enforce
+
+COMPLIANCE_STATS = ComplianceStats("betai compliance")
+
+
+# -------------------------------------------------------
+# Compliance filter (data.json "compliance")
+# Global terms are checked on every text, per-app terms on that app's
+# slide, locales included. Offending slides get their text rewritten
+# (regenerate.py); the last round uses the rule-checked templates.
+# Slides are numbered like the carousel: 1 = hook, 2–6 = app slides.
+# -------------------------------------------------------
+@lru_cache(maxsize=None)
+def get_filters():
+    rules = get_config()["compliance"]
+    return (
+        TermFilter({t: "forbidden" for t in rules["forbidden"]}),
+        {app: TermFilter({t: f"app:{app}" for t in terms}) for app, terms in rules["apps"].items()},
+    )
+
+
+def _slide_texts(post):
+    """[(slide number, app_id or None, locale or None, text)]"""
+    texts = [(1, None, None, post["hook"]["text"])]
+    texts += [(n, s["app_id"], None, s.get("overlay_text", ""))
+              for n, s in enumerate(post["slides"], start=2)]
+    for locale, rendering in (post.get("locales") or {}).items():
+        texts.append((1, None, locale, rendering["hook"]))
+        texts += [(n, post["slides"][n - 2]["app_id"], locale, text)
+                  for n, text in enumerate(rendering["slides"], start=2)]
+    return texts
+
+
+def scan_post(post) -> list:
+    forbidden, per_app = get_filters()
+    violations = []
+    for number, app_id, locale, text in _slide_texts(post):
+        found = forbidden.find(text)
+        if app_id in per_app:
+            found += per_app[app_id].find(text)
+        for term, rule in found:
+            violation = {"slide": number, "term": term, "rule": rule}
+            if locale:
+                violation["locale"] = locale
+            violations.append(violation)
+    return violations
+
+
+def check_post(post, offline=False, strict=False):
+    """Scan a post, rewrite offending slides; flag (or raise, strict) what is left."""
+    def fix(post, slides, last_round):
+        for number in slides:
+            post = regenerate_slide(post, number, "text", offline=offline or last_round)
+        return post
+
+    return enforce(post, scan_post, fix, strict=strict, stats=COMPLIANCE_STATS)
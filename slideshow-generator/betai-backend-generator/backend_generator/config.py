@@ -0,0 +1,253 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import _paths  # noqa: F401  (generator_common on sys.path)
+except ModuleNotFoundError:
+    pass  # loaded by generators.load_isolated(): generator_common is the caller
+from generator_common.compliance import TermFilter
+
+# Paths
+ROOT = Path(__file__).parent
+CONFIG_PATH = ROOT / "data.json"
+IMAGES_ROOT = ROOT / "images"
+
+LAYOUT_STATS_NAME = "layout_stats.json"   # built by generator_common.image_stats
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+SLIDES_PER_POST = 5
+
+# BetAI placement rules
+BETAI_APP_ID = "betai"
+BETAI_EXCLUDED_CATEGORIES = ("niche_sports",)
+
+# Phrase templates (template engine): one line, factual, no questions,
+# exactly one {app} slot.
+APP_SLOT = "{app}"
+MAX_PHRASE_CHARS = 90
+
+
+# -------------------------------------------------------
+# Image catalog
+# -------------------------------------------------------
+def list_images(folder):
+    """Return every image in a folder, sorted so the catalog is stable."""
+    folder = Path(folder)
+    if not folder.is_dir():
+        return []
+    return sorted(
+        p for p in folder.iterdir()
+        if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS
+    )
+
+
+def load_layout_styles(root):
+    """
+    Per-image text style {position, text_color, ...} from the layout stats
+    catalog, keyed like the image catalog. Empty until the catalog is built.
+    """
+    path = Path(root) / LAYOUT_STATS_NAME
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f).get("images", {})
+    return {str(Path(root) / rel): entry["style"] for rel, entry in entries.items()}
+
+
+# -------------------------------------------------------
+# Phrase templates per category (+ BetAI-specific lines)
+# -------------------------------------------------------
+def _template_problems(template, longest_name):
+    problems = []
+    if template.count(APP_SLOT) != 1:
+        problems.append(f"needs exactly one {APP_SLOT}")
+    elif "{" in template.replace(APP_SLOT, "") or "}" in template.replace(APP_SLOT, ""):
+        problems.append(f"only {APP_SLOT} may be used as a placeholder")
+    if "?" in template:
+        problems.append("no questions")
+    if "\n" in template:
+        problems.append("must be one line")
+    if len(template.replace(APP_SLOT, "x" * longest_name)) > MAX_PHRASE_CHARS:
+        problems.append(f"longer than {MAX_PHRASE_CHARS} chars with the longest app name")
+    return problems
+
+
+def compile_phrases(raw_phrases, categories, apps, betai_categories, errors):
+    """
+    {"categories": {cat_id: templates}, "betai": {cat_id: templates}} for
+    templates.py. Every category needs templates; BetAI lines are optional
+    (the category's templates are used otherwise).
+    """
+    longest_name = max((len(a["name"]) for a in apps.values()), default=0)
+    banks = {"categories": {}, "betai": {}}
+    for key in banks:
+        for cat_id, templates in raw_phrases.get(key, {}).items():
+            if cat_id not in categories:
+                errors.append(f"phrases.{key}: unknown category '{cat_id}'")
+            elif key == "betai" and cat_id not in betai_categories:
+                errors.append(f"phrases.betai: BetAI is never placed in '{cat_id}'")
+            for template in templates:
+                errors.extend(
+                    f"phrases.{key}.{cat_id} {template!r}: {p}"
+                    for p in _template_problems(template, longest_name)
+                )
+            banks[key][cat_id] = tuple(templates)
+    for cat_id in categories:
+        if not banks["categories"].get(cat_id):
+            errors.append(f"phrases: no templates for category '{cat_id}'")
+    return banks
+
+
+# -------------------------------------------------------
+# Compliance terms (scanned by compliance.py after generation)
+# "forbidden" applies to every text, "apps" only to that app's slide.
+# A trailing * matches any word starting with the term.
+# -------------------------------------------------------
+
+def compile_compliance(raw_compliance, apps, errors):
+    forbidden = tuple(raw_compliance.get("forbidden", []))
+    per_app = {}
+    for app_id, terms in raw_compliance.get("apps", {}).items():
+        if app_id not in apps:
+            errors.append(f"compliance.apps: unknown app '{app_id}'")
+            continue
+        per_app[app_id] = tuple(terms)
+    for term in forbidden + tuple(t for terms in per_app.values() for t in terms):
+        if not isinstance(term, str) or not term.strip("* "):
+            errors.append(f"compliance: invalid term {term!r}")
+    return {"forbidden": forbidden, "apps": per_app}
+
+
+def _compliance_problems(texts, term_filter, where, errors):
+    """
+    Hooks and templates must already pass the filter (offline copy is the
+    fallback); same TermFilter as compliance.py runs after generation.
+    """
+    for text in texts:
+        found = [term for term, _ in term_filter.find(text)]
+        if found:
+            errors.append(f"{where} {text!r}: forbidden terms {found}")
+
+
+# -------------------------------------------------------
+# Compile data.json + image catalog
+# - validates every referenced app against images/apps/<app_id>
+# - precomputes BetAI-eligible categories and filler app lists
+# -------------------------------------------------------
+def compile_config(path=CONFIG_PATH, images_root=IMAGES_ROOT):
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    images_root = Path(images_root)
+    errors = []
+
+    hooks = tuple(raw.get("hooks", []))
+    if not hooks:
+        errors.append("no hooks defined")
+
+    hook_images = tuple(str(p) for p in list_images(images_root / "hooks"))
+    if not hook_images:
+        errors.append(f"no hook images found in {images_root / 'hooks'}")
+
+    apps = raw.get("apps", {})
+    categories = []
+    betai_categories = []
+    filler_apps = {}
+    app_images = {}
+
+    for category in raw.get("categories", []):
+        cat_id = category["id"]
+
+        for app_id in category["apps"]:
+            if app_id not in apps:
+                errors.append(f"category '{cat_id}': unknown app '{app_id}'")
+                continue
+            if app_id not in app_images:
+                app_images[app_id] = tuple(
+                    str(p) for p in list_images(images_root / "apps" / app_id)
+                )
+                if not app_images[app_id]:
+                    errors.append(f"no images found for app: {app_id}")
+
+        # categories where BetAI is allowed AND present
+        if (
+            BETAI_APP_ID in category["apps"]
+            and cat_id not in BETAI_EXCLUDED_CATEGORIES
+        ):
+            betai_categories.append(cat_id)
+
+        # apps usable when BetAI is not placed in this category
+        filler = tuple(
+            a for a in category["apps"] if a != BETAI_APP_ID and a in apps
+        )
+        if not filler:
+            errors.append(f"No valid apps in category {cat_id}.")
+        filler_apps[cat_id] = filler
+
+        categories.append({
+            "id": cat_id,
+            "label": category["label"],
+            "apps": tuple(category["apps"]),
+        })
+
+    if len(categories) < SLIDES_PER_POST:
+        errors.append(
+            f"need at least {SLIDES_PER_POST} categories, got {len(categories)}"
+        )
+    if not betai_categories:
+        errors.append("No eligible category for BetAI placement.")
+
+    phrases = compile_phrases(
+        raw.get("phrases", {}), [c["id"] for c in categories], apps, betai_categories, errors
+    )
+
+    compliance = compile_compliance(raw.get("compliance", {}), apps, errors)
+    forbidden = TermFilter({t: "forbidden" for t in compliance["forbidden"] if isinstance(t, str)})
+    _compliance_problems(hooks, forbidden, "hooks", errors)
+    for key, banks in phrases.items():
+        for cat_id, templates in banks.items():
+            _compliance_problems(templates, forbidden, f"phrases.{key}.{cat_id}", errors)
+
+    styles = load_layout_styles(images_root)
+
+    if errors:
+        raise ValueError(
+            f"Invalid backend config ({path}):\n - " + "\n - ".join(errors)
+        )
+
+    return {
+        "hooks": hooks,
+        "hook_images": hook_images,
+        "apps": apps,
+        "categories": tuple(categories),
+        "betai_categories": frozenset(betai_categories),
+        "filler_apps": filler_apps,
+        "app_images": app_images,
+        "phrases": phrases,
+        "compliance": compliance,
+        "layout": {
+            p: styles[p]
+            for p in hook_images + tuple(p for files in app_images.values() for p in files)
+            if p in styles
+        },
+    }
+
+
+@lru_cache(maxsize=None)
+def get_config():
+    """Compiled config for this process (loaded and validated once)."""
+    return compile_config()
+
+
+# -------------------------------------------------------
+# CLI execution
+# -------------------------------------------------------
+if __name__ == "__main__":
+    config = get_config()
+    print(
+        f"Config OK: {len(config['categories'])} categories, "
+        f"{len(config['app_images'])} apps with images, "
+        f"{len(config['hook_images'])} hook images"
+    )
+    print("BetAI eligible:", ", ".join(sorted(config["betai_categories"])))
@@ -1,171 +1,108 @@
 import json
 import random
-from pathlib import Path
-from gpt_overlay import generate_marketing_content   # GPT generator
-
-# Paths
-ROOT = Path(__file__).parent
-CONFIG_PATH = ROOT / "data.json"
-IMAGES_ROOT = ROOT / "images"
-
-
-# -------------------------------------------------------
-# Load JSON config
-# -------------------------------------------------------
-def load_config(path=CONFIG_PATH):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+import sys
+from functools import lru_cache
+import _paths  # noqa: F401  (generator_common on sys.path)
+from compliance import COMPLIANCE_STATS, check_post
+from config import get_config
+from gpt_overlay import (   # GPT generator
+    OVERLAY_STATS,
+    generate_marketing_content,
+    generate_marketing_content_multi,
+)
+from sampler import AppSampler, get_default_sampler
+from templates import compose_post_copy, overlay_text
+from generator_common.hedging import get_hedger
+from generator_common.rate_limit import get_limiter
+from generator_common.tracing import span
 
 
 # -------------------------------------------------------
 # Pick hook
 # -------------------------------------------------------
-def pick_hook(data):
-    hooks = data["hooks"]
-    hook_text = random.choice(hooks)
-
-    # Dynamically pick a random hook image from the folder
-    hooks_folder = IMAGES_ROOT / "hooks"
-    hook_images = (
-        list(hooks_folder.glob("*.jpg"))
-        + list(hooks_folder.glob("*.jpeg"))
-        + list(hooks_folder.glob("*.png"))
-    )
+def pick_hook(config):
+    hook_text = random.choice(config["hooks"])
 
-    if not hook_images:
-        raise Exception(f"No hook images found in {hooks_folder}")
-
-    hook_image = random.choice(hook_images)
+    # Hook images are indexed once by config.compile_config()
+    hook_image = random.choice(config["hook_images"])
 
     return {
         "text": hook_text,
-        "image": str(hook_image),
+        "image": hook_image,
     }
 
 
 # -------------------------------------------------------
-# Pick 5 distinct categories
-# -------------------------------------------------------
-def pick_categories(data):
-    return random.sample(data["categories"], 5)
-
-
-# -------------------------------------------------------
-# Assign one app per category
+# Pick 5 distinct categories + one app per category
 # - BetAI must appear EXACTLY once
 # - BetAI cannot appear in niche_sports
+# Drawn in one step from the precomputed sampler (no retries).
 # -------------------------------------------------------
-def assign_apps(data, selected_categories):
-    apps_meta = data["apps"]
+def assign_apps(config, sampler=None):
+    sampler = sampler or get_default_sampler()
+    return sampler.draw()
 
-    # categories where BetAI is allowed AND present
-    eligible = [
-        c for c in selected_categories
-        if c["id"] != "niche_sports" and "betai" in c["apps"]
-    ]
 
-    if not eligible:
-        raise Exception("No eligible category for BetAI placement.")
-
-    # choose category where BetAI will appear
-    betai_category = random.choice(eligible)
-
-    slides = []
-    for category in selected_categories:
-        cat_id = category["id"]
-
-        # BetAI forced here
-        if category is betai_category:
-            app_id = "betai"
-
-        # Niche sport apps (never BetAI)
-        elif cat_id == "niche_sports":
-            app_id = random.choice(category["apps"])
-
-        # All other categories: everything EXCEPT betai
-        else:
-            possible_apps = [a for a in category["apps"] if a != "betai"]
-            if not possible_apps:
-                raise Exception(f"No valid apps in category {cat_id}.")
-            app_id = random.choice(possible_apps)
-
-        slides.append({
-            "category_id": category["id"],
-            "category_label": category["label"],
-            "app_id": app_id,
-            "app_name": apps_meta[app_id]["name"]
-        })
+# -------------------------------------------------------
+# One shared sampler per app mix (per-app weight overrides)
+# -------------------------------------------------------
+@lru_cache(maxsize=32)
+def _mix_sampler(mix):
+    return AppSampler(get_config(), weights=dict(mix))
 
-    # Verify BetAI appears exactly once
-    assert sum(1 for s in slides if s["app_id"] == "betai") == 1
 
-    return slides
+def sampler_for_weights(weights):
+    return _mix_sampler(tuple(sorted(weights.items())))
 
 
 # -------------------------------------------------------
-# Attach random images 1–6 for each app (dynamic)
+# Attach a random image for each app (catalog built at startup)
 # -------------------------------------------------------
-def pick_images_for_slides(slides):
+def pick_images_for_slides(config, slides):
     for slide in slides:
-        app_id = slide["app_id"]
-
-        # find number of images for this app folder
-        app_folder = IMAGES_ROOT / "apps" / app_id
-        jpg_count = len([f for f in app_folder.glob("*.jpg")])
-        png_count = len([f for f in app_folder.glob("*.png")])
-        total = jpg_count + png_count
-
-        if total == 0:
-            raise Exception(f"No images found for app: {app_id}")
-
-        # pick an index from available images
-        img_index = random.randint(1, total)
-
-        # Prefer jpg when present
-        jpg_path = app_folder / f"{img_index}.jpg"
-        png_path = app_folder / f"{img_index}.png"
-
-        if jpg_path.exists():
-            slide["image"] = str(jpg_path)
-        elif png_path.exists():
-            slide["image"] = str(png_path)
-        else:
-            raise Exception(f"Image {img_index} missing for app {app_id}")
+        slide["image"] = random.choice(config["app_images"][slide["app_id"]])
 
 
 # -------------------------------------------------------
-# Local fallback overlay text (if GPT disabled)
+# Text position/colors precomputed per image (layout_stats.json)
 # -------------------------------------------------------
-def build_overlay_text(slide):
-    cat = slide["category_id"]
-    app = slide["app_name"]
-
-    mapping = {
-        "odds_comparison": f"For line shopping, I use {app}.",
-        "stats_data": f"For live scores, I check {app} all day.",
-        "bankroll_tools": f"To track every bet, I use {app}.",
-        "sharp_sentiment": f"To read market sentiment, I watch {app}.",
-        "ai_analysis": f"For deeper EV analysis, I trust {app}.",
-        "niche_sports": f"For niche sports, I rely on {app}."
-    }
-
-    return mapping.get(cat, f"I use {app} every day.")
+def attach_layout(config, item):
+    style = config["layout"].get(item["image"])
+    if style:
+        item["layout"] = style
+    return item
 
 
 # -------------------------------------------------------
 # Generate single post JSON
 # -------------------------------------------------------
-def generate_one_post():
-    data = load_config()
-
-    hook = pick_hook(data)
-    selected_cats = pick_categories(data)
-    slides = assign_apps(data, selected_cats)
-    pick_images_for_slides(slides)
-
-    # local overlay text (baseline) – will be replaced by GPT
+def generate_one_post(config=None, sampler=None, locales=None, weights=None, offline=False,
+                      strict=False):
+    """
+    locales: optional list like ["en", "fr", "es", "de"]. The first one
+    fills hook/slides as usual and every locale is kept under
+    post["locales"]; all of them come from a single GPT call.
+    weights: optional {app_id: weight} app mix (ignored with a sampler).
+    offline: skip GPT and keep the template engine's copy (no locales).
+    strict: raise ComplianceError instead of flagging a post that still
+    breaks a compliance rule after its slides were rewritten.
+    """
+    config = config or get_config()
+    if offline and locales:
+        raise ValueError("offline mode can't translate: drop locales or go online")
+    if sampler is None and weights:
+        sampler = sampler_for_weights(weights)
+
+    with span("hook choice"):
+        hook = pick_hook(config)
+    with span("app assignment"):
+        slides = assign_apps(config, sampler)
+    with span("image selection"):
+        pick_images_for_slides(config, slides)
+
+    # local overlay text (template engine) – rewritten by GPT unless offline
     for slide in slides:
-        slide["overlay_text"] = build_overlay_text(slide)
+        slide["overlay_text"] = overlay_text(slide, config)
 
     # structured input for GPT (only text + minimal structure if needed)
     raw_post = {
@@ -181,7 +118,15 @@ def generate_one_post():
     }
 
     # send to GPT to rewrite + improve overlay texts
-    gpt_output = generate_marketing_content(raw_post)
+    if offline:
+        by_locale = None
+        gpt_output = compose_post_copy(hook["text"], slides, config)
+    elif locales:
+        by_locale = generate_marketing_content_multi(raw_post, locales)
+        gpt_output = by_locale[locales[0].lower()]
+    else:
+        by_locale = None
+        gpt_output = generate_marketing_content(raw_post)
 
     # gpt_output expected:
     # {
@@ -193,6 +138,14 @@ def generate_one_post():
     # }
 
     # Merge GPT texts back into full structure with images + metadata
+    with span("merge"):
+        post = _merge_post(config, hook, slides, gpt_output, by_locale)
+
+    # Local term filter; offending slides are rewritten one by one
+    return check_post(post, offline=offline, strict=strict)
+
+
+def _merge_post(config, hook, slides, gpt_output, by_locale):
     final_post = {
         "hook": {
             "text": gpt_output.get("hook", hook["text"]),
@@ -200,6 +153,7 @@ def generate_one_post():
         },
         "slides": [],
     }
+    attach_layout(config, final_post["hook"])
 
     rewritten_slides = gpt_output.get("slides", [])
 
@@ -212,22 +166,109 @@ def generate_one_post():
         )
 
         final_post["slides"].append(
-            {
+            attach_layout(config, {
                 "category_id": slide["category_id"],
                 "category_label": slide["category_label"],
                 "app_id": slide["app_id"],
                 "app_name": slide["app_name"],
                 "image": slide["image"],
                 "overlay_text": rewritten_text,
-            }
+            })
         )
 
+    if by_locale:
+        final_post["locales"] = {
+            locale: {
+                "hook": rendering.get("hook", hook["text"]),
+                "slides": _texts_or_fallback(rendering.get("slides", []), slides),
+            }
+            for locale, rendering in by_locale.items()
+        }
+
     return final_post
 
 
+def _texts_or_fallback(rewritten_slides, slides):
+    return [
+        rewritten_slides[idx] if idx < len(rewritten_slides) else slide["overlay_text"]
+        for idx, slide in enumerate(slides)
+    ]
+
+
+# -------------------------------------------------------
+# Generate a batch sharing one sampler (weights + exposure caps)
+# -------------------------------------------------------
+def generate_batch(count, weights=None, caps=None, locales=None, concurrency=1, offline=False,
+                   strict=False):
+    """
+    concurrency > 1 runs posts on that many threads; the shared rate
+    limiter decides how many GPT calls are actually in flight.
+    """
+    config = get_config()
+    sampler = AppSampler(config, weights=weights, caps=caps)
+    sampler.check_capacity(count)   # fail before any post is paid for
+    if concurrency <= 1 or offline:
+        return [
+            generate_one_post(config, sampler, locales, offline=offline, strict=strict)
+            for _ in range(count)
+        ]
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(generate_one_post, config, sampler, locales, strict=strict)
+            for _ in range(count)
+        ]
+        return [f.result() for f in futures]
+
+
+def _parse_pairs(pairs, cast):
+    parsed = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        parsed[key] = cast(value)
+    return parsed
+
+
 # -------------------------------------------------------
 # CLI execution
 # -------------------------------------------------------
 if __name__ == "__main__":
-    post = generate_one_post()
-    print(json.dumps(post, indent=2))
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate BetAI posts.")
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--weight", action="append", default=[],
+                        metavar="APP=W", help="per-app sampling weight")
+    parser.add_argument("--cap", action="append", default=[],
+                        metavar="APP=N", help="max posts featuring an app in this batch")
+    parser.add_argument("--locales", help="comma-separated, e.g. en,fr,es,de (one GPT call)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="posts generated in parallel (GPT calls stay within OPENAI_RPM/TPM)")
+    parser.add_argument("--offline", action="store_true",
+                        help="no GPT call: copy from the data.json phrase templates")
+    parser.add_argument("--strict", action="store_true",
+                        help="fail instead of flagging posts that break a compliance rule")
+    args = parser.parse_args()
+    locales = args.locales.split(",") if args.locales else None
+
+    if args.count == 1 and not args.weight and not args.cap:
+        post = generate_one_post(locales=locales, offline=args.offline, strict=args.strict)
+        print(json.dumps(post, indent=2))
+    else:
+        posts = generate_batch(
+            args.count,
+            weights=_parse_pairs(args.weight, float),
+            caps=_parse_pairs(args.cap, int),
+            locales=locales,
+            concurrency=args.concurrency,
+            offline=args.offline,
+            strict=args.strict,
+        )
+        print(json.dumps(posts, indent=2))
+
+    print(OVERLAY_STATS.report(), file=sys.stderr)
+    print(get_limiter().report(), file=sys.stderr)
+    print(COMPLIANCE_STATS.report(), file=sys.stderr)
+    if get_hedger():
+        print(get_hedger().report(), file=sys.stderr)
@@ -1,12 +1,47 @@
 import os
 import json
 import re
-from dotenv import load_dotenv
-from openai import OpenAI
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 
-load_dotenv()
+import _paths  # noqa: F401  (generator_common on sys.path)
+from generator_common.structured import (
+    RetryStats,
+    json_schema_format,
+    parse_structured,
+    strict_object,
+    string_array,
+    validate,
+)
+from generator_common.hedging import HedgeCancelled, create_response, hedged
+from generator_common.rate_limit import estimate_tokens, get_limiter
+from generator_common.tracing import span
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+MODEL = "gpt-4.1-mini"
+MAX_ATTEMPTS = 3
+SLIDE_COUNT = 5
+OUTPUT_TOKENS = 300        # per rendered post (hook + 5 slides), for the TPM estimate
+
+# Structured-output schema: hook + exactly 5 one-line slide texts
+POST_SCHEMA = strict_object({
+    "hook": {"type": "string"},
+    "slides": string_array(SLIDE_COUNT),
+})
+
+OVERLAY_STATS = RetryStats("betai overlay")
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    """Create the OpenAI client on first use (loads .env, imports the SDK)."""
+    from dotenv import load_dotenv
+    from openai import OpenAI
+
+    load_dotenv()
+    # SDK retries are off: 429s must reach the rate limiter, and
+    # request_structured() already retries.
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
 
 
 def clean_json_output(text):
@@ -32,6 +67,71 @@ def clean_json_output(text):
     raise ValueError("GPT output could not be parsed as JSON:\n" + text)
 
 
+def request_structured(prompt, schema, name, posts=1, output_tokens=None):
+    """
+    Call GPT with a strict JSON schema and validate the result locally.
+    Retries (up to MAX_ATTEMPTS) only on API errors or invalid output,
+    which structured outputs make rare; every attempt lands in OVERLAY_STATS.
+    With OPENAI_HEDGE=1 a slow attempt is hedged (first valid one wins).
+    """
+    last_error = None
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            parsed = hedged(
+                lambda cancelled: _structured_attempt(
+                    prompt, schema, name, output_tokens or OUTPUT_TOKENS * posts, attempt, cancelled
+                ),
+                name,
+            )
+        except Exception as exc:
+            last_error = exc
+            continue
+
+        OVERLAY_STATS.record_attempt("ok")
+        OVERLAY_STATS.record_call(attempt)
+        return parsed
+
+    OVERLAY_STATS.record_call(MAX_ATTEMPTS, fell_back=True)
+    raise last_error
+
+
+def _structured_attempt(prompt, schema, name, output_tokens, attempt, cancelled=None):
+    """One request; returns the validated JSON or raises (stats recorded here)."""
+    try:
+        limiter = get_limiter()
+        estimate = estimate_tokens(prompt, output_tokens)
+        with limiter.request(estimate) as ticket:
+            with span("llm request", cat="llm", schema=name, attempt=attempt):
+                response = create_response(
+                    get_client(),
+                    cancelled,
+                    model=MODEL,
+                    input=prompt,
+                    text=json_schema_format(name, schema),
+                )
+            limiter.settle(ticket, getattr(response.usage, "total_tokens", None))
+    except HedgeCancelled:
+        raise
+    except Exception as exc:
+        OVERLAY_STATS.record_attempt("api_error")
+        print(f"❌ OpenAI API error (attempt {attempt}): {exc}")
+        raise
+
+    try:
+        with span("json cleanup"):
+            parsed = parse_structured(response.output_text, clean_json_output)
+    except ValueError:
+        OVERLAY_STATS.record_attempt("parse_error")
+        raise
+
+    errors = validate(parsed, schema)
+    if errors:
+        OVERLAY_STATS.record_attempt("invalid")
+        print(f"❌ GPT output failed validation (attempt {attempt}): {errors}")
+        raise ValueError("; ".join(errors))
+    return parsed
+
+
 def generate_marketing_content(post_json, locale="en"):
     """
     post_json = {
@@ -78,14 +178,154 @@ Return ONLY this JSON:
 }}
 """
 
-    # ✔️ New API format (2025)
-    response = client.responses.create(
-        model="gpt-4.1-mini",
-        input=prompt
+    # ✔️ Structured output: JSON matching POST_SCHEMA, validated locally
+    return request_structured(prompt, POST_SCHEMA, "betai_post")
+
+
+# -------------------------------------------------------
+# Single-slide rewrite (targeted regeneration)
+# Minimal prompt: the slide, its neighbours and the rules — no full post.
+# -------------------------------------------------------
+SLIDE_OUTPUT_TOKENS = 40   # per locale
+
+
+def build_slide_prompt(context, locales):
+    neighbours = {k: context[k] for k in ("previous", "next") if context.get(k)}
+    if context.get("app_name"):
+        what = (f'the overlay line for the {context["app_name"]} slide '
+                f'(category: {context["category_label"]}). Exactly one line, purely factual, '
+                f'NO questions, keep the app name as given')
+    else:
+        what = "the HOOK (sharp, edgy, scroll-stopping, conversion-focused)"
+    shape = ", ".join(f'"{l}": "<text>"' for l in locales)
+    return f"""You write TikTok carousel copy for sports betting apps, like a bettor who's seen everything.
+Rewrite {what}. Short, aggressive, clear, no corporate tone.
+Neighbouring slides (context only): {json.dumps(neighbours, ensure_ascii=False)}
+Current text to replace: {json.dumps(context.get("current", ""), ensure_ascii=False)}
+Write it in: {", ".join(l.upper() for l in locales)}.
+Return JSON: {{{shape}}}"""
+
+
+def generate_slide_text(context, locales=("en",)):
+    """
+    context = {"current", "previous", "next", "app_name"?, "category_label"?}
+    Returns {locale: text} for every locale from one small request.
+    """
+    locales = [l.lower() for l in locales]
+    with span("prompt build", slide=context.get("slide")):
+        prompt = build_slide_prompt(context, locales)
+    schema = strict_object({l: {"type": "string"} for l in locales})
+    return request_structured(prompt, schema, "betai_slide",
+                              output_tokens=SLIDE_OUTPUT_TOKENS * len(locales))
+
+
+# -------------------------------------------------------
+# Multi-locale fan-out: one call for every requested locale
+# -------------------------------------------------------
+LOCALE_CACHE_SIZE = 2048
+
+# (locale, source text) -> rendered text, most recently used last
+_locale_cache = OrderedDict()
+_locale_lock = threading.Lock()
+
+
+def _source_texts(post_json):
+    return [post_json["hook"]["text"]] + [
+        s.get("overlay_text", "") for s in post_json["slides"]
+    ]
+
+
+def _cache_get(locale, texts):
+    keys = [(locale, t) for t in texts]
+    with _locale_lock:
+        if not all(k in _locale_cache for k in keys):
+            return None
+        for k in keys:
+            _locale_cache.move_to_end(k)
+        rendered = [_locale_cache[k] for k in keys]
+    return {"hook": rendered[0], "slides": rendered[1:]}
+
+
+def _cache_put(locale, texts, rendering):
+    rendered = [rendering["hook"]] + list(rendering["slides"])
+    with _locale_lock:
+        for source, text in zip(texts, rendered):
+            _locale_cache[(locale, source)] = text
+            _locale_cache.move_to_end((locale, source))
+        while len(_locale_cache) > LOCALE_CACHE_SIZE:
+            _locale_cache.popitem(last=False)
+
+
+def generate_marketing_content_multi(post_json, locales=("en",)):
+    """
+    Same rewrite as generate_marketing_content(), for several locales in a
+    single request. Returns {locale: {"hook": ..., "slides": [...]}}.
+
+    Renderings are cached per (locale, source text), so locales already
+    produced for identical source copy are served without a new call.
+    """
+    locales = [l.lower() for l in locales]
+    texts = _source_texts(post_json)
+
+    results = {}
+    missing = []
+    for locale in locales:
+        cached = _cache_get(locale, texts)
+        if cached:
+            results[locale] = cached
+        else:
+            missing.append(locale)
+
+    if not missing:
+        return results
+
+    locale_list = ", ".join(l.upper() for l in missing)
+    locale_shape = ",\n".join(
+        f'    "{l}": {{ "hook": "<hook>", "slides": ["<slide_1>", "...", "<slide_5>"] }}'
+        for l in missing
     )
 
-    # ✔️ New API output
-    raw_output = response.output_text
+    prompt = f"""
+SYSTEM ROLE:
+You are a senior marketing strategist specialized in sports betting apps, bettor psychology,
+performance marketing, and TikTok attention engineering. You are also a native-level
+copywriter in each requested language.
+
+OBJECTIVE:
+Rewrite and improve:
+1. The HOOK (make it sharp, edgy, scroll-stopping, conversion-focused)
+2. The overlay texts (TikTok slides) with punchy, viral phrasing.
+Then deliver that same post in every requested locale: {locale_list}.
+
+CONSTRAINTS:
+- Keep it SHORT, AGGRESSIVE, and CLEAR.
+- NO corporate tone. Talk like a bettor who's seen everything.
+- Keep same meaning but make 10x more powerful.
+- Every locale carries the same message, adapted to how bettors talk in that language
+  (not a word-for-word translation). App names stay exactly as given.
+- For app slides, the description MUST be exactly one line, purely factual, NO questions, NO question-then-answer format.
+
+INPUT JSON:
+{json.dumps(post_json, indent=2)}
+
+OUTPUT FORMAT (MANDATORY):
+Return ONLY this JSON, with exactly {SLIDE_COUNT} slides per locale:
+
+{{
+  "locales": {{
+{locale_shape}
+  }}
+}}
+"""
+
+    schema = strict_object({
+        "locales": strict_object({locale: POST_SCHEMA for locale in missing}),
+    })
+    parsed = request_structured(prompt, schema, "betai_post_locales", posts=len(missing))["locales"]
+
+    for locale in missing:
+        rendering = parsed[locale]
+        _cache_put(locale, texts, rendering)
+        results[locale] = rendering
 
-    # Parse → Clean → JSON
-    return clean_json_output(raw_output)
+    return results
@@ -1,12 +1,35 @@
 import json
 from pathlib import Path
 
-from generate import generate_one_post
-
 
 ROOT = Path(__file__).parent
 OUTPUT_HTML = ROOT / "preview.html"
 
+# text zone -> (flex alignment, gradient direction), from the slide's "layout"
+LAYOUT_POSITIONS = {
+    "top": ("flex-start", "to bottom"),
+    "middle": ("center", "to bottom"),
+    "bottom": ("flex-end", "to top"),
+}
+
+
+def overlay_style(item: dict) -> str:
+    """Inline style placing/coloring overlay text from precomputed layout stats."""
+    layout = item.get("layout")
+    if not layout:
+        return ""
+    justify, direction = LAYOUT_POSITIONS.get(layout["position"], LAYOUT_POSITIONS["bottom"])
+    scrim = "0,0,0" if layout["scrim_color"] == "#000000" else "255,255,255"
+    if layout["position"] == "middle":
+        gradient = f"linear-gradient(to bottom, transparent 20%, rgba({scrim},0.7) 50%, transparent 80%)"
+    else:
+        gradient = f"linear-gradient({direction}, rgba({scrim},0.8) 0%, rgba({scrim},0.2) 55%, transparent 100%)"
+    title = "#fff" if layout["text_color"] == "#e5e7eb" else layout["text_color"]
+    return (
+        f' style="justify-content: {justify}; background: {gradient}; '
+        f'--text: {layout["text_color"]}; --title: {title};"'
+    )
+
 
 def build_html(post: dict) -> str:
     """Create a simple HTML preview for the generated post."""
@@ -22,7 +45,7 @@ def build_html(post: dict) -> str:
             f"""
         <div class="slide">
             <img src="{s.get('image','')}" alt="{s.get('app_name','')}" />
-            <div class="overlay">
+            <div class="overlay"{overlay_style(s)}>
                 <div class="category">{s.get('category_label','')}</div>
                 <div class="app">{s.get('app_name','')}</div>
                 <div class="text">{s.get('overlay_text','')}</div>
@@ -82,6 +105,7 @@ def build_html(post: dict) -> str:
       font-weight: 800;
       letter-spacing: 0.02em;
       line-height: 1.2;
+      color: var(--title, #fff);
     }}
     .category {{
       font-size: 11px;
@@ -94,11 +118,12 @@ def build_html(post: dict) -> str:
       font-size: 15px;
       font-weight: 700;
       margin-bottom: 4px;
+      color: var(--title, #fff);
     }}
     .text {{
       font-size: 14px;
       line-height: 1.3;
-      color: #e5e7eb;
+      color: var(--text, #e5e7eb);
     }}
     .slides-wrapper {{
       border-top: 1px solid rgba(255,255,255,0.06);
@@ -109,7 +134,7 @@ def build_html(post: dict) -> str:
   <div class="container">
     <div class="hook">
       <img src="{hook_image}" alt="hook" />
-      <div class="hook-overlay">
+      <div class="hook-overlay"{overlay_style(hook)}>
         <div class="hook-text">{hook_text}</div>
       </div>
     </div>
@@ -122,11 +147,29 @@ def build_html(post: dict) -> str:
 """
 
 
+def load_post(path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 def main():
-    post = generate_one_post()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render a BetAI post preview.")
+    parser.add_argument("--post", help="preview an existing post JSON instead of generating one")
+    parser.add_argument("--output", default=str(OUTPUT_HTML))
+    args = parser.parse_args()
+
+    if args.post:
+        post = load_post(args.post)
+    else:
+        # Only pull in the generator (and the OpenAI SDK) when we need a new post
+        from generate import generate_one_post
+        post = generate_one_post()
+
     html = build_html(post)
-    OUTPUT_HTML.write_text(html, encoding="utf-8")
-    print(f"Preview generated at: {OUTPUT_HTML}")
+    Path(args.output).write_text(html, encoding="utf-8")
+    print(f"Preview generated at: {args.output}")
 
 
 if __name__ == "__main__":
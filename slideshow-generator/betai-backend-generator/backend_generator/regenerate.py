@@ -0,0 +1,145 @@
+import copy
+import json
+import random
+import sys
+
+import _paths  # noqa: F401  (generator_common on sys.path)
+from config import get_config
+from gpt_overlay import OVERLAY_STATS, generate_slide_text
+from templates import overlay_text
+from generator_common.tracing import span
+
+
+# -------------------------------------------------------
+# Targeted single-slide regeneration
+# Re-rolls the text and/or image of ONE slide of a stored post instead of
+# the whole post. The prompt carries only that slide and its neighbours
+# (every locale of the post in the same small call); images are re-picked
+# from the compiled catalog. Slides are numbered like the carousel:
+# 1 = hook, 2–6 = app slides.
+# -------------------------------------------------------
+PARTS = ("text", "image", "both")
+
+
+def _texts(post):
+    return [post["hook"]["text"]] + [s.get("overlay_text", "") for s in post["slides"]]
+
+
+def slide_context(post, number):
+    texts = _texts(post)
+    context = {
+        "slide": number,
+        "current": texts[number - 1],
+        "previous": texts[number - 2] if number > 1 else "",
+        "next": texts[number] if number < len(texts) else "",
+    }
+    if number > 1:
+        slide = post["slides"][number - 2]
+        context["app_name"] = slide["app_name"]
+        context["category_label"] = slide.get("category_label", "")
+    return context
+
+
+def _template_text(post, number, config, rng):
+    """Hook list or phrase template, avoiding the current text when possible."""
+    current = _texts(post)[number - 1]
+    for _ in range(5):
+        if number == 1:
+            text = rng.choice(config["hooks"])
+        else:
+            text = overlay_text(post["slides"][number - 2], config, rng)
+        if text != current:
+            break
+    return text
+
+
+def _set_text(post, number, text, locale=None):
+    target = post["locales"][locale] if locale else post
+    if number == 1:
+        if locale:
+            target["hook"] = text
+        else:
+            target["hook"]["text"] = text
+    elif locale:
+        target["slides"][number - 2] = text
+    else:
+        target["slides"][number - 2]["overlay_text"] = text
+
+
+def regenerate_text(post, number, config, offline=False, rng=random):
+    locales = list(post.get("locales") or ["en"])
+    if not offline:
+        try:
+            by_locale = generate_slide_text(slide_context(post, number), locales)
+        except Exception as exc:
+            print(f"⚠️ Slide {number}: GPT failed ({exc}), using the templates.")
+        else:
+            _set_text(post, number, by_locale[locales[0].lower()])
+            for locale in post.get("locales") or ():
+                _set_text(post, number, by_locale[locale.lower()], locale)
+            return
+    if post.get("locales"):
+        print(f"⚠️ Slide {number}: template copy is English only; locales left unchanged.")
+    _set_text(post, number, _template_text(post, number, config, rng))
+
+
+def regenerate_image(post, number, config, rng=random):
+    item = post["hook"] if number == 1 else post["slides"][number - 2]
+    pool = config["hook_images"] if number == 1 else config["app_images"][item["app_id"]]
+    used = {post["hook"]["image"]} | {s["image"] for s in post["slides"]}
+    candidates = [p for p in pool if p not in used]
+    if candidates:
+        item["image"] = rng.choice(candidates)
+        item.pop("layout", None)
+        if item["image"] in config["layout"]:
+            item["layout"] = config["layout"][item["image"]]
+
+
+def regenerate_slide(post, number, part="both", offline=False, config=None, rng=random):
+    """
+    Return a copy of `post` with slide `number` (1 = hook, 2–6 = apps)
+    rewritten: its text, its image or both. Apps, other slides and other
+    texts are left untouched.
+    """
+    config = config or get_config()
+    if part not in PARTS:
+        raise ValueError(f"part must be one of {PARTS}")
+    if not 1 <= number <= len(post["slides"]) + 1:
+        raise ValueError(f"slide must be between 1 and {len(post['slides']) + 1}")
+
+    post = copy.deepcopy(post)
+    with span("regenerate slide", slide=number, part=part):
+        if part in ("text", "both"):
+            regenerate_text(post, number, config, offline, rng)
+        if part in ("image", "both"):
+            regenerate_image(post, number, config, rng)
+    return post
+
+
+# -------------------------------------------------------
+# CLI execution
+# -------------------------------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Regenerate one slide of a stored BetAI post.")
+    parser.add_argument("post", help="post JSON file (a single post or a batch list)")
+    parser.add_argument("slide", type=int, help="slide number, 1 = hook, 2–6 = app slides")
+    parser.add_argument("--index", type=int, default=0, help="post index in a batch file")
+    parser.add_argument("--part", choices=PARTS, default="both")
+    parser.add_argument("--offline", action="store_true",
+                        help="no GPT call: new text from the data.json phrase templates")
+    parser.add_argument("--in-place", action="store_true", help="write the result back to the file")
+    args = parser.parse_args()
+
+    with open(args.post, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    posts = data if isinstance(data, list) else [data]
+    posts[args.index] = regenerate_slide(posts[args.index], args.slide, args.part, args.offline)
+    if args.in_place:
+        with open(args.post, "w", encoding="utf-8") as f:
+            json.dump(data if isinstance(data, list) else posts[0], f, indent=2)
+
+    post = posts[args.index]
+    print(json.dumps(post["hook"] if args.slide == 1 else post["slides"][args.slide - 2], indent=2))
+    print(OVERLAY_STATS.report(), file=sys.stderr)
@@ -0,0 +1,190 @@
+import random
+import threading
+from collections import Counter
+from functools import lru_cache
+from itertools import combinations
+
+from config import BETAI_APP_ID, SLIDES_PER_POST, get_config
+
+
+# -------------------------------------------------------
+# Walker/Vose alias tables: O(n) build, O(1) draw
+# -------------------------------------------------------
+def build_alias(weights):
+    n = len(weights)
+    total = float(sum(weights))
+    if n == 0 or total <= 0:
+        raise ValueError("Cannot build alias table from empty/zero weights.")
+
+    scaled = [w * n / total for w in weights]
+    prob = [0.0] * n
+    alias = [0] * n
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] + scaled[s] - 1.0
+        (small if scaled[l] < 1.0 else large).append(l)
+
+    for i in large + small:
+        prob[i] = 1.0
+
+    return prob, alias
+
+
+def draw_alias(table, rng=random):
+    prob, alias = table
+    i = rng.randrange(len(prob))
+    return i if rng.random() < prob[i] else alias[i]
+
+
+# -------------------------------------------------------
+# Constrained sampler for (categories, app assignment)
+# - BetAI appears EXACTLY once, only in an eligible category
+# - every other slide gets a non-BetAI app from its category
+# Every valid post is drawn with probability proportional to the
+# product of its app weights (uniform when all weights are 1), with
+# no rejection loop.
+# -------------------------------------------------------
+class AppSampler:
+    def __init__(self, config=None, weights=None, caps=None):
+        """
+        weights: {app_id: float} overriding data.json "weight" (default 1)
+        caps:    {app_id: int} max posts featuring each app across this
+                 sampler's batch (checked between posts)
+        """
+        self.config = config or get_config()
+        self.weights = {
+            app_id: float(meta.get("weight", 1.0))
+            for app_id, meta in self.config["apps"].items()
+        }
+        self.weights.update(weights or {})
+        self.caps = dict(caps or {})
+        self.exposure = Counter()
+        self._lock = threading.Lock()   # batches draw from several threads
+        self._build()
+        self._dirty = False
+
+    def _available(self, app_id):
+        cap = self.caps.get(app_id)
+        return self.weights.get(app_id, 0) > 0 and (
+            cap is None or self.exposure[app_id] < cap
+        )
+
+    def _build(self):
+        """Precompute alias tables; only re-run when an app hits its cap."""
+        config = self.config
+        categories = config["categories"]
+
+        self._filler = {}
+        filler_totals = {}
+        for category in categories:
+            cat_id = category["id"]
+            apps = [a for a in config["filler_apps"][cat_id] if self._available(a)]
+            weights = [self.weights[a] for a in apps]
+            filler_totals[cat_id] = sum(weights)
+            if apps:
+                self._filler[cat_id] = (apps, build_alias(weights))
+
+        betai_weight = (
+            self.weights.get(BETAI_APP_ID, 0)
+            if self._available(BETAI_APP_ID) else 0
+        )
+
+        # One entry per (category subset, BetAI slot), weighted by the
+        # total weight of every app assignment it allows.
+        self._combos = []
+        combo_weights = []
+        for subset in combinations(range(len(categories)), SLIDES_PER_POST):
+            ids = [categories[i]["id"] for i in subset]
+            for slot, cat_id in enumerate(ids):
+                if cat_id not in config["betai_categories"]:
+                    continue
+                weight = betai_weight
+                for other_slot, other_id in enumerate(ids):
+                    if other_slot != slot:
+                        weight *= filler_totals[other_id]
+                if weight > 0:
+                    self._combos.append((subset, slot))
+                    combo_weights.append(weight)
+
+        if not self._combos:
+            raise ValueError(
+                "No valid BetAI post left (check app weights / exposure caps)."
+            )
+        self._combo_table = build_alias(combo_weights)
+
+    def check_capacity(self, count):
+        """
+        Raise ValueError when the caps cannot cover `count` posts, before
+        anything is generated: BetAI is in every post, and the other apps
+        must fill the remaining slides (a necessary bound, apps counted once
+        per post).
+        """
+        betai_cap = self.caps.get(BETAI_APP_ID)
+        if betai_cap is not None and betai_cap < count:
+            raise ValueError(
+                f"BetAI is in every post: cap {BETAI_APP_ID}={betai_cap} cannot cover {count} posts."
+            )
+        fillers = {
+            app_id for apps in self.config["filler_apps"].values() for app_id in apps
+            if self.weights.get(app_id, 0) > 0
+        }
+        room = sum(min(self.caps.get(app_id, count), count) for app_id in fillers)
+        needed = count * (SLIDES_PER_POST - 1)
+        if room < needed:
+            raise ValueError(
+                f"Exposure caps leave room for {room} app slides, {count} posts need {needed}."
+            )
+
+    def draw(self, rng=random):
+        """Return 5 slides (category + app) in random order."""
+        with self._lock:
+            return self._draw(rng)
+
+    def _draw(self, rng):
+        if self._dirty:
+            self._build()
+            self._dirty = False
+
+        categories = self.config["categories"]
+        apps_meta = self.config["apps"]
+
+        subset, slot = self._combos[draw_alias(self._combo_table, rng)]
+
+        slides = []
+        for i, cat_index in enumerate(subset):
+            category = categories[cat_index]
+            if i == slot:
+                app_id = BETAI_APP_ID
+            else:
+                apps, table = self._filler[category["id"]]
+                app_id = apps[draw_alias(table, rng)]
+
+            slides.append({
+                "category_id": category["id"],
+                "category_label": category["label"],
+                "app_id": app_id,
+                "app_name": apps_meta[app_id]["name"],
+            })
+
+        rng.shuffle(slides)
+        self._record(slides)
+        return slides
+
+    def _record(self, slides):
+        # exposure = posts featuring the app, however many slides it fills
+        for app_id in {slide["app_id"] for slide in slides}:
+            self.exposure[app_id] += 1
+            if app_id in self.caps and self.exposure[app_id] >= self.caps[app_id]:
+                self._dirty = True
+
+
+@lru_cache(maxsize=None)
+def get_default_sampler():
+    """Process-wide sampler without caps (weights from data.json)."""
+    return AppSampler()
@@ -0,0 +1,28 @@
+import random
+
+from config import APP_SLOT, BETAI_APP_ID, get_config
+
+
+# -------------------------------------------------------
+# Template engine for overlay copy
+# Slide texts come from the per-category phrase templates in data.json
+# ("phrases", rule-checked by config.compile_phrases), with BetAI's own
+# lines when the slide is BetAI. This is the baseline copy sent to GPT
+# and the final copy in offline mode — no model call, microseconds.
+# -------------------------------------------------------
+def overlay_text(slide, config=None, rng=random):
+    config = config or get_config()
+    phrases = config["phrases"]
+    templates = None
+    if slide["app_id"] == BETAI_APP_ID:
+        templates = phrases["betai"].get(slide["category_id"])
+    templates = templates or phrases["categories"][slide["category_id"]]
+    return rng.choice(templates).replace(APP_SLOT, slide["app_name"])
+
+
+def compose_post_copy(hook_text, slides, config=None, rng=random):
+    """Hook + slide texts in the GPT output shape ({"hook", "slides"})."""
+    return {
+        "hook": hook_text,
+        "slides": [overlay_text(slide, config, rng) for slide in slides],
+    }
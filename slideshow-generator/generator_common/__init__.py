@@ -0,0 +1,9 @@
+"""
+Shared tooling for the Python slideshow generators.
+
+The generators themselves stay plain script folders (lastr_generator/,
+betai-backend-generator/backend_generator/); this package holds what runs
+on top of them. Run its tools from slideshow-generator/, e.g.
+
+    python -m generator_common.service
+"""
@@ -0,0 +1,344 @@
+"""
+Microbenchmarks for the generators' hot helpers on synthetic data.
+
+For every scale (1x, 10x, 100x today's catalog by default) a temporary
+image tree and data.json are generated (empty files are enough: only the
+catalog is read), then pick_random_image, generate_image_sequence,
+assign_apps, pick_images_for_slides, clean_json_output, the compliance
+scan and both build_html are timed. Each generator runs in its own process (module
+names clash). Run from slideshow-generator/:
+
+    python -m generator_common.bench run -o benchmarks/baseline.json
+    python -m generator_common.bench run -o benchmarks/new.json
+    python -m generator_common.bench compare benchmarks/baseline.json benchmarks/new.json
+
+`compare` exits 1 when a case got slower than the threshold allows.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from . import generators
+
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_REPEAT = 5
+MIN_SAMPLE_S = 0.02          # each sample loops until it lasts this long
+DEFAULT_THRESHOLD = 0.25     # >25% slower than the baseline = regression
+RESULTS_VERSION = 1
+SEED = 1234
+
+
+# ------------------------------------------------------------
+# TIMING
+# ------------------------------------------------------------
+
+def measure(fn, repeat=DEFAULT_REPEAT):
+    """Per-call time in microseconds: {min_us, median_us, number}."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SAMPLE_S or number >= 1_000_000:
+            break
+        number *= 10
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "min_us": round(min(samples) * 1e6, 3),
+        "median_us": round(statistics.median(samples) * 1e6, 3),
+        "number": number,
+    }
+
+
+# ------------------------------------------------------------
+# SYNTHETIC DATA
+# ------------------------------------------------------------
+
+def _touch_images(folder: Path, count: int, prefix="img"):
+    folder.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        (folder / f"{prefix}_{i:05d}.jpg").touch()
+
+
+def _count_images(folder: Path) -> int:
+    if not folder.is_dir():
+        return 0
+    return sum(1 for p in folder.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+
+
+def lastr_tree(root: Path, scale: int, config_module):
+    """Lastr_pics-shaped tree with `scale` x today's images per category."""
+    with open(config_module.CONFIG_PATH, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    pics_root = root / "Lastr_pics"
+    for folder_name in raw["images"].values():
+        real = _count_images(Path(config_module.PICS_ROOT) / folder_name)
+        _touch_images(pics_root / folder_name, max(1, real) * scale)
+    return config_module.CONFIG_PATH, pics_root
+
+
+def betai_tree(root: Path, scale: int, config_module):
+    """
+    BetAI data.json + images tree grown `scale`-fold: every category gets
+    `scale` x its apps (synthetic extras next to the real ones, each with
+    the average image count of a real app) and the hook folder `scale` x
+    today's images.
+    """
+    with open(config_module.CONFIG_PATH, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    real_root = Path(config_module.IMAGES_ROOT)
+    images_root = root / "images"
+
+    apps = dict(raw["apps"])
+    for category in raw["categories"]:
+        extras = [f"{category['id']}_{i}" for i in range(len(category["apps"]) * (scale - 1))]
+        for app_id in extras:
+            apps[app_id] = {"name": app_id.replace("_", " ").title()}
+        category["apps"] = list(category["apps"]) + extras
+    raw["apps"] = apps
+
+    real_counts = [_count_images(p) for p in (real_root / "apps").iterdir() if p.is_dir()]
+    per_app = max(1, round(statistics.mean(real_counts))) if real_counts else 1
+    for app_id in apps:
+        real = _count_images(real_root / "apps" / app_id) or per_app
+        _touch_images(images_root / "apps" / app_id, real)
+    _touch_images(images_root / "hooks", max(1, _count_images(real_root / "hooks")) * scale)
+
+    config_path = root / "data.json"
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(raw, f)
+    return config_path, images_root
+
+
+def llm_outputs(scale: int, rng: random.Random) -> dict:
+    """
+    Raw model replies the cleaner has to handle, `scale` posts per payload:
+    a fenced reply (fast path) and one wrapped in prose (regex fallback).
+    """
+    words = "panic control breath slow stamina focus calm body last longer tonight".split()
+
+    def sentence():
+        return " ".join(rng.choice(words) for _ in range(12)).capitalize() + "."
+
+    posts = [{"hook": sentence(), "slides": [sentence() for _ in range(6)]} for _ in range(scale)]
+    payload = json.dumps(posts[0] if scale == 1 else {"variants": posts}, indent=2)
+    return {
+        "fenced": f"```json\n{payload}\n```",
+        "prose": f"Sure! Here is the JSON you asked for:\n{payload}\nLet me know if you need changes.",
+    }
+
+
+def _long_text(rng, scale):
+    return " ".join(rng.choice(("I", "stopped", "guessing", "and", "started", "tracking"))
+                    for _ in range(10 * scale))
+
+
+# ------------------------------------------------------------
+# CASES (run inside the generator's own process)
+# ------------------------------------------------------------
+
+def _bench_lastr(scale, workdir, repeat):
+    config_module = generators.load_isolated("lastr", "config")
+    generate = generators.load("lastr", "generate")
+    gpt_overlay = generators.load("lastr", "gpt_overlay")
+    preview = generators.load("lastr", "preview")
+    compliance = generators.load("lastr", "compliance")
+
+    config_path, pics_root = lastr_tree(workdir, scale, config_module)
+    config = config_module.compile_config(config_path, pics_root)
+    rng = random.Random(SEED)
+    random.seed(SEED)
+    category = max(config["images"], key=lambda c: len(config["images"][c]))
+    route = config["routes"][0]
+    outputs = llm_outputs(scale, rng)
+    images = generate.generate_image_sequence(route, config)
+    post = {
+        "hook": _long_text(rng, scale),
+        "slides": [{"text": _long_text(rng, scale), "image": p} for p in images],
+    }
+
+    return {
+        "compile_config": measure(lambda: config_module.compile_config(config_path, pics_root), repeat),
+        "pick_random_image": measure(lambda: generate.pick_random_image(category, config), repeat),
+        "generate_image_sequence": measure(lambda: generate.generate_image_sequence(route, config), repeat),
+        "clean_json_output.fenced": measure(lambda: gpt_overlay.clean_json_output(outputs["fenced"]), repeat),
+        "clean_json_output.prose": measure(lambda: gpt_overlay.clean_json_output(outputs["prose"]), repeat),
+        "compliance.scan_post": measure(lambda: compliance.scan_post(post), repeat),
+        "build_html": measure(lambda: preview.build_html(post), repeat),
+    }
+
+
+def _bench_betai(scale, workdir, repeat):
+    config_module = generators.load_isolated("betai", "config")
+    generate = generators.load("betai", "generate")
+    gpt_overlay = generators.load("betai", "gpt_overlay")
+    sampler_module = generators.load("betai", "sampler")
+    preview = generators.load("betai", "preview")
+    compliance = generators.load("betai", "compliance")
+
+    config_path, images_root = betai_tree(workdir, scale, config_module)
+    config = config_module.compile_config(config_path, images_root)
+    rng = random.Random(SEED)
+    random.seed(SEED)
+    sampler = sampler_module.AppSampler(config)
+    slides = generate.assign_apps(config, sampler)
+    generate.pick_images_for_slides(config, slides)
+    outputs = llm_outputs(scale, rng)
+    post = {
+        "hook": {"text": _long_text(rng, scale), "image": config["hook_images"][0]},
+        "slides": [dict(s, overlay_text=_long_text(rng, scale)) for s in slides],
+    }
+
+    return {
+        "compile_config": measure(lambda: config_module.compile_config(config_path, images_root), repeat),
+        "sampler_build": measure(lambda: sampler_module.AppSampler(config), repeat),
+        "assign_apps": measure(lambda: generate.assign_apps(config, sampler), repeat),
+        "pick_images_for_slides": measure(lambda: generate.pick_images_for_slides(config, slides), repeat),
+        "clean_json_output.fenced": measure(lambda: gpt_overlay.clean_json_output(outputs["fenced"]), repeat),
+        "clean_json_output.prose": measure(lambda: gpt_overlay.clean_json_output(outputs["prose"]), repeat),
+        "compliance.scan_post": measure(lambda: compliance.scan_post(post), repeat),
+        "build_html": measure(lambda: preview.build_html(post), repeat),
+    }
+
+
+BENCHES = {"lastr": _bench_lastr, "betai": _bench_betai}
+
+
+def _run_generator(name, scales, repeat):
+    """Child-process entry point: {case[xN]: timing} for one generator."""
+    results = {}
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as workdir:
+            for case, timing in BENCHES[name](scale, Path(workdir), repeat).items():
+                results[f"{name}.{case}[x{scale}]"] = timing
+    return results
+
+
+def run(names=None, scales=DEFAULT_SCALES, repeat=DEFAULT_REPEAT) -> dict:
+    """Benchmark every generator (one fresh process each) and return the results doc."""
+    names = names or list(BENCHES)
+    results = {}
+    # spawn: a forked child would inherit whichever generator this process loaded
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.update(pool.submit(_run_generator, name, tuple(scales), repeat).result())
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "scales": list(scales),
+        "results": results,
+    }
+
+
+# ------------------------------------------------------------
+# BASELINES
+# ------------------------------------------------------------
+
+def load_results(path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    if doc.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path}: unsupported results version {doc.get('version')}")
+    return doc
+
+
+def compare(baseline: dict, current: dict, threshold=DEFAULT_THRESHOLD) -> list:
+    """
+    Rows (case, base_us, new_us, ratio, status) for cases present in both.
+    Best-of-N (min) times are compared: they are the least noisy.
+    """
+    rows = []
+    for case, base in baseline["results"].items():
+        new = current["results"].get(case)
+        if new is None:
+            rows.append((case, base["min_us"], None, None, "missing"))
+            continue
+        ratio = new["min_us"] / base["min_us"] if base["min_us"] else 1.0
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((case, base["min_us"], new["min_us"], ratio, status))
+    return rows
+
+
+def _print_results(doc):
+    print(f"{'case':<52}{'min µs':>12}{'median µs':>12}")
+    for case, timing in doc["results"].items():
+        print(f"{case:<52}{timing['min_us']:>12.2f}{timing['median_us']:>12.2f}")
+
+
+def _print_comparison(rows, threshold):
+    icons = {"ok": "  ", "faster": "🟢", "regression": "🔴", "missing": "⚪"}
+    print(f"{'case':<52}{'base µs':>12}{'new µs':>12}{'ratio':>8}")
+    for case, base_us, new_us, ratio, status in rows:
+        new = f"{new_us:>12.2f}" if new_us is not None else f"{'-':>12}"
+        rel = f"{ratio:>7.2f}x" if ratio is not None else f"{'-':>8}"
+        print(f"{case:<52}{base_us:>12.2f}{new}{rel} {icons[status]}")
+    regressions = sum(1 for row in rows if row[4] == "regression")
+    print(f"{regressions} regression(s) over {threshold:.0%}" if regressions
+          else f"✅ no case more than {threshold:.0%} slower")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator microbenchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="time every case at every scale")
+    p.add_argument("-o", "--out", help="write results JSON here (e.g. a new baseline)")
+    p.add_argument("--generator", action="append", choices=sorted(BENCHES),
+                   help="only these generators (repeatable)")
+    p.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                   help="comma-separated catalog multipliers (default 1,10,100)")
+    p.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    p.add_argument("--compare", metavar="BASELINE", help="compare against a baseline afterwards")
+    p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    p = sub.add_parser("compare", help="flag cases slower than a baseline")
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                   help="allowed slowdown, fraction (default 0.25)")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        rows = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+        sys.exit(1 if _print_comparison(rows, args.threshold) else 0)
+
+    scales = [int(s) for s in args.scales.split(",") if s]
+    doc = run(args.generator, scales, args.repeat)
+    _print_results(doc)
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"📊 results -> {out}")
+    if args.compare:
+        rows = compare(load_results(args.compare), doc, args.threshold)
+        sys.exit(1 if _print_comparison(rows, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
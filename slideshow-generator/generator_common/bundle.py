@@ -0,0 +1,278 @@
+"""
+Upload-ready export bundles.
+
+Packs posts into zip archives for the social team: the six slides
+(rendered PNGs, or the original images with --originals; with several
+--aspects, one folder of PNGs per aspect, e.g. 9x16/ 4x5/ 1x1/), a caption.json
+with the hook and every slide text (locales included) and a manifest.json
+listing each file with its size and sha256. Slides are written straight
+into the archive — no temp copies — and posts are prepared in parallel,
+one process each. Run from slideshow-generator/:
+
+    python -m generator_common.bundle lastr_generator/output.json --out-dir bundles
+    python -m generator_common.bundle runs/batch.json --batch bundles/batch.zip --jobs 8
+    python -m generator_common.bundle lastr_generator/output.json --aspects 9:16,4:5,1:1
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from .generators import detect_generator
+from .render import (
+    ASPECTS, ASPECTS_ENV, DEFAULT_ASPECT, STYLE_VERSION, aspect_tag, configured_aspects,
+    parse_aspects, render_post_aspects, slides_for_post,
+)
+from .image_cache import share_with_workers
+from .render_cache import RenderCache
+from .tracing import span
+from .video import named_posts
+
+MANIFEST_VERSION = 1
+COPY_CHUNK = 1 << 20
+PNG_COMPRESS_LEVEL = 1     # ~3x faster than the default, a few % larger
+
+
+# ------------------------------------------------------------
+# CONTENT
+# ------------------------------------------------------------
+
+def caption_for(post: dict) -> dict:
+    """Hook + slide texts (and per-locale copies) as the social team posts them."""
+    if detect_generator(post) == "betai":
+        caption = {
+            "generator": "betai",
+            "hook": post["hook"]["text"],
+            "slides": [
+                {"app": s.get("app_name", ""), "category": s.get("category_label", ""),
+                 "text": s.get("overlay_text", "")}
+                for s in post["slides"]
+            ],
+        }
+        if post.get("locales"):
+            caption["locales"] = post["locales"]
+        return caption
+    caption = {
+        "generator": "lastr",
+        "hook": post.get("hook", ""),
+        "slides": [{"text": s.get("text", "")} for s in post["slides"]],
+    }
+    if post.get("route"):
+        caption["route"] = post["route"]
+    return caption
+
+
+def slide_files(post, originals=False, cache=None, aspects=None) -> list:
+    """
+    [(file name, payload)] for a post's slides, in order: rendered PIL
+    images, or the source Paths for originals. Payloads are encoded/read
+    only when written into the archive. Several aspects are rendered in one
+    pass and filed under a folder each.
+    """
+    if originals:
+        return [
+            (f"slide-{n}{Path(spec['image']).suffix.lower()}", Path(spec["image"]))
+            for n, spec in enumerate(slides_for_post(post), start=1)
+        ]
+    rendered = render_post_aspects(post, aspects, cache)
+    return [
+        (f"{aspect_tag(aspect) + '/' if len(rendered) > 1 else ''}slide-{n}.png", image)
+        for aspect, slides in rendered.items()
+        for n, image in enumerate(slides, start=1)
+    ]
+
+
+class _Sink:
+    """Write-through stream that hashes and counts what passes (or buffers it)."""
+
+    def __init__(self, out=None):
+        self.out = out
+        self.buffer = bytearray() if out is None else None
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        if self.out is None:
+            self.buffer += data
+        else:
+            self.out.write(data)
+        self.digest.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def encode_png(image) -> bytes:
+    with span("encode png", cat="render"):
+        sink = _Sink()
+        image.save(sink, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+    return bytes(sink.buffer)
+
+
+# ------------------------------------------------------------
+# ARCHIVE
+# ------------------------------------------------------------
+
+def _add_file(zf, arcname, payload) -> dict:
+    """Stream an image, bytes or a source file into the archive; returns its manifest entry."""
+    if isinstance(payload, Path) and not payload.is_file():
+        raise FileNotFoundError(f"Slide image not found: {payload}")
+
+    info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+    # images are already compressed: store them, deflate only the JSON
+    info.compress_type = zipfile.ZIP_DEFLATED if arcname.endswith(".json") else zipfile.ZIP_STORED
+    with zf.open(info, "w", force_zip64=True) as out:
+        sink = _Sink(out)
+        if isinstance(payload, (bytes, bytearray)):
+            sink.write(payload)
+        elif isinstance(payload, Path):
+            with open(payload, "rb") as src:
+                while chunk := src.read(COPY_CHUNK):
+                    sink.write(chunk)
+        else:
+            with span("encode png", cat="render"):
+                payload.save(sink, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+    return {"path": arcname, "bytes": sink.size, "sha256": sink.digest.hexdigest()}
+
+
+def write_post(zf, name, post, files, prefix="") -> dict:
+    """Slides + caption.json of one post under `prefix`; returns its manifest entry."""
+    entries = [_add_file(zf, f"{prefix}{file_name}", payload) for file_name, payload in files]
+    caption = json.dumps(caption_for(post), indent=2, ensure_ascii=False).encode("utf-8")
+    entries.append(_add_file(zf, f"{prefix}caption.json", caption))
+    return {"name": name, "generator": detect_generator(post), "files": entries}
+
+
+def _manifest(posts, originals, aspects=None) -> bytes:
+    return json.dumps({
+        "version": MANIFEST_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "slides": "original" if originals else "rendered",
+        "style_version": None if originals else STYLE_VERSION,
+        "aspects": None if originals else {
+            a: list(ASPECTS[a]) for a in (parse_aspects(aspects) if aspects else configured_aspects())
+        },
+        "posts": posts,
+    }, indent=2).encode("utf-8")
+
+
+def export_bundle(post, out_path, name=None, originals=False, cache=None, aspects=None) -> Path:
+    """One post -> one zip (slides, caption.json, manifest.json)."""
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    files = slide_files(post, originals, cache, aspects)
+    # written aside and renamed: a failing slide leaves no half-written zip
+    tmp = out_path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        with span("bundle", cat="pipeline", out=out_path.name):
+            with zipfile.ZipFile(tmp, "w") as zf:
+                entry = write_post(zf, name or out_path.stem, post, files)
+                _add_file(zf, "manifest.json", _manifest([entry], originals, aspects))
+        os.replace(tmp, out_path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return out_path
+
+
+def export_many(posts_with_names, out_dir, jobs=None, **options) -> list:
+    """A zip per post, written by parallel processes."""
+    jobs = jobs or os.cpu_count() or 1
+    out_dir = Path(out_dir)
+
+    results = []
+    share_with_workers()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(export_bundle, post, out_dir / f"{name}.zip", name, **options): name
+            for name, post in posts_with_names
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                print(f"❌ {name}: {exc}")
+    return results
+
+
+def _prepare(name, post, originals, cache, aspects):
+    # encoded here so the parallel part includes PNG compression
+    files = slide_files(post, originals, cache, aspects)
+    # a post must fail here, not halfway through its folder in the archive
+    for _, payload in files:
+        if isinstance(payload, Path) and not payload.is_file():
+            raise FileNotFoundError(f"{name}: slide image not found: {payload}")
+    return name, post, [(f, encode_png(p) if hasattr(p, "save") else p) for f, p in files]
+
+
+def export_batch(posts_with_names, out_path, jobs=None, originals=False, cache=None,
+                 aspects=None) -> tuple:
+    """
+    Every post in ONE zip (a folder per post, one manifest at the root).
+    Workers render, encode and check each post in parallel; the archive is
+    written here, in input order, as their slides arrive. Returns
+    (zip path, posts written); posts that failed are left out.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    entries = []
+    share_with_workers()
+    with zipfile.ZipFile(out_path, "w") as zf, ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_prepare, name, post, originals, cache, aspects)
+                   for name, post in posts_with_names]
+        for future in futures:
+            try:
+                name, post, files = future.result()
+                entries.append(write_post(zf, name, post, files, prefix=f"{name}/"))
+            except Exception as exc:
+                print(f"❌ {exc}")
+        _add_file(zf, "manifest.json", _manifest(entries, originals, aspects))
+    return out_path, len(entries)
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Export posts as upload-ready zip bundles.")
+    parser.add_argument("posts", nargs="+", help="post JSON files (single post or list)")
+    parser.add_argument("--out-dir", default="bundles", help="one zip per post here")
+    parser.add_argument("--batch", metavar="ZIP", help="write every post into this one zip instead")
+    parser.add_argument("--originals", action="store_true",
+                        help="pack the source images instead of rendered slides")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="posts prepared in parallel (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="redraw every slide instead of reusing cached renders")
+    parser.add_argument("--aspects", type=parse_aspects, default=None,
+                        help=f"comma-separated, from {', '.join(ASPECTS)} "
+                             f"(default: ${ASPECTS_ENV} or {DEFAULT_ASPECT})")
+    args = parser.parse_args()
+
+    named = named_posts(args.posts)
+    cache = None if args.no_cache or args.originals else RenderCache()
+    started = time.perf_counter()
+    if args.batch:
+        out, written = export_batch(named, args.batch, args.jobs, args.originals, cache,
+                                    args.aspects)
+        size = out.stat().st_size
+        print(f"📦 {written}/{len(named)} posts -> {out} ({size / 1e6:.1f} MB)")
+    else:
+        written = export_many(named, args.out_dir, args.jobs, originals=args.originals,
+                              cache=cache, aspects=args.aspects)
+        size = sum(p.stat().st_size for p in written)
+        print(f"📦 {len(written)}/{len(named)} bundles -> {args.out_dir} ({size / 1e6:.1f} MB)")
+    print(f"⏱️ {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
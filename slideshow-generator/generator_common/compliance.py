@@ -0,0 +1,166 @@
+"""
+Local compliance filter for generated copy.
+
+Every forbidden term of a generator (plus per-app rules for BetAI) is
+compiled into ONE case-insensitive alternation, so a text is scanned in a
+single pass by the regex engine whatever the number of terms — the same
+job as an Aho–Corasick automaton, but running in C. A post's hook and
+slides are checked in microseconds right after generation; offending
+slides are rewritten with targeted regeneration (regenerate.py) and a
+post that still fails is flagged or, in strict mode, rejected. No
+moderation call is made.
+
+Terms match whole words; a trailing "*" matches any word starting with
+the term ("guarantee*" -> guaranteed, guarantees). Run from
+slideshow-generator/ to try a filter:
+
+    python -m generator_common.compliance "Guaranteed wins, risk-free" --term "guarantee*" --term risk-free
+"""
+import re
+import threading
+import time
+
+MAX_ROUNDS = 2       # targeted rewrites before giving up on a post
+
+
+class ComplianceError(ValueError):
+    """Raised in strict mode when a post still breaks a rule after its rewrites."""
+
+    def __init__(self, violations):
+        self.violations = violations
+        terms = ", ".join(sorted({v["term"] for v in violations}))
+        super().__init__(f"post breaks compliance rules ({terms})")
+
+
+def _normalize(text):
+    # typographic apostrophes/dashes would otherwise dodge "can't" / "risk-free"
+    return text.replace("’", "'").replace("‑", "-").replace("–", "-")
+
+
+class TermFilter:
+    """{term: rule} compiled once; find() returns [(term, rule)] in text order."""
+
+    def __init__(self, rules):
+        self.rules = {}
+        self.prefixes = []
+        alternatives = []
+        for term, rule in rules.items():
+            term = " ".join(_normalize(term).lower().split())
+            if not term:
+                continue
+            prefix = term.endswith("*")
+            term = term.rstrip("*")
+            self.rules[term] = rule
+            body = r"\s+".join(re.escape(word) for word in term.split(" "))
+            if prefix:
+                self.prefixes.append(term)
+                body += r"[\w'-]*"
+            alternatives.append(body)
+        # longest first, so "sexual" wins over "sex" at the same position
+        alternatives.sort(key=len, reverse=True)
+        self.pattern = (
+            re.compile(rf"(?<![\w-])(?:{'|'.join(alternatives)})(?![\w-])", re.IGNORECASE)
+            if alternatives else None
+        )
+
+    def __bool__(self):
+        return self.pattern is not None
+
+    def _term_for(self, matched):
+        matched = " ".join(matched.lower().split())
+        if matched in self.rules:
+            return matched
+        return max((p for p in self.prefixes if matched.startswith(p)), key=len)
+
+    def find(self, text) -> list:
+        if self.pattern is None or not text:
+            return []
+        found = []
+        for match in self.pattern.finditer(_normalize(text)):
+            term = self._term_for(match.group(0))
+            found.append((term, self.rules[term]))
+        return found
+
+
+# ------------------------------------------------------------
+# ENFORCEMENT
+# ------------------------------------------------------------
+
+class ComplianceStats:
+    """Posts scanned / rewritten / still flagged, for the end-of-run report."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self._lock = threading.Lock()
+        self.posts = 0
+        self.violations = 0
+        self.fixed = 0
+        self.flagged = 0
+
+    def record(self, violations: int, clean: bool):
+        with self._lock:
+            self.posts += 1
+            self.violations += violations
+            if violations:
+                self.fixed += int(clean)
+                self.flagged += int(not clean)
+
+    def report(self) -> str:
+        with self._lock:
+            return (
+                f"[{self.label}] {self.posts} posts scanned, {self.violations} violations, "
+                f"{self.fixed} fixed by rewrites, {self.flagged} flagged"
+            )
+
+
+def enforce(post, scan, fix, strict=False, rounds=MAX_ROUNDS, stats=None):
+    """
+    scan(post) -> [{"slide", "term", "rule", ...}]; fix(post, slides,
+    last_round) -> post with those slides rewritten (the last round should
+    use the rule-checked templates). Returns the clean post, or the post
+    with a "compliance" block listing what is left; strict=True raises
+    ComplianceError instead.
+    """
+    # imported here: configs load TermFilter and must stay light to import
+    from .tracing import span
+
+    with span("compliance"):
+        found = initial = scan(post)
+    for attempt in range(rounds if found else 0):
+        slides = sorted({v["slide"] for v in found})
+        print(f"⚠️ compliance: rewriting slide(s) {slides} "
+              f"({', '.join(sorted({v['term'] for v in found}))})")
+        post = fix(post, slides, attempt == rounds - 1)
+        with span("compliance"):
+            found = scan(post)
+        if not found:
+            break
+
+    if stats is not None:
+        stats.record(len(initial), clean=not found)
+    if found:
+        if strict:
+            raise ComplianceError(found)
+        post["compliance"] = {"flagged": found}
+    return post
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scan a text with a term filter.")
+    parser.add_argument("text")
+    parser.add_argument("--term", action="append", default=[], help="forbidden term (repeatable)")
+    parser.add_argument("--repeat", type=int, default=10000, help="timing loop size")
+    args = parser.parse_args()
+
+    term_filter = TermFilter({t: "forbidden" for t in args.term})
+    print(term_filter.find(args.text))
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        term_filter.find(args.text)
+    print(f"⏱️ {(time.perf_counter() - started) / args.repeat * 1e6:.1f} µs per scan")
+
+
+if __name__ == "__main__":
+    main()
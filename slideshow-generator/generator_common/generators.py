@@ -0,0 +1,92 @@
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+
+
+# ------------------------------------------------------------
+# GENERATOR REGISTRY
+# ------------------------------------------------------------
+# Both generators are script folders with clashing module names
+# (generate, gpt_overlay, preview, config), so a process can host only
+# one of them. Tools that need both run one worker process per generator.
+
+SLIDESHOW_ROOT = Path(__file__).resolve().parent.parent
+
+GENERATORS = {
+    "lastr": {
+        "dir": SLIDESHOW_ROOT / "lastr_generator",
+        "generate": "generate_post",
+        "images_root": "PICS_ROOT",
+    },
+    "betai": {
+        "dir": SLIDESHOW_ROOT / "betai-backend-generator" / "backend_generator",
+        "generate": "generate_one_post",
+        "images_root": "IMAGES_ROOT",
+    },
+}
+
+_active = None
+
+
+def activate(name: str):
+    """Put a generator's folder on sys.path so its modules import by name."""
+    global _active
+    if name not in GENERATORS:
+        raise ValueError(f"Unknown generator '{name}' (expected one of {sorted(GENERATORS)})")
+    if _active == name:
+        return
+    if _active is not None:
+        raise RuntimeError(
+            f"Generator '{_active}' is already loaded in this process; "
+            f"run '{name}' in a separate process."
+        )
+    sys.path.insert(0, str(GENERATORS[name]["dir"]))
+    _active = name
+
+
+def load(name: str, module: str):
+    """Import one of a generator's modules (activating it first)."""
+    activate(name)
+    return importlib.import_module(module)
+
+
+def load_isolated(name: str, module: str):
+    """
+    Load a fresh copy of a module without sibling imports (preview, config:
+    stdlib + generator_common only) straight from its file, under a generator-specific name. Unlike load(), this works for
+    both generators in the same process and re-reads the file on every call.
+    """
+    path = GENERATORS[name]["dir"] / f"{module}.py"
+    spec = importlib.util.spec_from_file_location(f"_{name}_{module}", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def image_root(name: str) -> Path:
+    """Folder holding a generator's image catalog (from its config module)."""
+    return Path(getattr(load_isolated(name, "config"), GENERATORS[name]["images_root"])).resolve()
+
+
+def generate(name: str, **kwargs):
+    """Run the generator's main entry point and return the post dict."""
+    if name == "lastr":
+        kwargs.setdefault("output_path", None)
+    entry = getattr(load(name, "generate"), GENERATORS[name]["generate"])
+    return entry(**kwargs)
+
+
+def regenerate_slide(name: str, post: dict, slide: int, **kwargs) -> dict:
+    """Rewrite one slide of a stored post (text, image or both; see <generator>/regenerate.py)."""
+    return load(name, "regenerate").regenerate_slide(post, slide, **kwargs)
+
+
+def build_preview(name: str, post: dict) -> str:
+    """Render a post to HTML with the generator's own preview template."""
+    return load(name, "preview").build_html(post)
+
+
+def detect_generator(post: dict) -> str:
+    """Guess which generator produced a post (BetAI hooks carry an image)."""
+    return "betai" if isinstance(post.get("hook"), dict) else "lastr"
@@ -0,0 +1,209 @@
+"""
+Hedged OpenAI requests (opt-in) to cut tail latency.
+
+A few overlay requests hang far longer than the median. With hedging on,
+an attempt that has not finished after the p95 (OPENAI_HEDGE_PERCENTILE)
+of recent latencies gets a duplicate; the first valid result wins and the
+other request is cancelled — it streams, so cancelling hangs up
+mid-generation instead of paying for the rest of the output. Extra spend
+is capped: hedges never exceed OPENAI_HEDGE_BUDGET (default 10%) of the
+calls made.
+
+    OPENAI_HEDGE=1 python generate.py
+
+Callers wrap one attempt:
+
+    result = hedged(lambda cancelled: attempt(prompt, cancelled), "lastr_overlay")
+
+where attempt() passes `cancelled` to create_response() and returns None
+(or raises) when the output is invalid.
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from .tracing import counter, span
+
+DEFAULT_PERCENTILE = 95
+DEFAULT_BUDGET = 0.1         # hedges per call, at most
+MIN_SAMPLES = 20             # latencies needed before hedging starts
+HISTORY = 200                # recent latencies kept per key
+MIN_DELAY = 1.0              # never hedge before this many seconds
+
+
+class HedgeCancelled(Exception):
+    """Raised inside the losing attempt once the other one has won."""
+
+
+def create_response(client, cancelled=None, **kwargs):
+    """
+    client.responses.create(**kwargs). With a `cancelled` event the
+    response is streamed and dropped as soon as the event is set, which
+    closes the connection and stops generation.
+    """
+    if cancelled is None:
+        return client.responses.create(**kwargs)
+    if cancelled.is_set():
+        # lost while waiting for the rate limiter: never send it
+        raise HedgeCancelled()
+    with client.responses.create(stream=True, **kwargs) as stream:
+        for event in stream:
+            if cancelled.is_set():
+                raise HedgeCancelled()
+            if event.type == "response.completed":
+                return event.response
+            if event.type in ("response.failed", "response.incomplete"):
+                raise RuntimeError(f"{event.type}: {getattr(event.response, 'error', None)}")
+    raise RuntimeError("response stream ended without a result")
+
+
+class Hedger:
+    def __init__(self, percentile=DEFAULT_PERCENTILE, budget=DEFAULT_BUDGET,
+                 min_samples=MIN_SAMPLES, min_delay=MIN_DELAY):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+
+        self._lock = threading.Lock()
+        self._latencies = {}         # key -> deque of seconds
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0,
+                      "over_budget": 0, "cancelled": 0}
+
+    # ---- trigger ------------------------------------------------
+
+    def record(self, key, latency):
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=HISTORY)).append(latency)
+
+    def delay(self, key):
+        """Seconds to wait before hedging `key`; None until enough samples exist."""
+        with self._lock:
+            samples = sorted(self._latencies.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return max(self.min_delay, samples[index])
+
+    def _may_hedge(self):
+        with self._lock:
+            if self.stats["hedged"] + 1 > self.budget * self.stats["calls"]:
+                self.stats["over_budget"] += 1
+                return False
+            self.stats["hedged"] += 1
+            return True
+
+    # ---- run ----------------------------------------------------
+
+    def run(self, fn, key="default"):
+        """
+        fn(cancelled) -> result, None or an exception when invalid. Returns
+        the first valid result; if every attempt fails, the primary's
+        outcome (None or its exception).
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+        done = queue.Queue()
+        attempts = []
+
+        def start(label):
+            cancelled = threading.Event()
+            attempts.append(cancelled)
+
+            def target():
+                started = time.monotonic()
+                try:
+                    outcome = (fn(cancelled), None)
+                except HedgeCancelled:
+                    with self._lock:
+                        self.stats["cancelled"] += 1
+                    return
+                except Exception as exc:
+                    outcome = (None, exc)
+                done.put((label, outcome, time.monotonic() - started))
+
+            threading.Thread(target=target, name=f"hedge-{key}-{label}", daemon=True).start()
+
+        started = time.monotonic()
+        start("primary")
+        delay = self.delay(key)
+        try:
+            label, outcome, latency = done.get(timeout=delay)
+        except queue.Empty:
+            if not self._may_hedge():
+                label, outcome, latency = done.get()
+            else:
+                with span("hedge", cat="llm", key=key, after_s=round(delay, 2)):
+                    start("hedge")
+                    label, outcome, latency = done.get()
+                    if outcome[0] is None:
+                        # first one back was invalid: the other may still win
+                        label, outcome, latency = self._second(done, (label, outcome, latency))
+                for cancelled in attempts:
+                    cancelled.set()
+                if label == "hedge" and outcome[0] is not None:
+                    with self._lock:
+                        self.stats["hedge_wins"] += 1
+                counter("hedges", hedged=self.stats["hedged"], wins=self.stats["hedge_wins"])
+
+        if outcome[0] is not None:
+            # The trigger estimates the PRIMARY's latency. When the hedge
+            # wins, the primary ran at least this long: recording only the
+            # winner would drag the percentile (and the delay) down.
+            self.record(key, latency if label == "primary" else time.monotonic() - started)
+        result, exc = outcome
+        if exc is not None:
+            raise exc
+        return result
+
+    @staticmethod
+    def _second(done, first):
+        label, outcome, latency = done.get()
+        if outcome[0] is not None:
+            return label, outcome, latency
+        # both failed: report the primary's outcome
+        return first if first[0] == "primary" else (label, outcome, latency)
+
+    # ---- metrics ------------------------------------------------
+
+    def summary(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        hedged = stats["hedged"]
+        return {
+            "percentile": self.percentile,
+            "budget": self.budget,
+            **stats,
+            "hedge_rate": round(hedged / stats["calls"], 3) if stats["calls"] else 0.0,
+            "win_rate": round(stats["hedge_wins"] / hedged, 3) if hedged else 0.0,
+        }
+
+    def report(self) -> str:
+        s = self.summary()
+        return (
+            f"[hedging] {s['calls']} calls, {s['hedged']} hedged ({s['hedge_rate']:.1%}), "
+            f"{s['hedge_wins']} hedge wins ({s['win_rate']:.1%}), "
+            f"{s['over_budget']} over budget, {s['cancelled']} cancelled"
+        )
+
+
+@lru_cache(maxsize=None)
+def get_hedger():
+    """Process-wide hedger, or None unless OPENAI_HEDGE is set."""
+    if os.getenv("OPENAI_HEDGE", "") in ("", "0"):
+        return None
+    return Hedger(
+        percentile=float(os.getenv("OPENAI_HEDGE_PERCENTILE", DEFAULT_PERCENTILE)),
+        budget=float(os.getenv("OPENAI_HEDGE_BUDGET", DEFAULT_BUDGET)),
+    )
+
+
+def hedged(fn, key="default"):
+    """Run fn(cancelled) through the hedger when enabled, else fn(None)."""
+    hedger = get_hedger()
+    if hedger is None:
+        return fn(None)
+    return hedger.run(fn, key)
@@ -0,0 +1,197 @@
+"""
+Decoded-background cache shared by render processes.
+
+The same few hundred backgrounds are reused across thousands of slides,
+and decoding + cover-resizing a photo costs far more than drawing the
+text on it. render.load_backgrounds() goes through this cache: the first
+process to need (image, slide size) decodes it once and publishes the raw
+RGB pixels in a named shared-memory block; every other render worker
+(video export, bundles, render CLI) attaches to that block instead of
+decoding again.
+
+Each process keeps an LRU of the blocks it created or attached, bounded
+in bytes (SLIDESHOW_IMAGE_CACHE_MB, default 512; 0 disables the cache).
+A block is unlinked when its creator evicts it or exits; processes that
+still map it keep working, later ones simply decode again.
+"""
+import atexit
+import hashlib
+import os
+import shutil
+import struct
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing import util as mp_util
+from pathlib import Path
+
+from PIL import Image
+
+CACHE_ENV = "SLIDESHOW_IMAGE_CACHE_MB"
+DEFAULT_MAX_MB = 512
+NAME_PREFIX = "ssimg_"            # + 20 hex chars: fits macOS' 31-char limit
+HEADER = struct.Struct("<BII")    # ready flag, width, height
+SHM_DIR = Path("/dev/shm")
+SHM_HEADROOM = 64 << 20           # never fill /dev/shm (writes past it SIGBUS)
+
+
+def _key(path, size):
+    stat = os.stat(path)
+    raw = f"{Path(path).resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _shm_has_room(nbytes):
+    if not SHM_DIR.is_dir():
+        return True   # not Linux tmpfs: the OS backs it with regular memory
+    return shutil.disk_usage(SHM_DIR).free - nbytes > SHM_HEADROOM
+
+
+class ImageCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_MB << 20, shared=True):
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (image, nbytes, owned shm or None)
+        self.bytes = 0
+        self.stats = {"hits": 0, "shared_hits": 0, "decoded": 0, "evicted": 0}
+
+    # ---- shared memory ------------------------------------------
+
+    def _attach(self, key, size):
+        try:
+            shm = shared_memory.SharedMemory(name=NAME_PREFIX + key)
+        except (FileNotFoundError, OSError):
+            return None
+        # Attaching registers the name with this process' resource tracker.
+        # Pools started after share_with_workers() all use their parent's
+        # tracker, where that is a no-op and the block stays owned (and
+        # unlinked) by its creator.
+        try:
+            ready, width, height = HEADER.unpack_from(shm.buf)
+            if not ready or (width, height) != tuple(size):
+                return None   # still being written by its creator
+            # one copy out of the block: the caller gets pixels of its own
+            pixels = shm.buf[HEADER.size:HEADER.size + width * height * 3]
+            image = Image.frombuffer("RGB", size, pixels, "raw", "RGB", 0, 1).copy()
+            pixels.release()
+            return image
+        finally:
+            shm.close()
+
+    def _publish(self, key, image):
+        nbytes = HEADER.size + image.width * image.height * 3
+        if not _shm_has_room(nbytes):
+            return None
+        try:
+            shm = shared_memory.SharedMemory(name=NAME_PREFIX + key, create=True, size=nbytes)
+        except (FileExistsError, OSError):
+            return None   # another process got there first (or no shm here)
+        shm.buf[HEADER.size:nbytes] = image.tobytes()
+        HEADER.pack_into(shm.buf, 0, 1, image.width, image.height)
+        return shm
+
+    # ---- LRU ----------------------------------------------------
+
+    def get(self, path, size, decode):
+        """Decoded, cover-cropped background; decode(path, size) runs on a miss."""
+        size = tuple(size)
+        key = _key(path, size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[0].copy()
+
+        image = self._attach(key, size) if self.shared else None
+        owned = None
+        if image is not None:
+            self.stats["shared_hits"] += 1
+        else:
+            image = decode(path, size)
+            self.stats["decoded"] += 1
+            owned = self._publish(key, image) if self.shared else None
+
+        self._store(key, image, owned)
+        return image.copy()
+
+    def _store(self, key, image, owned):
+        nbytes = image.width * image.height * 3
+        if nbytes > self.max_bytes:
+            self._release(owned)
+            return
+        with self._lock:
+            if key in self._entries:
+                self._release(owned)
+                return
+            self._entries[key] = (image, nbytes, owned)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_bytes, evicted_shm) = self._entries.popitem(last=False)
+                self.bytes -= evicted_bytes
+                self.stats["evicted"] += 1
+                self._release(evicted_shm)
+
+    @staticmethod
+    def _release(shm):
+        if shm is None:
+            return
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            for _, _, shm in self._entries.values():
+                self._release(shm)
+            self._entries.clear()
+            self.bytes = 0
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "mb": round(self.bytes / (1 << 20), 1),
+                "max_mb": round(self.max_bytes / (1 << 20), 1),
+                **self.stats,
+            }
+
+    def report(self) -> str:
+        s = self.summary()
+        return (
+            f"[image cache] {s['decoded']} decoded, {s['hits']} hits, "
+            f"{s['shared_hits']} from other processes, {s['evicted']} evicted, "
+            f"{s['mb']}/{s['max_mb']} MB"
+        )
+
+
+@lru_cache(maxsize=None)
+def _cache_for(pid):
+    max_mb = float(os.getenv(CACHE_ENV, DEFAULT_MAX_MB))
+    if max_mb <= 0:
+        return None
+    cache = ImageCache(int(max_mb * (1 << 20)))
+    atexit.register(cache.clear)
+    # pool workers leave through os._exit(), which skips atexit
+    mp_util.Finalize(None, cache.clear, exitpriority=100)
+    return cache
+
+
+def share_with_workers():
+    """
+    Call in the parent before starting a render pool. Forked workers only
+    share the parent's resource tracker if it already runs; otherwise each
+    starts its own, and a worker that merely attached a block would "clean
+    up" (unlink) it at exit and warn about a leak.
+    """
+    if get_image_cache() is not None:
+        resource_tracker.ensure_running()
+
+
+def get_image_cache():
+    """This process' cache (None when disabled); a forked child starts its own."""
+    return _cache_for(os.getpid())
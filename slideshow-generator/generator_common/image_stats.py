@@ -0,0 +1,201 @@
+"""
+Per-image layout statistics for text placement and contrast.
+
+An offline pass analyzes every catalog image once (vectorized NumPy over a
+small 9:16 cover-crop, i.e. what a slide actually shows):
+
+    luminance   mean luminance of the top / middle / bottom thirds (0..1)
+    detail      mean luminance gradient of each third (low = calm area)
+    safe_zone   calmest third for text, biased towards the bottom
+    dominant    most common color (4-bit quantized), as #rrggbb
+    style       {"position", "text_color", "stroke_color", "scrim_color"}
+
+Results are written next to the images as layout_stats.json. The generator
+configs load it into their image catalog and the renderer/preview only look
+entries up. Run from slideshow-generator/:
+
+    python -m generator_common.image_stats              # both generators
+    python -m generator_common.image_stats lastr --force
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from PIL import Image
+
+CATALOG_NAME = "layout_stats.json"
+ANALYSIS_VERSION = 1
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+SAMPLE_SIZE = (54, 96)     # 9:16, enough for region statistics
+ZONES = ("top", "middle", "bottom")
+BOTTOM_BIAS = 0.8          # another zone must be this much calmer to win
+BRIGHT = 0.6               # zone luminance above which text turns dark
+
+LIGHT_TEXT = {"text_color": "#e5e7eb", "stroke_color": "#000000", "scrim_color": "#000000"}
+DARK_TEXT = {"text_color": "#111827", "stroke_color": "#ffffff", "scrim_color": "#ffffff"}
+
+
+# ------------------------------------------------------------
+# ANALYSIS
+# ------------------------------------------------------------
+
+def load_sample(path) -> Image.Image:
+    """Decode at reduced size and cover-crop to the slide aspect."""
+    with Image.open(path) as img:
+        img.draft("RGB", (SAMPLE_SIZE[0] * 2, SAMPLE_SIZE[1] * 2))
+        img = img.convert("RGB")
+    width, height = SAMPLE_SIZE
+    scale = max(width / img.width, height / img.height)
+    img = img.resize((max(width, round(img.width * scale)), max(height, round(img.height * scale))),
+                     Image.BILINEAR)
+    left = (img.width - width) // 2
+    top = (img.height - height) // 2
+    return img.crop((left, top, left + width, top + height))
+
+
+def analyze(path) -> dict:
+    import numpy as np
+
+    rgb = np.asarray(load_sample(path), dtype=np.float32) / 255.0
+    luma = rgb @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+    # gradient energy: absolute neighbour differences, padded back to full size
+    grad = np.zeros_like(luma)
+    grad[:, 1:] += np.abs(np.diff(luma, axis=1))
+    grad[1:, :] += np.abs(np.diff(luma, axis=0))
+
+    bands = np.array_split(np.arange(luma.shape[0]), len(ZONES))
+    luminance = [float(luma[rows].mean()) for rows in bands]
+    detail = [float(grad[rows].mean()) for rows in bands]
+
+    safe = len(ZONES) - 1
+    calmest = int(np.argmin(detail))
+    if detail[calmest] < detail[safe] * BOTTOM_BIAS:
+        safe = calmest
+
+    quantized = (rgb * 255).astype(np.uint16) >> 4
+    bins = (quantized[..., 0] << 8) | (quantized[..., 1] << 4) | quantized[..., 2]
+    top_bin = int(np.bincount(bins.ravel(), minlength=4096).argmax())
+    dominant = (rgb[bins == top_bin].mean(axis=0) * 255).round().astype(int)
+
+    stats = {
+        "luminance": [round(v, 4) for v in luminance],
+        "detail": [round(v, 4) for v in detail],
+        "safe_zone": ZONES[safe],
+        "dominant": "#%02x%02x%02x" % tuple(dominant),
+    }
+    stats["style"] = text_style(stats)
+    return stats
+
+
+def text_style(stats: dict) -> dict:
+    """Text position and colors for an analyzed image."""
+    zone = stats["safe_zone"]
+    bright = stats["luminance"][ZONES.index(zone)] > BRIGHT
+    return {"position": zone, **(DARK_TEXT if bright else LIGHT_TEXT)}
+
+
+DEFAULT_STYLE = {"position": "bottom", **LIGHT_TEXT}
+
+
+# ------------------------------------------------------------
+# CATALOG
+# ------------------------------------------------------------
+
+def _stamp(path: Path) -> str:
+    # content hash rather than mtime, so a fresh checkout keeps its catalog
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def build_catalog(root, force=False, jobs=None) -> dict:
+    """
+    (Re)analyze the images under `root` whose content stamp changed and
+    write root/layout_stats.json. Returns counts.
+    """
+    root = Path(root)
+    catalog_path = root / CATALOG_NAME
+    old = {}
+    if catalog_path.exists() and not force:
+        with open(catalog_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == ANALYSIS_VERSION:
+            old = data.get("images", {})
+
+    entries, todo = {}, []
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in IMAGE_EXTENSIONS:
+            continue
+        rel = path.relative_to(root).as_posix()
+        stamp = _stamp(path)
+        if old.get(rel, {}).get("stamp") == stamp:
+            entries[rel] = old[rel]
+        else:
+            todo.append((rel, path, stamp))
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            results = pool.map(analyze, [p for _, p, _ in todo], chunksize=8)
+            for (rel, _, stamp), stats in zip(todo, results):
+                entries[rel] = {"stamp": stamp, **stats}
+
+    with open(catalog_path, "w", encoding="utf-8") as f:
+        json.dump({"version": ANALYSIS_VERSION, "images": dict(sorted(entries.items()))}, f, indent=1)
+    return {"images": len(entries), "analyzed": len(todo), "catalog": str(catalog_path)}
+
+
+def load_catalog(root) -> dict:
+    """{absolute image path: stats} from root/layout_stats.json ({} if missing)."""
+    root = Path(root)
+    try:
+        with open(root / CATALOG_NAME, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {str(root / rel): stats for rel, stats in data.get("images", {}).items()}
+
+
+@lru_cache(maxsize=64)
+def _catalog_near(folder: str):
+    """Catalog of the closest parent folder holding a layout_stats.json."""
+    for parent in (Path(folder), *Path(folder).parents):
+        if (parent / CATALOG_NAME).exists():
+            return load_catalog(parent)
+    return {}
+
+
+def lookup(path) -> dict:
+    """Stats for an image path, or None when it has not been analyzed."""
+    path = Path(path)
+    return _catalog_near(str(path.parent)).get(str(path))
+
+
+def style_for(path) -> dict:
+    stats = lookup(path)
+    return dict(stats["style"]) if stats else dict(DEFAULT_STYLE)
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def main():
+    from .generators import GENERATORS, image_root
+
+    parser = argparse.ArgumentParser(description="Build layout_stats.json image catalogs.")
+    parser.add_argument("generators", nargs="*", default=list(GENERATORS))
+    parser.add_argument("--force", action="store_true", help="re-analyze every image")
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    for name in args.generators:
+        result = build_catalog(image_root(name), force=args.force, jobs=args.jobs)
+        print(f"🖼️ [{name}] {result['images']} images, {result['analyzed']} analyzed -> {result['catalog']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Durable job queue for large generation runs.
+
+Every post of a run is one row in a SQLite database with its state, attempt
+count and a reference to its result file. Workers claim jobs under a lease
+that they renew while generating; a killed worker's lease simply expires
+and the job goes back to the queue, so a run resumes exactly where it
+stopped and any number of worker processes can drain one queue. Run from
+slideshow-generator/:
+
+    python -m generator_common.jobs enqueue --run may-batch --generator betai --count 1000
+    python -m generator_common.jobs work --processes 4
+    python -m generator_common.jobs status --run may-batch
+    python -m generator_common.jobs export --run may-batch --out may-batch.json
+
+Job states: queued -> running -> done | failed (after max attempts).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from . import generators
+from .tracing import span
+
+RUNS_ROOT = generators.SLIDESHOW_ROOT / "runs"
+DEFAULT_DB = RUNS_ROOT / "jobs.sqlite"
+DEFAULT_LEASE = 300        # seconds a claim stays valid without a heartbeat
+DEFAULT_ATTEMPTS = 3
+RETRY_DELAY = 30           # seconds before a failed job may be claimed again
+POLL_INTERVAL = 2.0        # idle wait while jobs are delayed or leased elsewhere
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    run TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    generator TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result_ref TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (run, seq)
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (generator, state, available_at);
+"""
+
+
+def connect(db_path=DEFAULT_DB):
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# ------------------------------------------------------------
+# QUEUE OPERATIONS
+# ------------------------------------------------------------
+
+def enqueue(conn, run, generator, count, options=None, max_attempts=DEFAULT_ATTEMPTS):
+    """
+    Add jobs 1..count to a run. Idempotent: re-running the same enqueue
+    (or raising count) never duplicates existing jobs. Returns how many were added.
+    A run has one generator and one set of options: enqueueing it again with
+    different ones raises ValueError instead of keeping the old jobs silently.
+    """
+    if generator not in generators.GENERATORS:
+        raise ValueError(f"Unknown generator '{generator}'")
+    options = options or {}
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for row in conn.execute(
+            "SELECT DISTINCT generator, options FROM jobs WHERE run = ?", (run,)
+        ).fetchall():
+            if row["generator"] != generator or json.loads(row["options"]) != options:
+                raise ValueError(
+                    f"Run '{run}' is already queued with generator '{row['generator']}' "
+                    f"and options {row['options']}; use a new run name for different ones"
+                )
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO jobs (run, seq, generator, options, max_attempts, created, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(run, seq, generator, json.dumps(options), max_attempts, now, now)
+             for seq in range(1, count + 1)],
+        )
+        added = conn.total_changes - before
+        conn.execute("COMMIT")
+        return added
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def claim(conn, worker_id, generator, lease_s=DEFAULT_LEASE):
+    """Lease the next runnable job for `generator` (or None when there is none)."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # leases that ran out on their last attempt will never be retried
+        conn.execute(
+            "UPDATE jobs SET state = 'failed', lease_owner = NULL, updated = ?, "
+            "error = COALESCE(error, 'lease expired') "
+            "WHERE state = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+            (now, now),
+        )
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE generator = ? AND available_at <= ? AND ("
+            "  state = 'queued' OR (state = 'running' AND lease_expires < ?)"
+            ") ORDER BY id LIMIT 1",
+            (generator, now, now),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE jobs SET state = 'running', attempts = attempts + 1, "
+            "lease_owner = ?, lease_expires = ?, updated = ? WHERE id = ?",
+            (worker_id, now + lease_s, now, row["id"]),
+        )
+        job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        conn.execute("COMMIT")
+        return dict(job)
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def heartbeat(conn, job_id, worker_id, lease_s=DEFAULT_LEASE):
+    """Extend a lease. False means the lease was lost (another worker took over)."""
+    cur = conn.execute(
+        "UPDATE jobs SET lease_expires = ?, updated = ? "
+        "WHERE id = ? AND lease_owner = ? AND state = 'running'",
+        (time.time() + lease_s, time.time(), job_id, worker_id),
+    )
+    return cur.rowcount == 1
+
+
+def complete(conn, job_id, worker_id, result_ref):
+    cur = conn.execute(
+        "UPDATE jobs SET state = 'done', result_ref = ?, error = NULL, lease_owner = NULL, "
+        "lease_expires = NULL, updated = ? WHERE id = ? AND lease_owner = ?",
+        (str(result_ref), time.time(), job_id, worker_id),
+    )
+    return cur.rowcount == 1
+
+
+def fail(conn, job_id, worker_id, error, retry_delay=RETRY_DELAY):
+    """Record a failed attempt; the job is re-queued until it runs out of attempts."""
+    now = time.time()
+    conn.execute(
+        "UPDATE jobs SET state = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END, "
+        "available_at = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+        "WHERE id = ? AND lease_owner = ?",
+        (now + retry_delay, error, now, job_id, worker_id),
+    )
+
+
+def release(conn, job_id, worker_id):
+    """Hand a job back untouched (worker interrupted); the attempt is not counted."""
+    conn.execute(
+        "UPDATE jobs SET state = 'queued', attempts = attempts - 1, lease_owner = NULL, "
+        "lease_expires = NULL, updated = ? WHERE id = ? AND lease_owner = ? AND state = 'running'",
+        (time.time(), job_id, worker_id),
+    )
+
+
+def pending(conn, generator) -> int:
+    """Jobs of `generator` that may still need a worker: queued or under a lease."""
+    return conn.execute(
+        "SELECT COUNT(*) FROM jobs WHERE generator = ? AND state IN ('queued', 'running')",
+        (generator,),
+    ).fetchone()[0]
+
+
+def retry_failed(conn, run):
+    """Give failed jobs of a run a fresh set of attempts."""
+    cur = conn.execute(
+        "UPDATE jobs SET state = 'queued', attempts = 0, available_at = 0, updated = ? "
+        "WHERE run = ? AND state = 'failed'",
+        (time.time(), run),
+    )
+    return cur.rowcount
+
+
+def status(conn, run=None) -> dict:
+    where, params = ("WHERE run = ?", (run,)) if run else ("", ())
+    rows = conn.execute(
+        f"SELECT run, generator, state, COUNT(*) AS n, SUM(attempts) AS attempts "
+        f"FROM jobs {where} GROUP BY run, generator, state ORDER BY run, generator",
+        params,
+    ).fetchall()
+    report = {}
+    for row in rows:
+        entry = report.setdefault(f"{row['run']} [{row['generator']}]", {"attempts": 0})
+        entry[row["state"]] = row["n"]
+        entry["attempts"] += row["attempts"] or 0
+    return report
+
+
+# ------------------------------------------------------------
+# WORKER
+# ------------------------------------------------------------
+
+def result_path(db_path, job) -> Path:
+    """Results live next to the database: <db dir>/<run>/<seq>.json."""
+    return Path(db_path).parent / job["run"] / f"{job['seq']:05d}.json"
+
+
+def _write_result(db_path, job, post) -> Path:
+    path = result_path(db_path, job)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(post, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def _keep_leased(db_path, job_id, worker_id, lease_s, stop):
+    conn = connect(db_path)
+    while not stop.wait(lease_s / 3):
+        if not heartbeat(conn, job_id, worker_id, lease_s):
+            print(f"⚠️ {worker_id}: lost lease on job {job_id}")
+            return
+
+
+def run_worker(db_path, generator, lease_s=DEFAULT_LEASE, max_jobs=None):
+    """
+    Claim and run jobs for one generator until none are queued or leased.
+    While the remaining jobs wait for their retry delay, or run under
+    another worker's lease, poll: a failed job or a crashed worker's job
+    is then picked up in the same run.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    conn = connect(db_path)
+    generators.activate(generator)
+    done = 0
+
+    while max_jobs is None or done < max_jobs:
+        job = claim(conn, worker_id, generator, lease_s)
+        if job is None:
+            if not pending(conn, generator):
+                break
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        stop = threading.Event()
+        keeper = threading.Thread(
+            target=_keep_leased, args=(db_path, job["id"], worker_id, lease_s, stop), daemon=True
+        )
+        keeper.start()
+        try:
+            with span("job", cat="queue", run=job["run"], seq=job["seq"]):
+                post = generators.generate(generator, **json.loads(job["options"]))
+                with span("file write"):
+                    path = _write_result(db_path, job, post)
+            if complete(conn, job["id"], worker_id, path):
+                print(f"✅ {worker_id} {job['run']}#{job['seq']} (attempt {job['attempts']})")
+            else:
+                print(f"⚠️ {worker_id} {job['run']}#{job['seq']}: lease lost before completion, "
+                      f"result is a duplicate of another worker's attempt")
+        except KeyboardInterrupt:
+            release(conn, job["id"], worker_id)
+            raise
+        except Exception as exc:
+            fail(conn, job["id"], worker_id, "".join(traceback.format_exception_only(exc)).strip())
+            print(f"❌ {worker_id} {job['run']}#{job['seq']}: {exc}")
+        finally:
+            stop.set()
+            keeper.join()
+        done += 1
+
+    return done
+
+
+def _worker_main(db_path, generator, lease_s, max_jobs):
+    try:
+        run_worker(db_path, generator, lease_s, max_jobs)
+    except KeyboardInterrupt:
+        pass
+
+
+def work(db_path, processes=1, generator_names=None, lease_s=DEFAULT_LEASE, max_jobs=None):
+    """Start `processes` workers per generator (each process hosts one generator)."""
+    if not generator_names:
+        conn = connect(db_path)
+        generator_names = [
+            row[0] for row in conn.execute(
+                "SELECT DISTINCT generator FROM jobs WHERE state IN ('queued', 'running')"
+            )
+        ]
+    workers = [
+        multiprocessing.Process(target=_worker_main, args=(str(db_path), name, lease_s, max_jobs))
+        for name in generator_names for _ in range(processes)
+    ]
+    # every worker gets an equal slice of the account's RPM/TPM budget
+    os.environ.setdefault("OPENAI_LIMIT_SHARE", str(len(workers)))
+    for p in workers:
+        p.start()
+    try:
+        for p in workers:
+            p.join()
+    except KeyboardInterrupt:
+        for p in workers:
+            p.join()
+    return len(workers)
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Durable generation job queue.")
+    parser.add_argument("--db", default=str(DEFAULT_DB))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("enqueue", help="add jobs to a run")
+    p.add_argument("--run", required=True)
+    p.add_argument("--generator", required=True, choices=sorted(generators.GENERATORS))
+    p.add_argument("--count", type=int, required=True)
+    p.add_argument("--options", default="{}", help='generator kwargs as JSON, e.g. \'{"locales": ["en", "fr"]}\'')
+    p.add_argument("--max-attempts", type=int, default=DEFAULT_ATTEMPTS)
+
+    p = sub.add_parser("work", help="drain the queue")
+    p.add_argument("--processes", type=int, default=1, help="worker processes per generator")
+    p.add_argument("--generator", action="append", choices=sorted(generators.GENERATORS))
+    p.add_argument("--lease", type=float, default=DEFAULT_LEASE)
+    p.add_argument("--max-jobs", type=int, default=None, help="per worker")
+
+    p = sub.add_parser("status")
+    p.add_argument("--run")
+
+    p = sub.add_parser("retry-failed")
+    p.add_argument("--run", required=True)
+
+    p = sub.add_parser("export", help="collect a run's finished posts into one JSON list")
+    p.add_argument("--run", required=True)
+    p.add_argument("--out", required=True)
+
+    args = parser.parse_args()
+    conn = connect(args.db)
+
+    if args.command == "enqueue":
+        added = enqueue(conn, args.run, args.generator, args.count,
+                        json.loads(args.options), args.max_attempts)
+        print(f"📥 {added} job(s) added to '{args.run}'")
+    elif args.command == "work":
+        count = work(args.db, args.processes, args.generator, args.lease, args.max_jobs)
+        print(f"🏁 {count} worker(s) finished")
+        print(json.dumps(status(conn), indent=2))
+    elif args.command == "status":
+        print(json.dumps(status(conn, args.run), indent=2))
+    elif args.command == "retry-failed":
+        print(f"🔁 {retry_failed(conn, args.run)} job(s) re-queued")
+    elif args.command == "export":
+        rows = conn.execute(
+            "SELECT result_ref FROM jobs WHERE run = ? AND state = 'done' ORDER BY seq", (args.run,)
+        ).fetchall()
+        posts = []
+        for row in rows:
+            with open(row["result_ref"], "r", encoding="utf-8") as f:
+                posts.append(json.load(f))
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(posts, f, indent=2)
+        print(f"📦 {len(posts)} post(s) written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
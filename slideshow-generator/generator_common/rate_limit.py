@@ -0,0 +1,225 @@
+"""
+Adaptive limiter for OpenAI requests (RPM/TPM budgets + AIMD concurrency).
+
+Every `responses.create` goes through `get_limiter().request(tokens)`:
+
+- requests and tokens of the last 60 s are tracked in a sliding window and
+  a request waits until it fits both the RPM and the TPM budget (token
+  estimates are corrected with the real usage once the response arrives);
+- the number of requests in flight is an AIMD window: it grows by one per
+  window's worth of fast successes, is halved on a 429 (with a pause
+  honouring retry-after) and stops growing while latency runs well above
+  its observed baseline.
+
+Budgets come from OPENAI_RPM / OPENAI_TPM (per account). When several
+processes share the account, OPENAI_LIMIT_SHARE=N gives each 1/N of it;
+the job queue and service set this for their workers.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+
+from .tracing import counter
+
+WINDOW = 60.0                # seconds
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200_000
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 32
+INITIAL_CONCURRENCY = 4
+LATENCY_TOLERANCE = 2.0      # no growth while latency > baseline * this
+DEFAULT_BACKOFF = 2.0        # pause after a 429 without retry-after
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(prompt: str, max_output_tokens: int = 0) -> int:
+    """Cheap prompt token estimate (~4 chars per token) plus the output budget."""
+    return len(prompt) // CHARS_PER_TOKEN + 1 + max_output_tokens
+
+
+def is_rate_limit_error(exc) -> bool:
+    return getattr(exc, "status_code", None) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class Ticket:
+    """One admitted request; RateLimiter.settle() records its real usage."""
+
+    def __init__(self, estimate):
+        self.estimate = estimate
+        self.tokens = None
+        self.started = time.monotonic()
+        self.in_window = True
+
+
+class RateLimiter:
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, min_concurrency=MIN_CONCURRENCY,
+                 max_concurrency=MAX_CONCURRENCY, initial=INITIAL_CONCURRENCY):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.window = float(min(max(initial, min_concurrency), max_concurrency))
+
+        self._cond = threading.Condition()
+        self._requests = deque()     # (timestamp, ticket)
+        self._tokens = 0             # tokens charged inside the window
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._baseline = None        # lowest recent latency (s)
+        self._last_decrease = 0.0
+
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0,
+                      "waited_s": 0.0, "tokens": 0, "latency_s": 0.0}
+
+    # ---- window bookkeeping -------------------------------------
+
+    def _charge(self, ticket):
+        return ticket.tokens if ticket.tokens is not None else ticket.estimate
+
+    def _expire(self, now):
+        while self._requests and now - self._requests[0][0] >= WINDOW:
+            _, ticket = self._requests.popleft()
+            self._tokens -= self._charge(ticket)
+            ticket.in_window = False
+
+    def _wait_time(self, now, estimate):
+        """Seconds until a request of `estimate` tokens may start (0 = now)."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= int(self.window):
+            return None  # woken by a release
+        if len(self._requests) >= self.rpm:
+            return self._requests[0][0] + WINDOW - now
+        if self._tokens + estimate > self.tpm and self._requests:
+            # wait for enough of the window to drain
+            freed = self._tokens + estimate - self.tpm
+            for started, ticket in self._requests:
+                freed -= self._charge(ticket)
+                if freed <= 0:
+                    return started + WINDOW - now
+        return 0
+
+    # ---- public API ---------------------------------------------
+
+    def acquire(self, estimate) -> Ticket:
+        estimate = min(estimate, self.tpm)   # a single oversize request must still run
+        ticket = Ticket(estimate)
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                wait = self._wait_time(now, estimate)
+                if wait == 0:
+                    break
+                self._cond.wait(timeout=wait)
+            self._in_flight += 1
+            self._requests.append((now, ticket))
+            self._tokens += estimate
+            self.stats["requests"] += 1
+            self.stats["waited_s"] += now - started
+            counter("llm in flight", requests=self._in_flight, window=int(self.window))
+        ticket.started = time.monotonic()
+        return ticket
+
+    def release(self, ticket, rate_limited=False, failed=False, retry_after=None):
+        latency = time.monotonic() - ticket.started
+        with self._cond:
+            self._in_flight -= 1
+            if rate_limited:
+                self.stats["rate_limited"] += 1
+                # one decrease per burst: 429s for requests sent before the
+                # last cut were already accounted for by it
+                if ticket.started > self._last_decrease:
+                    self.window = max(self.min_concurrency, self.window / 2)
+                    self._last_decrease = time.monotonic()
+                pause = retry_after if retry_after is not None else DEFAULT_BACKOFF
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            elif failed:
+                self.stats["errors"] += 1
+            else:
+                self.stats["latency_s"] += latency
+                if self._baseline is None or latency < self._baseline:
+                    self._baseline = latency
+                else:
+                    # let the baseline drift up slowly so it tracks prompt size changes
+                    self._baseline += (latency - self._baseline) * 0.01
+                # only grow a window that is actually in use
+                saturated = self._in_flight + 1 >= int(self.window)
+                if saturated and latency <= self._baseline * LATENCY_TOLERANCE:
+                    self.window = min(self.max_concurrency, self.window + 1 / self.window)
+            counter("llm in flight", requests=self._in_flight, window=int(self.window))
+            self._cond.notify_all()
+
+    def settle(self, ticket, tokens):
+        """Swap a ticket's estimate for its real usage (None: keep the estimate)."""
+        if tokens is None:
+            return
+        with self._cond:
+            if ticket.in_window:
+                self._tokens += tokens - self._charge(ticket)
+            self.stats["tokens"] += tokens - (ticket.tokens or 0)
+            ticket.tokens = tokens
+            self._cond.notify_all()   # a smaller charge may admit a waiter
+
+    @contextmanager
+    def request(self, estimate):
+        """
+        with limiter.request(estimate_tokens(prompt, 800)) as ticket:
+            response = client.responses.create(...)
+            limiter.settle(ticket, response.usage.total_tokens)
+        """
+        ticket = self.acquire(estimate)
+        try:
+            yield ticket
+        except Exception as exc:
+            limited = is_rate_limit_error(exc)
+            self.release(ticket, rate_limited=limited, failed=not limited,
+                         retry_after=_retry_after(exc) if limited else None)
+            raise
+        else:
+            self.release(ticket)
+
+    def summary(self) -> dict:
+        with self._cond:
+            ok = self.stats["requests"] - self.stats["rate_limited"] - self.stats["errors"]
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "concurrency": round(self.window, 2),
+                "in_flight": self._in_flight,
+                "requests": self.stats["requests"],
+                "rate_limited": self.stats["rate_limited"],
+                "errors": self.stats["errors"],
+                "tokens": self.stats["tokens"],
+                "avg_latency_s": round(self.stats["latency_s"] / ok, 3) if ok > 0 else 0.0,
+                "waited_s": round(self.stats["waited_s"], 2),
+            }
+
+    def report(self) -> str:
+        s = self.summary()
+        return (
+            f"[rate limit] {s['requests']} requests, {s['rate_limited']} rate-limited, "
+            f"concurrency {s['concurrency']}, avg latency {s['avg_latency_s']}s, "
+            f"waited {s['waited_s']}s, {s['tokens']} tokens"
+        )
+
+
+@lru_cache(maxsize=None)
+def get_limiter() -> RateLimiter:
+    """Process-wide limiter sized from OPENAI_RPM / OPENAI_TPM / OPENAI_LIMIT_SHARE."""
+    share = max(1, int(os.getenv("OPENAI_LIMIT_SHARE", "1")))
+    rpm = int(os.getenv("OPENAI_RPM", DEFAULT_RPM))
+    tpm = int(os.getenv("OPENAI_TPM", DEFAULT_TPM))
+    return RateLimiter(rpm=max(1, rpm // share), tpm=max(1, tpm // share))
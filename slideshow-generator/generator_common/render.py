@@ -0,0 +1,368 @@
+"""
+Raster slide renderer shared by both generators.
+
+Turns a post (lastr or BetAI shape) into 1080x1920 slide images: the
+background is cover-cropped like the HTML preview's `object-fit: cover`,
+a scrim is laid over it and the overlay text is drawn in the Aeonik faces
+from public/fonts. Text position and colors follow the image's precomputed
+layout stats (see image_stats.py).
+
+The same carousel also goes out as 4:5 (Instagram feed) and 1:1 (X).
+render_post_aspects() draws every requested aspect from ONE decode of each
+background: sizes sharing a cover scale (all of them for portrait photos)
+come out of a single resize, each is then center-cropped and the text is
+laid out again for its height. SLIDESHOW_ASPECTS sets the default list.
+"""
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from PIL import Image, ImageColor, ImageDraw
+
+from .generators import detect_generator
+from .image_cache import get_image_cache
+from .image_stats import style_for
+from .text_layout import LINE_SPACING, fit_text, get_font
+from .tracing import span
+
+# ------------------------------------------------------------
+# STYLE
+# ------------------------------------------------------------
+SLIDE_SIZE = (1080, 1920)
+
+ASPECTS = {
+    "9:16": SLIDE_SIZE,      # TikTok / Reels / Stories
+    "4:5": (1080, 1350),     # Instagram feed
+    "1:1": (1080, 1080),     # X
+}
+DEFAULT_ASPECT = "9:16"
+ASPECTS_ENV = "SLIDESHOW_ASPECTS"
+
+# Bump whenever the look of a rendered slide changes.
+STYLE_VERSION = 4
+
+FONTS_ROOT = Path(__file__).resolve().parents[2] / "public" / "fonts"
+TEXT_FONT = FONTS_ROOT / "Aeonik-Bold.ttf"
+KICKER_FONT = FONTS_ROOT / "Aeonik-Medium.ttf"
+
+MARGIN = 0.07            # side/bottom padding, fraction of width
+TEXT_SIZE = 0.06         # starting text size, fraction of width
+MIN_TEXT_SIZE = 0.03
+TEXT_MAX_HEIGHT = 0.6    # text block may use this much of the slide height
+GRADIENT_START = 0.45    # gradient reaches full transparency this high up
+SCRIM_ALPHA = 225
+
+KICKER_COLORS = {"#e5e7eb": (156, 163, 175), "#111827": (75, 85, 99)}
+
+
+# ------------------------------------------------------------
+# ASPECTS
+# ------------------------------------------------------------
+
+def parse_aspects(value) -> list:
+    """"9:16,1:1" (or a list) -> ["9:16", "1:1"], validated, duplicates dropped."""
+    names = value.split(",") if isinstance(value, str) else list(value)
+    aspects = []
+    for name in (n.strip() for n in names):
+        if name not in ASPECTS:
+            raise ValueError(f"unknown aspect {name!r} (choose from {', '.join(ASPECTS)})")
+        if name not in aspects:
+            aspects.append(name)
+    return aspects or [DEFAULT_ASPECT]
+
+
+def configured_aspects() -> list:
+    return parse_aspects(os.getenv(ASPECTS_ENV) or DEFAULT_ASPECT)
+
+
+def aspect_tag(aspect) -> str:
+    """File/folder-safe name: "9:16" -> "9x16"."""
+    return aspect.replace(":", "x")
+
+
+# ------------------------------------------------------------
+# POST NORMALIZATION
+# ------------------------------------------------------------
+
+def slides_for_post(post: dict) -> list:
+    """
+    Flatten a post into six render specs {image, text, kicker?, title?, layout}.
+
+    BetAI posts: hook slide + 5 app slides (category label + app name).
+    Lastr posts: the 6 slides as-is, with the hook as a title on slide 1.
+    "layout" comes from the post when the generator attached it, else from
+    the image's layout_stats.json entry (default: bottom, light text).
+    """
+    if detect_generator(post) == "betai":
+        hook = post["hook"]
+        specs = [{"image": hook["image"], "text": hook["text"], "layout": hook.get("layout")}]
+        for slide in post["slides"]:
+            specs.append({
+                "image": slide["image"],
+                "text": slide.get("overlay_text", ""),
+                "kicker": slide.get("category_label", "").upper(),
+                "title": slide.get("app_name", ""),
+                "layout": slide.get("layout"),
+            })
+    else:
+        specs = [
+            {"image": s["image"], "text": s.get("text", ""), "layout": s.get("layout")}
+            for s in post["slides"]
+        ]
+        if specs and post.get("hook"):
+            specs[0]["title"] = post["hook"]
+
+    for spec in specs:
+        spec["layout"] = spec["layout"] or style_for(spec["image"])
+    return specs
+
+
+# ------------------------------------------------------------
+# BACKGROUND + TEXT
+# ------------------------------------------------------------
+
+def cover_crops(img: Image.Image, sizes) -> dict:
+    """
+    {size: img cover-cropped to size (center crop)}. Sizes with the same
+    cover scale share one resize of the region they need; each size is then
+    a plain crop of it.
+    """
+    by_scale = {}
+    for size in sizes:
+        scale = max(size[0] / img.width, size[1] / img.height)
+        by_scale.setdefault(round(scale, 6), []).append(tuple(size))
+
+    crops = {}
+    for group in by_scale.values():
+        width = max(w for w, _ in group)
+        height = max(h for _, h in group)
+        scale = max(width / img.width, height / img.height)
+        box_w, box_h = min(img.width, width / scale), min(img.height, height / scale)
+        left, top = (img.width - box_w) / 2, (img.height - box_h) / 2
+        resized = img.resize((width, height), Image.LANCZOS,
+                             box=(left, top, left + box_w, top + box_h))
+        for w, h in group:
+            x, y = (width - w) // 2, (height - h) // 2
+            crops[(w, h)] = resized if (w, h) == (width, height) else resized.crop((x, y, x + w, y + h))
+    return crops
+
+
+def decode_backgrounds(path, sizes) -> dict:
+    """Decode an image once and cover-crop it to every size."""
+    with Image.open(path) as img:
+        return cover_crops(img.convert("RGB"), sizes)
+
+
+def decode_background(path, size=SLIDE_SIZE) -> Image.Image:
+    return decode_backgrounds(path, [size])[tuple(size)]
+
+
+def load_backgrounds(path, sizes) -> dict:
+    """
+    {size: cover-cropped background}, decoded once per image for all sizes
+    and shared across render processes (see image_cache.py;
+    SLIDESHOW_IMAGE_CACHE_MB=0 turns the cache off).
+    """
+    path = Path(path)
+    if not path.is_file():
+        raise FileNotFoundError(f"Slide image not found: {path}")
+    sizes = list(dict.fromkeys(tuple(size) for size in sizes))
+    cache = get_image_cache()
+    if cache is None:
+        return decode_backgrounds(path, sizes)
+
+    decoded = {}
+
+    def decode(path, size):
+        # first miss decodes every size at once; later misses reuse it
+        if size not in decoded:
+            decoded.update(decode_backgrounds(path, sizes))
+        return decoded[size]
+
+    return {size: cache.get(path, size, decode) for size in sizes}
+
+
+def load_background(path, size=SLIDE_SIZE) -> Image.Image:
+    return load_backgrounds(path, [size])[tuple(size)]
+
+
+@lru_cache(maxsize=32)
+def _gradient(size, position="bottom", color="#000000"):
+    """Scrim fading to transparent away from the text zone (top/middle/bottom)."""
+    width, height = size
+    start = int(height * GRADIENT_START)
+    column = Image.new("L", (1, height), 0)
+    for y in range(height):
+        if position == "bottom":
+            ramp = (y - start) / (height - start)
+        elif position == "top":
+            ramp = (height - start - y) / (height - start)
+        else:
+            ramp = 1 - abs(y - height / 2) / (height * (1 - GRADIENT_START) / 2)
+        column.putpixel((0, y), int(SCRIM_ALPHA * min(1.0, max(0.0, ramp))))
+    alpha = column.resize(size)
+    scrim = Image.new("RGBA", size, ImageColor.getrgb(color) + (255,))
+    scrim.putalpha(alpha)
+    return scrim
+
+
+def draw_spec(background: Image.Image, spec: dict) -> Image.Image:
+    """Draw scrim + kicker/title/text onto a prepared background."""
+    size = background.size
+    width, height = size
+    margin = int(width * MARGIN)
+    max_width = width - 2 * margin
+    layout = spec.get("layout") or style_for(spec["image"])
+    text_color = ImageColor.getrgb(layout["text_color"])
+    stroke_color = ImageColor.getrgb(layout["stroke_color"])
+    dark_text = sum(text_color) < 3 * 128
+
+    canvas = background.convert("RGBA")
+    canvas.alpha_composite(_gradient(size, layout["position"], layout["scrim_color"]))
+    draw = ImageDraw.Draw(canvas)
+
+    blocks = []
+    if spec.get("kicker"):
+        kicker_color = KICKER_COLORS.get(layout["text_color"], text_color)
+        blocks.append((spec["kicker"], KICKER_FONT, 0.028, kicker_color))
+    if spec.get("title"):
+        blocks.append((spec["title"], TEXT_FONT, 0.07, text_color if dark_text else (255, 255, 255)))
+    if spec.get("text"):
+        blocks.append((spec["text"], TEXT_FONT, TEXT_SIZE, text_color))
+
+    # Fit each block, then stack them in the layout's zone.
+    budget = height * TEXT_MAX_HEIGHT / max(1, len(blocks))
+    laid_out = []
+    for text, font_path, rel_size, color in blocks:
+        start = int(width * rel_size)
+        font_size, lines = fit_text(
+            text, font_path, max_width, budget,
+            start, min(start, int(width * MIN_TEXT_SIZE)),
+        )
+        laid_out.append((get_font(font_path, font_size), lines, color))
+
+    block_heights = [font.size * LINE_SPACING * len(lines) for font, lines, _ in laid_out]
+    total = sum(block_heights) + sum(font.size * 0.5 for font, _, _ in laid_out[1:])
+    if layout["position"] == "top":
+        y = margin * 2
+    elif layout["position"] == "middle":
+        y = (height - total) / 2
+    else:
+        y = height - margin - total
+
+    for index, ((font, lines, color), block_height) in enumerate(zip(laid_out, block_heights)):
+        if index:
+            y += font.size * 0.5
+        line_height = font.size * LINE_SPACING
+        for i, line in enumerate(lines):
+            draw.text(
+                (margin, y + i * line_height), line, font=font, fill=color,
+                stroke_width=max(1, font.size // 18), stroke_fill=stroke_color,
+            )
+        y += block_height
+
+    return canvas.convert("RGB")
+
+
+def render_slide_sizes(spec: dict, sizes) -> dict:
+    """{size: slide}: one background decode, then the text drawn per size."""
+    with span("render", cat="render", image=Path(spec["image"]).name):
+        with span("decode", cat="render"):
+            backgrounds = load_backgrounds(spec["image"], sizes)
+        with span("draw", cat="render"):
+            return {size: draw_spec(background, spec) for size, background in backgrounds.items()}
+
+
+def render_slide(spec: dict, size=SLIDE_SIZE) -> Image.Image:
+    return render_slide_sizes(spec, [size])[tuple(size)]
+
+
+def render_post(post: dict, size=SLIDE_SIZE, cache=None) -> list:
+    """
+    Render every slide of a post, in order. With a RenderCache, slides whose
+    image, text, style and size are unchanged are loaded instead of redrawn.
+    """
+    specs = slides_for_post(post)
+    if cache is None:
+        return [render_slide(spec, size) for spec in specs]
+    return [cache.get_or_render(spec, size, STYLE_VERSION, render_slide) for spec in specs]
+
+
+def render_post_aspects(post: dict, aspects=None, cache=None) -> dict:
+    """
+    {aspect: [slides]} for every aspect (default: configured_aspects()),
+    each background decoded once for all of them. With a RenderCache, only
+    the sizes missing from it are drawn.
+    """
+    aspects = parse_aspects(aspects) if aspects else configured_aspects()
+    sizes = list(dict.fromkeys(ASPECTS[aspect] for aspect in aspects))
+    slides = {aspect: [] for aspect in aspects}
+    for spec in slides_for_post(post):
+        images, keys = {}, {}
+        if cache is not None:
+            for size in sizes:
+                keys[size] = cache.key_for(spec, size, STYLE_VERSION)
+                image = cache.get(keys[size])
+                if image is not None:
+                    images[size] = image
+        missing = [size for size in sizes if size not in images]
+        if missing:
+            rendered = render_slide_sizes(spec, missing)
+            if cache is not None:
+                for size, image in rendered.items():
+                    cache.put(keys[size], image)
+            images.update(rendered)
+        for aspect in aspects:
+            slides[aspect].append(images[ASPECTS[aspect]])
+    return slides
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def main():
+    import argparse
+    import json
+
+    from .render_cache import RenderCache
+
+    parser = argparse.ArgumentParser(description="Render posts to slide PNGs.")
+    parser.add_argument("posts", nargs="+", help="post JSON files (single post or list)")
+    parser.add_argument("--out-dir", default="renders")
+    parser.add_argument("--no-cache", action="store_true", help="always redraw every slide")
+    parser.add_argument("--aspects", type=parse_aspects, default=None,
+                        help=f"comma-separated, from {', '.join(ASPECTS)} "
+                             f"(default: ${ASPECTS_ENV} or {DEFAULT_ASPECT}); "
+                             "several aspects go to one sub-folder each")
+    args = parser.parse_args()
+    aspects = args.aspects or configured_aspects()
+
+    cache = None if args.no_cache else RenderCache()
+    before = cache.stats()["misses"] if cache else 0
+    out_dir = Path(args.out_dir)
+    dirs = {a: out_dir / aspect_tag(a) if len(aspects) > 1 else out_dir for a in aspects}
+    for directory in dirs.values():
+        directory.mkdir(parents=True, exist_ok=True)
+
+    total = 0
+    for path in args.posts:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        posts = data if isinstance(data, list) else [data]
+        stem = Path(path).stem
+        for i, post in enumerate(posts):
+            name = stem if len(posts) == 1 else f"{stem}-{i + 1:03d}"
+            for aspect, slides in render_post_aspects(post, aspects, cache).items():
+                for n, slide in enumerate(slides, start=1):
+                    slide.save(dirs[aspect] / f"{name}-{n}.png")
+                    total += 1
+
+    rendered = cache.stats()["misses"] - before if cache else total
+    print(f"🖼️ {total} slides written to {out_dir} ({rendered} re-rendered, {total - rendered} cached)")
+    if get_image_cache():
+        print(get_image_cache().report())
+
+
+if __name__ == "__main__":
+    main()
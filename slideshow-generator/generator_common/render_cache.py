@@ -0,0 +1,249 @@
+"""
+Content-addressed cache of rendered slides.
+
+A slide's key is a hash of (source image content, its text fields and
+layout, the renderer STYLE_VERSION, output size), so re-rendering a batch only redoes
+slides whose inputs changed. Entries are PNG files indexed in SQLite with
+a byte-size cap and LRU eviction; the cache is safe to share between
+render worker processes.
+
+    python -m generator_common.render_cache stats
+    python -m generator_common.render_cache clear
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from .generators import SLIDESHOW_ROOT
+
+DEFAULT_CACHE_DIR = SLIDESHOW_ROOT / ".cache" / "renders"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+TEXT_FIELDS = ("text", "kicker", "title")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class RenderCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._source_hashes = {}
+
+    # Connections are per process; only the settings travel to workers.
+    def __getstate__(self):
+        return {"cache_dir": self.cache_dir, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                self.cache_dir / "index.sqlite", timeout=30, isolation_level=None
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    # --------------------------------------------------------
+    # KEYS
+    # --------------------------------------------------------
+
+    def source_hash(self, path) -> str:
+        """sha256 of an image file, re-hashed only when mtime/size change."""
+        path = str(Path(path).resolve())
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        cached = self._source_hashes.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        row = self.conn.execute(
+            "SELECT mtime_ns, size, sha256 FROM sources WHERE path = ?", (path,)
+        ).fetchone()
+        if row and (row[0], row[1]) == stamp:
+            digest = row[2]
+        else:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                (path, st.st_mtime_ns, st.st_size, digest),
+            )
+
+        self._source_hashes[path] = (stamp, digest)
+        return digest
+
+    def key_for(self, spec: dict, size, style_version) -> str:
+        payload = {
+            "image": self.source_hash(spec["image"]),
+            "text": {f: spec.get(f, "") for f in TEXT_FIELDS},
+            "layout": spec.get("layout"),
+            "style": style_version,
+            "size": list(size),
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def _path(self, key) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.png"
+
+    # --------------------------------------------------------
+    # GET / PUT
+    # --------------------------------------------------------
+
+    def get(self, key):
+        path = self._path(key)
+        row = self.conn.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone()
+        if not row:
+            self._count("misses")
+            return None
+        try:
+            with Image.open(path) as img:
+                image = img.convert("RGB")
+        except OSError:
+            # evicted by another process between the lookup and the read
+            # (or unreadable): a miss, and the row no longer points anywhere
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._count("misses")
+            return None
+        self.conn.execute(
+            "UPDATE entries SET last_used = ?, hits = hits + 1 WHERE key = ?",
+            (time.time(), key),
+        )
+        self._count("hits")
+        return image
+
+    def put(self, key, image):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        image.save(tmp, format="PNG", compress_level=1)
+        os.replace(tmp, path)
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO entries (key, bytes, created, last_used) VALUES (?, ?, ?, ?)",
+            (key, path.stat().st_size, now, now),
+        )
+        self.evict()
+
+    def get_or_render(self, spec, size, style_version, render_fn):
+        """Return the cached slide, rendering (and storing) it on a miss."""
+        key = self.key_for(spec, size, style_version)
+        image = self.get(key)
+        if image is None:
+            image = render_fn(spec, size)
+            self.put(key, image)
+        return image
+
+    # --------------------------------------------------------
+    # EVICTION + STATS
+    # --------------------------------------------------------
+
+    def total_bytes(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries").fetchone()[0]
+
+    def evict(self, max_bytes=None):
+        """Drop least-recently-used entries until the cache fits its cap."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        total = self.total_bytes()
+        if total <= max_bytes:
+            return 0
+
+        evicted = 0
+        rows = self.conn.execute(
+            "SELECT key, bytes FROM entries ORDER BY last_used ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total <= max_bytes:
+                break
+            self._path(key).unlink(missing_ok=True)
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self._count("evictions", evicted)
+        return evicted
+
+    def _count(self, name, amount=1):
+        if amount:
+            self.conn.execute(
+                "INSERT INTO counters VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, amount),
+            )
+
+    def stats(self) -> dict:
+        counters = dict(self.conn.execute("SELECT name, value FROM counters"))
+        entries = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "cache_dir": str(self.cache_dir),
+            "entries": entries,
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "evictions": counters.get("evictions", 0),
+        }
+
+    def clear(self):
+        for (key,) in self.conn.execute("SELECT key FROM entries").fetchall():
+            self._path(key).unlink(missing_ok=True)
+        self.conn.execute("DELETE FROM entries")
+        self.conn.execute("DELETE FROM counters")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendered-slide cache maintenance.")
+    parser.add_argument("command", choices=["stats", "clear", "evict"])
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument("--max-mb", type=float, default=DEFAULT_MAX_BYTES / 1024 ** 2)
+    args = parser.parse_args()
+
+    cache = RenderCache(args.cache_dir, int(args.max_mb * 1024 ** 2))
+    if args.command == "clear":
+        cache.clear()
+        print("🧹 Render cache cleared.")
+    elif args.command == "evict":
+        print(f"🧹 Evicted {cache.evict()} entries.")
+    else:
+        stats = cache.stats()
+        print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
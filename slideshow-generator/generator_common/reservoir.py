@@ -0,0 +1,312 @@
+"""
+Reservoir of pre-generated posts.
+
+Keeps `capacity` ready posts per bucket (one bucket per lastr route, one
+per BetAI app mix) in a SQLite file so stock survives restarts. take()
+hands out the oldest fresh post instantly; a background thread refills
+any bucket that drops below the low watermark and posts older than
+max_age are dropped. The service serves /generate from it (see
+service.py); the CLI fills and inspects it directly. Run from
+slideshow-generator/:
+
+    python -m generator_common.reservoir fill --capacity 5
+    python -m generator_common.reservoir status
+    python -m generator_common.reservoir take --bucket lastr:pov
+    python -m generator_common.reservoir fill --mix heavy=betai:3,oddsjam:0
+"""
+import argparse
+import json
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from . import generators
+
+DEFAULT_DB = generators.SLIDESHOW_ROOT / "runs" / "reservoir.sqlite"
+DEFAULT_CAPACITY = 5         # posts kept per bucket
+DEFAULT_WATERMARK = 2        # refill when stock drops below this
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+REFILL_INTERVAL = 30         # seconds between background checks
+DEFAULT_MIX = "default"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stock (
+    id INTEGER PRIMARY KEY,
+    bucket TEXT NOT NULL,
+    post TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stock_bucket ON stock (bucket, created);
+"""
+
+
+# ------------------------------------------------------------
+# BUCKETS
+# ------------------------------------------------------------
+
+def default_buckets(mixes=None) -> dict:
+    """
+    {bucket: (generator, generate options)}: "lastr:<route>" for every
+    route in data.json and "betai:<mix>" per app mix ({name: {app: weight}};
+    "default" uses data.json weights).
+    """
+    buckets = {}
+    for route in generators.load_isolated("lastr", "config").get_config()["routes"]:
+        buckets[f"lastr:{route}"] = ("lastr", {"route": route})
+    mixes = {DEFAULT_MIX: {}, **(mixes or {})}
+    for name, weights in mixes.items():
+        buckets[f"betai:{name}"] = ("betai", {"weights": weights} if weights else {})
+    return buckets
+
+
+def bucket_for(generator, route=None, mix=None):
+    """Bucket name for a request; None means "any lastr route"."""
+    if generator == "lastr":
+        return f"lastr:{route}" if route else None
+    return f"betai:{mix or DEFAULT_MIX}"
+
+
+def parse_mix(text) -> tuple:
+    """'heavy=betai:3,oddsjam:0' -> ('heavy', {'betai': 3.0, 'oddsjam': 0.0})"""
+    name, _, spec = text.partition("=")
+    weights = {}
+    for pair in filter(None, spec.split(",")):
+        app_id, _, weight = pair.partition(":")
+        weights[app_id] = float(weight)
+    return name, weights
+
+
+# ------------------------------------------------------------
+# RESERVOIR
+# ------------------------------------------------------------
+
+class Reservoir:
+    """
+    submit(generator, options) -> Future[post] runs one generation in a
+    process hosting that generator (the service passes its pools).
+    max_pending caps refill generations in flight per generator, so a
+    refill never fills the queue live requests need.
+    """
+
+    def __init__(self, submit, buckets=None, db_path=DEFAULT_DB, capacity=DEFAULT_CAPACITY,
+                 watermark=DEFAULT_WATERMARK, max_age=DEFAULT_MAX_AGE, max_pending=None):
+        self.submit = submit
+        self.buckets = buckets or default_buckets()
+        self.capacity = capacity
+        self.watermark = min(watermark, capacity)
+        self.max_age = max_age
+        self.max_pending = max_pending
+
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending = {bucket: 0 for bucket in self.buckets}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"hits": 0, "misses": 0, "generated": 0, "failed": 0, "expired": 0}
+
+    # ---- stock --------------------------------------------------
+
+    def stock(self) -> dict:
+        with self._lock:
+            rows = dict(self._conn.execute(
+                "SELECT bucket, COUNT(*) FROM stock WHERE created >= ? GROUP BY bucket",
+                (time.time() - self.max_age,),
+            ).fetchall())
+        return {bucket: rows.get(bucket, 0) for bucket in self.buckets}
+
+    def put(self, bucket, post):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO stock (bucket, post, created) VALUES (?, ?, ?)",
+                (bucket, json.dumps(post), time.time()),
+            )
+
+    def take(self, bucket=None, generator="lastr"):
+        """
+        Pop the oldest fresh post of a bucket (bucket=None: any bucket of
+        `generator` that has stock). Returns None when empty; either way a
+        refill check is triggered.
+        """
+        self.expire()
+        if bucket is None:
+            stock = self.stock()
+            candidates = [b for b, n in stock.items()
+                          if n and self.buckets[b][0] == generator]
+            bucket = random.choice(candidates) if candidates else None
+
+        post = None
+        if bucket is not None:
+            with self._lock:
+                row = self._conn.execute(
+                    "DELETE FROM stock WHERE id = ("
+                    "  SELECT id FROM stock WHERE bucket = ? ORDER BY created LIMIT 1"
+                    ") RETURNING post",
+                    (bucket,),
+                ).fetchone()
+            post = json.loads(row[0]) if row else None
+
+        with self._lock:
+            self.stats["hits" if post is not None else "misses"] += 1
+        self._wake.set()
+        return post
+
+    def expire(self) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM stock WHERE created < ?", (time.time() - self.max_age,)
+            )
+            self.stats["expired"] += cur.rowcount
+        return cur.rowcount
+
+    # ---- refill -------------------------------------------------
+
+    def refill(self, full=False) -> list:
+        """
+        Start generations for buckets below the watermark (every bucket
+        below capacity with full=True), up to capacity. Returns the futures.
+        """
+        self.expire()
+        futures = []
+        for bucket, count in self.stock().items():
+            with self._lock:
+                have = count + self._pending[bucket]
+            if have >= (self.capacity if full else self.watermark):
+                continue
+            generator, options = self.buckets[bucket]
+            for _ in range(self.capacity - have):
+                if self.max_pending is not None and self._pending_for(generator) >= self.max_pending:
+                    break
+                try:
+                    future = self.submit(generator, options)
+                except Exception as exc:
+                    # e.g. the service queue is full: live requests come first
+                    print(f"⚠️ [reservoir] {bucket}: refill deferred ({exc})")
+                    return futures
+                with self._lock:
+                    self._pending[bucket] += 1
+                future.add_done_callback(lambda f, b=bucket: self._stored(b, f))
+                futures.append(future)
+        return futures
+
+    def _pending_for(self, generator):
+        with self._lock:
+            return sum(n for b, n in self._pending.items() if self.buckets[b][0] == generator)
+
+    def _stored(self, bucket, future):
+        with self._lock:
+            self._pending[bucket] -= 1
+        if future.exception() is not None:
+            print(f"❌ [reservoir] {bucket}: {future.exception()}")
+            with self._lock:
+                self.stats["failed"] += 1
+            return
+        self.put(bucket, future.result())
+        with self._lock:
+            self.stats["generated"] += 1
+        self._wake.set()   # a slot freed up: top up the next bucket
+
+    def start(self, interval=REFILL_INTERVAL):
+        """Refill in the background: after every take(), finished generation and `interval` s."""
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.refill()
+                except Exception as exc:
+                    print(f"❌ [reservoir] refill failed: {exc}")
+                self._wake.wait(interval)
+                self._wake.clear()
+
+        self._thread = threading.Thread(target=loop, name="reservoir-refill", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def summary(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            pending = {b: n for b, n in self._pending.items() if n}
+        return {
+            "capacity": self.capacity,
+            "watermark": self.watermark,
+            "stock": self.stock(),
+            "pending": pending,
+            **stats,
+        }
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def _generate(name, options):
+    return generators.generate(name, **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generated post reservoir.")
+    parser.add_argument("--db", default=str(DEFAULT_DB))
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY)
+    parser.add_argument("--max-age-h", type=float, default=DEFAULT_MAX_AGE / 3600)
+    parser.add_argument("--mix", action="append", default=[], metavar="NAME=APP:W,...",
+                        help="extra BetAI app mix bucket (repeatable)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="stock per bucket")
+    p = sub.add_parser("fill", help="generate every bucket up to capacity")
+    p.add_argument("--workers", type=int, default=2, help="processes per generator")
+    p = sub.add_parser("take", help="print one post and remove it from stock")
+    p.add_argument("--bucket")
+    p.add_argument("--generator", choices=sorted(generators.GENERATORS), default="lastr")
+    sub.add_parser("expire", help="drop posts older than --max-age-h")
+    args = parser.parse_args()
+
+    buckets = default_buckets(dict(parse_mix(m) for m in args.mix))
+    pools = {}
+
+    def submit(name, options):
+        if name not in pools:
+            # one pool per generator: their modules can't share a process
+            pools[name] = ProcessPoolExecutor(max_workers=args.workers)
+        return pools[name].submit(_generate, name, options)
+
+    reservoir = Reservoir(submit, buckets, args.db, args.capacity,
+                          max_age=args.max_age_h * 3600)
+
+    if args.command == "status":
+        print(json.dumps(reservoir.summary(), indent=2))
+    elif args.command == "expire":
+        print(f"🗑️ {reservoir.expire()} expired posts removed")
+    elif args.command == "take":
+        post = reservoir.take(args.bucket, args.generator)
+        if post is None:
+            raise SystemExit("❌ no stock for that bucket")
+        print(json.dumps(post, indent=2))
+    else:
+        futures = reservoir.refill(full=True)
+        print(f"⏳ generating {len(futures)} posts…")
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                pass
+        for pool in pools.values():
+            pool.shutdown()
+        s = reservoir.summary()
+        print(f"✅ {s['generated']} generated, {s['failed']} failed")
+        for bucket, count in s["stock"].items():
+            print(f"   {bucket:<24} {count}/{reservoir.capacity}")
+
+
+if __name__ == "__main__":
+    main()
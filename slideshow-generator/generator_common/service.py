@@ -0,0 +1,350 @@
+"""
+Long-lived local generation service.
+
+Keeps one warm process pool per generator (config compiled, image catalog
+indexed, OpenAI client and its HTTP connections reused) and exposes:
+
+    GET  /health
+    POST /generate  {"generator": "lastr" | "betai", "count": 1,
+                     "route": "pov" (lastr) | "mix": "default" (betai),
+                     "fresh": false, "offline": false}
+    POST /preview   {"generator": "lastr" | "betai", "post": {...}}  -> text/html
+                    (without "post", a fresh post is generated first)
+    POST /regenerate {"post": {...}, "slide": 3, "part": "text" | "image" | "both",
+                      "offline": false}  -> the post with only that slide rewritten
+
+Run from slideshow-generator/:
+
+    python -m generator_common.service --port 8765 --workers 2 --queue 16
+    python -m generator_common.service --reservoir 5   # serve from stock
+
+With --reservoir N, /generate hands out pre-generated posts (see
+reservoir.py) and only generates live when the bucket is empty or the
+request says "fresh": true. "offline": true writes the copy with the
+generators' template engines instead of GPT (drafts, API outages).
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import generators
+from .reservoir import Reservoir, bucket_for, default_buckets
+
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE = 16
+DEFAULT_TIMEOUT = 180
+
+
+# ------------------------------------------------------------
+# WORKER PROCESS
+# ------------------------------------------------------------
+
+def _init_worker(name):
+    """Warm a worker once: import the generator and compile its config."""
+    generators.load(name, "config").get_config()
+    generators.load(name, "generate")
+    generators.load(name, "preview")
+    try:
+        # The client is lazy in gpt_overlay; build it now so the SDK import
+        # and connection pool are paid once per worker, not per request.
+        generators.load(name, "gpt_overlay").get_client()
+    except Exception as exc:
+        print(f"⚠️ [{name}] OpenAI client not ready: {exc}")
+
+
+def _run_generate(name, options):
+    try:
+        return generators.generate(name, **options)
+    except Exception as exc:
+        raise _plain_error(exc) from None
+
+
+def _run_regenerate(name, post, slide, options):
+    try:
+        return generators.regenerate_slide(name, post, slide, **options)
+    except Exception as exc:
+        raise _plain_error(exc) from None
+
+
+def _run_preview(name, post):
+    try:
+        if post is None:
+            post = generators.generate(name)
+        return generators.build_preview(name, post)
+    except Exception as exc:
+        raise _plain_error(exc) from None
+
+
+def _plain_error(exc):
+    # SDK exceptions (e.g. openai.APIConnectionError) can't be unpickled in
+    # the parent and would break the whole pool; send them back as text.
+    return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+
+# ------------------------------------------------------------
+# BOUNDED POOL PER GENERATOR
+# ------------------------------------------------------------
+
+class QueueFull(Exception):
+    pass
+
+
+class GeneratorPool:
+    """Process pool with a bounded request queue in front of it."""
+
+    def __init__(self, name, workers, queue_size):
+        self.name = name
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(name,),
+        )
+
+    def reserve(self, count):
+        """Take `count` queue slots at once, or none of them (QueueFull)."""
+        taken = 0
+        while taken < count and self._slots.acquire(blocking=False):
+            taken += 1
+        if taken < count:
+            self.unreserve(taken)
+            raise QueueFull(f"{self.name}: queue full ({self.capacity} pending)")
+
+    def unreserve(self, count):
+        for _ in range(count):
+            self._slots.release()
+
+    def submit(self, fn, *args, reserved=False):
+        """reserved=True runs on a slot already taken with reserve()."""
+        if not reserved and not self._slots.acquire(blocking=False):
+            raise QueueFull(f"{self.name}: queue full ({self.capacity} pending)")
+        with self._lock:
+            self.in_flight += 1
+        future = self.executor.submit(fn, self.name, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._lock:
+            self.in_flight -= 1
+            if not future.cancelled() and future.exception() is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ------------------------------------------------------------
+# HTTP LAYER
+# ------------------------------------------------------------
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "SlideshowService/1.0"
+
+    @property
+    def pools(self):
+        return self.server.pools
+
+    def log_message(self, fmt, *args):
+        print(f"[service] {self.address_string()} {fmt % args}")
+
+    def _send(self, status, body, content_type="application/json"):
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body, indent=2)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _pool_for(self, payload):
+        default = generators.detect_generator(payload["post"]) if payload.get("post") else "lastr"
+        name = payload.get("generator", default)
+        if name not in self.pools:
+            raise ValueError(f"Unknown generator '{name}'")
+        return self.pools[name]
+
+    def _generate_options(self, name, payload):
+        options = {"offline": True} if payload.get("offline") else {}
+        if name == "lastr" and payload.get("route"):
+            options["route"] = payload["route"]
+        if name == "betai" and payload.get("mix"):
+            bucket = self.server.buckets.get(f"betai:{payload['mix']}")
+            if bucket is None:
+                raise ValueError(f"Unknown app mix '{payload['mix']}'")
+            options.update(bucket[1])
+        return options
+
+    def _from_reservoir(self, name, payload, count):
+        reservoir = self.server.reservoir
+        if reservoir is None or payload.get("fresh") or payload.get("offline"):
+            return []
+        bucket = bucket_for(name, payload.get("route"), payload.get("mix"))
+        posts = []
+        for _ in range(count):
+            post = reservoir.take(bucket, name)
+            if post is None:
+                break
+            posts.append(post)
+        return posts
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self._send(200, {
+                "status": "ok",
+                "uptime_s": round(time.time() - self.server.started_at, 1),
+                "generators": {n: p.stats() for n, p in self.pools.items()},
+                "reservoir": self.server.reservoir.summary() if self.server.reservoir else None,
+            })
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        route = self.path.rstrip("/")
+        try:
+            payload = self._read_json()
+            pool = self._pool_for(payload)
+
+            if route == "/generate":
+                count = max(1, int(payload.get("count", 1)))
+                if count > pool.capacity:
+                    raise ValueError(f"count must be <= {pool.capacity}")
+                options = self._generate_options(pool.name, payload)
+                # slots first: a full queue then costs neither stock nor LLM calls
+                pool.reserve(count)
+                try:
+                    posts = self._from_reservoir(pool.name, payload, count)
+                except BaseException:
+                    pool.unreserve(count)
+                    raise
+                pool.unreserve(len(posts))
+                futures = []
+                try:
+                    for _ in range(count - len(posts)):
+                        futures.append(pool.submit(_run_generate, options, reserved=True))
+                except BaseException:
+                    pool.unreserve(count - len(posts) - len(futures))
+                    for future in futures:
+                        future.cancel()
+                    raise
+                posts += [f.result(timeout=self.server.timeout_s) for f in futures]
+                self._send(200, {"generator": pool.name, "posts": posts})
+
+            elif route == "/regenerate":
+                if not isinstance(payload.get("post"), dict) or "slide" not in payload:
+                    raise ValueError('"post" and "slide" are required')
+                options = {"part": payload.get("part", "both"), "offline": bool(payload.get("offline"))}
+                future = pool.submit(_run_regenerate, payload["post"], int(payload["slide"]), options)
+                self._send(200, {"generator": pool.name,
+                                 "post": future.result(timeout=self.server.timeout_s)})
+
+            elif route == "/preview":
+                future = pool.submit(_run_preview, payload.get("post"))
+                html = future.result(timeout=self.server.timeout_s)
+                self._send(200, html, content_type="text/html")
+
+            else:
+                self._send(404, {"error": "not found"})
+
+        except QueueFull as exc:
+            self._send(503, {"error": str(exc)})
+        except FutureTimeout:
+            self._send(504, {"error": "generation timed out"})
+        except (ValueError, json.JSONDecodeError) as exc:
+            self._send(400, {"error": str(exc)})
+        except Exception as exc:
+            self._send(500, {"error": str(exc) or type(exc).__name__})
+
+
+def build_server(host="127.0.0.1", port=DEFAULT_PORT, workers=DEFAULT_WORKERS,
+                 queue_size=DEFAULT_QUEUE, timeout_s=DEFAULT_TIMEOUT, names=None,
+                 reservoir_capacity=0):
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    names = names or list(generators.GENERATORS)
+    # worker processes split the account's RPM/TPM budget between them
+    os.environ.setdefault("OPENAI_LIMIT_SHARE", str(workers * len(names)))
+    server.pools = {
+        name: GeneratorPool(name, workers, queue_size)
+        for name in names
+    }
+    server.buckets = {
+        bucket: spec for bucket, spec in default_buckets().items() if spec[0] in server.pools
+    }
+    server.reservoir = None
+    if reservoir_capacity > 0:
+        server.reservoir = Reservoir(
+            lambda name, options: server.pools[name].submit(_run_generate, options),
+            server.buckets, capacity=reservoir_capacity, max_pending=workers,
+        ).start()
+    server.timeout_s = timeout_s
+    server.started_at = time.time()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local slideshow generation service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="worker processes per generator")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE,
+                        help="requests allowed to wait per generator before 503")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--generator", action="append", choices=sorted(generators.GENERATORS),
+                        help="only serve these generators (default: all)")
+    parser.add_argument("--reservoir", type=int, default=0, metavar="N",
+                        help="keep N ready posts per route / app mix (0 = off)")
+    args = parser.parse_args()
+
+    server = build_server(args.host, args.port, args.workers, args.queue,
+                          args.timeout, args.generator, args.reservoir)
+    print(f"🚀 Generation service on http://{args.host}:{args.port} "
+          f"({', '.join(server.pools)}; {args.workers} workers each)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server.reservoir:
+            server.reservoir.stop()
+        for pool in server.pools.values():
+            pool.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
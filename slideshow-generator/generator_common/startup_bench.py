@@ -0,0 +1,96 @@
+"""
+Import-time benchmark for the generator CLIs.
+
+Each check starts a fresh interpreter in the generator folder, runs a
+preview/index-only entry point and fails when it exceeds its budget or
+pulls in the OpenAI SDK. Run from slideshow-generator/:
+
+    python -m generator_common.startup_bench            # check budgets
+    python -m generator_common.startup_bench --runs 10 --budget-ms 80
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from .generators import GENERATORS
+
+DEFAULT_RUNS = 5
+DEFAULT_BUDGET_MS = 100
+
+# Modules that must only load once a network call is actually made.
+HEAVY_MODULES = ("openai", "dotenv", "httpx")
+
+CHECKS = [
+    ("lastr", "preview", "import preview"),
+    ("lastr", "config", "import config; config.get_config()"),
+    ("lastr", "generate (import)", "import generate"),
+    ("betai", "preview", "import preview"),
+    ("betai", "config", "import config; config.get_config()"),
+    ("betai", "generate (import)", "import generate"),
+]
+
+
+def _probe(code):
+    heavy = ", ".join(repr(m) for m in HEAVY_MODULES)
+    return (
+        f"{code}\n"
+        "import sys\n"
+        f"print(','.join(m for m in ({heavy},) if m in sys.modules))"
+    )
+
+
+def time_command(generator, code, runs=DEFAULT_RUNS):
+    """Return (median_ms, heavy_modules_loaded) over fresh interpreters."""
+    cwd = GENERATORS[generator]["dir"]
+    timings = []
+    loaded = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", _probe(code)],
+            cwd=cwd, capture_output=True, text=True,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+        if result.returncode != 0:
+            raise RuntimeError(f"{generator}: `{code}` failed:\n{result.stderr}")
+        loaded = result.stdout.strip()
+    return statistics.median(timings), loaded
+
+
+def baseline_ms(runs=DEFAULT_RUNS):
+    """Bare interpreter startup, reported so budgets can be read in context."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check generator CLI startup time.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    print(f"python startup baseline: {baseline_ms(args.runs):.1f} ms")
+
+    failures = 0
+    for generator, label, code in CHECKS:
+        median_ms, loaded = time_command(generator, code, args.runs)
+        problems = []
+        if median_ms > args.budget_ms:
+            problems.append(f"over {args.budget_ms:.0f} ms budget")
+        if loaded:
+            problems.append(f"imports {loaded}")
+        status = "❌ " + "; ".join(problems) if problems else "✅"
+        print(f"{generator:<6} {label:<18} {median_ms:7.1f} ms  {status}")
+        failures += bool(problems)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
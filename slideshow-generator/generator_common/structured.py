@@ -0,0 +1,169 @@
+"""
+Schema-constrained structured outputs for the overlay calls.
+
+The schemas are sent to the Responses API (text.format = json_schema,
+strict) so the model can only emit matching JSON; validate() re-checks
+the same schema locally in microseconds before anything is merged.
+"""
+import json
+import threading
+
+
+# ------------------------------------------------------------
+# SCHEMA HELPERS
+# ------------------------------------------------------------
+
+def json_schema_format(name: str, schema: dict) -> dict:
+    """`text=` argument for client.responses.create()."""
+    return {
+        "format": {
+            "type": "json_schema",
+            "name": name,
+            "schema": schema,
+            "strict": True,
+        }
+    }
+
+
+def string_array(length: int) -> dict:
+    """Fixed-length array of strings."""
+    return {
+        "type": "array",
+        "items": {"type": "string"},
+        "minItems": length,
+        "maxItems": length,
+    }
+
+
+def strict_object(properties: dict) -> dict:
+    """Object where every property is required and nothing else is allowed."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+# ------------------------------------------------------------
+# LOCAL VALIDATOR (subset of JSON Schema used by our schemas)
+# ------------------------------------------------------------
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+def validate(value, schema: dict, path: str = "$") -> list:
+    """Return a list of error strings (empty when the value matches)."""
+    expected = schema.get("type")
+    if expected:
+        py_type = _TYPES[expected]
+        # bool is an int subclass; never accept it for integer/number
+        if not isinstance(value, py_type) or (
+            expected in ("integer", "number") and isinstance(value, bool)
+        ):
+            return [f"{path}: expected {expected}, got {type(value).__name__}"]
+
+    errors = []
+
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} not in enum")
+
+    if expected == "object":
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing '{key}'")
+        for key, item in value.items():
+            if key in properties:
+                errors.extend(validate(item, properties[key], f"{path}.{key}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}: unexpected '{key}'")
+
+    elif expected == "array":
+        if "minItems" in schema and len(value) < schema["minItems"]:
+            errors.append(f"{path}: expected at least {schema['minItems']} items, got {len(value)}")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{path}: expected at most {schema['maxItems']} items, got {len(value)}")
+        items = schema.get("items")
+        if items:
+            for i, item in enumerate(value):
+                errors.extend(validate(item, items, f"{path}[{i}]"))
+
+    elif expected == "string":
+        # not JSON Schema, but overlay copy is never legitimately empty
+        if not value.strip():
+            errors.append(f"{path}: empty string")
+
+    elif expected in ("integer", "number"):
+        if "minimum" in schema and value < schema["minimum"]:
+            errors.append(f"{path}: {value} < {schema['minimum']}")
+        if "maximum" in schema and value > schema["maximum"]:
+            errors.append(f"{path}: {value} > {schema['maximum']}")
+
+    return errors
+
+
+def parse_structured(text: str, fallback_parser=None):
+    """json.loads the structured output; only fall back to fence cleanup if needed."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        if fallback_parser is None:
+            raise
+        return fallback_parser(text)
+
+
+# ------------------------------------------------------------
+# RETRY STATS
+# ------------------------------------------------------------
+
+class RetryStats:
+    """Counts attempts per call so the retry/parse-failure rate can be reported."""
+
+    OUTCOMES = ("ok", "api_error", "parse_error", "invalid")
+
+    def __init__(self, label: str):
+        self.label = label
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.attempts = 0
+        self.retried_calls = 0
+        self.fallbacks = 0
+        self.outcomes = dict.fromkeys(self.OUTCOMES, 0)
+
+    def record_attempt(self, outcome: str):
+        with self._lock:
+            self.attempts += 1
+            self.outcomes[outcome] += 1
+
+    def record_call(self, attempts: int, fell_back: bool = False):
+        with self._lock:
+            self.calls += 1
+            self.retried_calls += int(attempts > 1)
+            self.fallbacks += int(fell_back)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "attempts": self.attempts,
+                "retried_calls": self.retried_calls,
+                "retry_rate": round(self.retried_calls / self.calls, 4) if self.calls else 0.0,
+                "fallbacks": self.fallbacks,
+                **self.outcomes,
+            }
+
+    def report(self) -> str:
+        s = self.summary()
+        return (
+            f"[{self.label}] {s['calls']} calls, {s['attempts']} attempts, "
+            f"retry rate {s['retry_rate']:.1%}, parse errors {s['parse_error']}, "
+            f"invalid {s['invalid']}, API errors {s['api_error']}, fallbacks {s['fallbacks']}"
+        )
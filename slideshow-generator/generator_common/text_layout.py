@@ -0,0 +1,139 @@
+"""
+Cached text layout for slide overlays.
+
+Font faces and per-glyph advances are loaded once per (font, size); line
+breaks are memoized per (text, font, size, width) and the largest font
+size that fits a box is found by binary search. The same CTA sentence
+repeated on every lastr slide 6 is therefore measured once per run.
+
+    python -m generator_common.text_layout --slides 1000    # timing check
+"""
+from functools import lru_cache
+
+from PIL import ImageFont
+
+LINE_SPACING = 1.2
+
+
+# ------------------------------------------------------------
+# FONT + GLYPH CACHES
+# ------------------------------------------------------------
+
+@lru_cache(maxsize=256)
+def get_font(font_path, size: int):
+    return ImageFont.truetype(str(font_path), size)
+
+
+@lru_cache(maxsize=65536)
+def glyph_advance(font_path, size: int, char: str) -> float:
+    return get_font(font_path, size).getlength(char)
+
+
+@lru_cache(maxsize=65536)
+def word_width(font_path, size: int, word: str) -> float:
+    # Sum of advances ignores kerning, which only ever tightens Aeonik
+    # pairs, so measured lines are never narrower than the drawn ones.
+    return sum(glyph_advance(font_path, size, c) for c in word)
+
+
+# ------------------------------------------------------------
+# LINE BREAKING
+# ------------------------------------------------------------
+
+@lru_cache(maxsize=16384)
+def break_lines(text: str, font_path, size: int, max_width: float) -> tuple:
+    """Greedy word wrap that keeps explicit line breaks."""
+    space = glyph_advance(font_path, size, " ")
+    lines = []
+    for paragraph in text.split("\n"):
+        words = paragraph.split()
+        if not words:
+            lines.append("")
+            continue
+        line = [words[0]]
+        width = word_width(font_path, size, words[0])
+        for word in words[1:]:
+            w = word_width(font_path, size, word)
+            if width + space + w <= max_width:
+                line.append(word)
+                width += space + w
+            else:
+                lines.append(" ".join(line))
+                line = [word]
+                width = w
+        lines.append(" ".join(line))
+    return tuple(lines)
+
+
+def _fits(text, font_path, size, max_width, max_height, line_spacing):
+    lines = break_lines(text, font_path, size, max_width)
+    if len(lines) * size * line_spacing > max_height:
+        return False
+    # a single word wider than the box never fits at this size
+    return all(
+        word_width(font_path, size, w) <= max_width
+        for line in lines for w in line.split(" ") if w
+    )
+
+
+@lru_cache(maxsize=16384)
+def fit_text(text: str, font_path, max_width: float, max_height: float,
+             max_size: int, min_size: int, line_spacing: float = LINE_SPACING):
+    """
+    Largest size in [min_size, max_size] whose wrapped text fits the box.
+    Returns (size, lines); falls back to min_size when nothing fits.
+    """
+    lo, hi = min_size, max_size
+    best = min_size
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if _fits(text, font_path, mid, max_width, max_height, line_spacing):
+            best = mid
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return best, break_lines(text, font_path, best, max_width)
+
+
+def cache_stats() -> dict:
+    return {
+        fn.__name__: fn.cache_info()._asdict()
+        for fn in (get_font, glyph_advance, word_width, break_lines, fit_text)
+    }
+
+
+def clear_caches():
+    for fn in (get_font, glyph_advance, word_width, break_lines, fit_text):
+        fn.cache_clear()
+
+
+# ------------------------------------------------------------
+# TIMING CHECK
+# ------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    from .render import SLIDE_SIZE, TEXT_FONT
+
+    parser = argparse.ArgumentParser(description="Time text fitting over synthetic slides.")
+    parser.add_argument("--slides", type=int, default=1000)
+    args = parser.parse_args()
+
+    words = ("control pressure lasting longer stamina panic fear confidence "
+             "rushing breathing rhythm focus slow down reset your mind").split()
+    cta = "\n".join(["You know what losing control feels like."] * 9) + "\n\nTry Lastr."
+    rng = random.Random(7)
+    texts = [
+        cta if i % 6 == 5 else " ".join(rng.choice(words) for _ in range(rng.randint(4, 18)))
+        for i in range(args.slides)
+    ]
+    width, height = SLIDE_SIZE
+
+    for label in ("cold", "warm"):
+        start = time.perf_counter()
+        for text in texts:
+            fit_text(text, TEXT_FONT, width * 0.86, height * 0.6, 96, 28)
+        print(f"{label}: {args.slides} slides in {(time.perf_counter() - start) * 1000:.1f} ms")
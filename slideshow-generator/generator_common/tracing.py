@@ -0,0 +1,185 @@
+"""
+Opt-in span tracing for the generation pipeline (Chrome trace format).
+
+Stages are wrapped in `span("stage name")`. Nothing is recorded unless
+SLIDESHOW_TRACE names an output folder; each process then writes its own
+trace-<pid>.json there when it exits (worker pools included), and
+SLIDESHOW_PROFILE=1 adds a cProfile dump per process. Merge a run into
+one file and open it in https://ui.perfetto.dev or chrome://tracing:
+
+    SLIDESHOW_TRACE=traces/run1 SLIDESHOW_PROFILE=1 python generate.py
+    python -m generator_common.tracing merge traces/run1 -o run1.json
+"""
+import argparse
+import atexit
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from multiprocessing import util as mp_util
+from pathlib import Path
+
+TRACE_ENV = "SLIDESHOW_TRACE"
+PROFILE_ENV = "SLIDESHOW_PROFILE"
+
+_NOOP = nullcontext()
+_state = {"dir": None, "pid": None, "events": [], "profiler": None, "threads": set()}
+_lock = threading.Lock()
+
+
+# ------------------------------------------------------------
+# SETUP
+# ------------------------------------------------------------
+
+def _now_us() -> float:
+    return time.perf_counter_ns() / 1000
+
+
+def enabled() -> bool:
+    """True when this process records spans (re-checked after a fork)."""
+    if _state["pid"] != os.getpid():
+        _start_process()
+    return _state["dir"] is not None
+
+
+def _start_process():
+    """(Re)initialize for the current process, e.g. in a freshly forked worker."""
+    _state["pid"] = os.getpid()
+    _state["events"] = []
+    _state["threads"] = set()
+    _state["profiler"] = None
+    trace_dir = os.getenv(TRACE_ENV)
+    _state["dir"] = Path(trace_dir) if trace_dir else None
+    if _state["dir"] is None:
+        return
+
+    _state["dir"].mkdir(parents=True, exist_ok=True)
+    if os.getenv(PROFILE_ENV, "") not in ("", "0"):
+        _state["profiler"] = cProfile.Profile()
+        _state["profiler"].enable()
+
+    atexit.register(flush)
+    # pool workers leave through os._exit(), which skips atexit
+    mp_util.Finalize(None, flush, exitpriority=100)
+
+
+# ------------------------------------------------------------
+# SPANS
+# ------------------------------------------------------------
+
+def _record(event):
+    tid = threading.get_ident()
+    event["pid"] = _state["pid"]
+    event["tid"] = tid
+    with _lock:
+        if tid not in _state["threads"]:
+            _state["threads"].add(tid)
+            _state["events"].append({
+                "name": "thread_name", "ph": "M", "pid": event["pid"], "tid": tid,
+                "args": {"name": threading.current_thread().name},
+            })
+        _state["events"].append(event)
+
+
+@contextmanager
+def _span(name, cat, args):
+    start = _now_us()
+    try:
+        yield
+    finally:
+        _record({
+            "name": name, "cat": cat, "ph": "X",
+            "ts": start, "dur": _now_us() - start, "args": args,
+        })
+
+
+def span(name: str, cat: str = "pipeline", **args):
+    """Time a block as one trace slice; a shared no-op when tracing is off."""
+    if not enabled():
+        return _NOOP
+    return _span(name, cat, args)
+
+
+def counter(name: str, **values):
+    """Record counter values (e.g. in-flight requests) as a trace track."""
+    if enabled():
+        _record({"name": name, "ph": "C", "ts": _now_us(), "args": values})
+
+
+# ------------------------------------------------------------
+# OUTPUT
+# ------------------------------------------------------------
+
+def flush():
+    """Write this process's trace (and profile) files; safe to call repeatedly."""
+    if _state["dir"] is None or _state["pid"] != os.getpid():
+        return
+    pid = _state["pid"]
+    with _lock:
+        events = list(_state["events"])
+    events.insert(0, {"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                      "args": {"name": f"{Path(sys.argv[0]).name} [{pid}]"}})
+    with open(_state["dir"] / f"trace-{pid}.json", "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    if _state["profiler"] is not None:
+        _state["profiler"].disable()
+        _state["profiler"].dump_stats(_state["dir"] / f"profile-{pid}.prof")
+        _state["profiler"].enable()
+
+
+def merge(trace_dir, out_path) -> int:
+    """Combine every trace-<pid>.json of a run into one Chrome trace."""
+    events = []
+    for path in sorted(Path(trace_dir).glob("trace-*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            events.extend(json.load(f)["traceEvents"])
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return len(events)
+
+
+def summarize(trace_path) -> list:
+    """Total / mean duration per span name, slowest first."""
+    with open(trace_path, "r", encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+    totals = {}
+    for e in events:
+        if e.get("ph") == "X":
+            count, total = totals.get(e["name"], (0, 0.0))
+            totals[e["name"]] = (count + 1, total + e["dur"])
+    return sorted(
+        ((name, count, total / 1000, total / count / 1000) for name, (count, total) in totals.items()),
+        key=lambda row: row[2], reverse=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline trace tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("merge", help="merge a run's per-process traces")
+    p.add_argument("trace_dir")
+    p.add_argument("-o", "--out", required=True)
+    p = sub.add_parser("summary", help="time per stage from a trace file or folder")
+    p.add_argument("trace")
+    args = parser.parse_args()
+
+    if args.command == "merge":
+        count = merge(args.trace_dir, args.out)
+        print(f"🧵 {count} events -> {args.out} (open in https://ui.perfetto.dev)")
+    else:
+        path = Path(args.trace)
+        if path.is_dir():
+            merged = path / "merged.json"
+            merge(path, merged)
+            path = merged
+        print(f"{'stage':<24}{'count':>7}{'total ms':>12}{'mean ms':>10}")
+        for name, count, total, mean in summarize(path):
+            print(f"{name:<24}{count:>7}{total:>12.1f}{mean:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+MP4 slideshow export.
+
+Renders a post's six slides and pipes raw RGB frames straight into a local
+ffmpeg (no intermediate frame files). Several posts encode in parallel,
+one process each. With several --aspects, the slides of every aspect are
+rendered in one pass and each aspect gets its own MP4 (name-9x16.mp4, ...).
+Run from slideshow-generator/:
+
+    python -m generator_common.video lastr_generator/output.json \
+        --out-dir exports --duration 2.5 --crossfade 0.5 --jobs 4
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from PIL import Image
+
+from .render import (
+    ASPECTS, ASPECTS_ENV, DEFAULT_ASPECT, SLIDE_SIZE, aspect_tag, configured_aspects, parse_aspects,
+    render_post, render_post_aspects,
+)
+from .image_cache import share_with_workers
+from .render_cache import RenderCache
+from .tracing import span
+
+DEFAULT_FPS = 30
+DEFAULT_DURATION = 2.5     # seconds each slide is fully visible
+DEFAULT_CROSSFADE = 0.5    # seconds of blend between consecutive slides
+
+
+def ffmpeg_command(out_path, size, fps, threads=0):
+    width, height = size
+    return [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24",
+        "-s", f"{width}x{height}", "-r", str(fps),
+        "-i", "-",
+        "-c:v", "libx264", "-preset", "medium", "-crf", "20",
+        "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+        "-threads", str(threads),
+        str(out_path),
+    ]
+
+
+def iter_frames(slides, fps, duration, crossfade):
+    """Yield raw RGB frames: hold each slide, then crossfade into the next."""
+    hold = max(1, round(duration * fps))
+    fade = round(crossfade * fps)
+
+    for index, slide in enumerate(slides):
+        frame = slide.tobytes()
+        for _ in range(hold):
+            yield frame
+        if index + 1 < len(slides) and fade:
+            following = slides[index + 1]
+            for step in range(1, fade + 1):
+                yield Image.blend(slide, following, step / (fade + 1)).tobytes()
+
+
+def export_video(post, out_path, size=SLIDE_SIZE, fps=DEFAULT_FPS,
+                 duration=DEFAULT_DURATION, crossfade=DEFAULT_CROSSFADE, threads=0,
+                 cache=None):
+    """Render + encode one post to MP4. Returns the output path."""
+    slides = render_post(post, size, cache=cache)
+    return encode_slides(slides, out_path, size, fps, duration, crossfade, threads)
+
+
+def encode_slides(slides, out_path, size=SLIDE_SIZE, fps=DEFAULT_FPS,
+                  duration=DEFAULT_DURATION, crossfade=DEFAULT_CROSSFADE, threads=0):
+    """Encode already rendered slides to MP4. Returns the output path."""
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found on PATH (needed for MP4 export).")
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with span("encode", cat="render", out=out_path.name):
+        process = subprocess.Popen(
+            ffmpeg_command(out_path, size, fps, threads),
+            stdin=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        try:
+            for frame in iter_frames(slides, fps, duration, crossfade):
+                process.stdin.write(frame)
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = process.stderr.read().decode(errors="replace")
+        returncode = process.wait()
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed for {out_path}:\n{stderr}")
+    return out_path
+
+
+def export_videos(post, out_dir, name, aspects=None, cache=None, **options) -> list:
+    """One MP4 per aspect, all rendered from one decode of each background."""
+    rendered = render_post_aspects(post, aspects, cache)
+    return [
+        encode_slides(slides, Path(out_dir) / f"{name}-{aspect_tag(aspect)}.mp4",
+                      ASPECTS[aspect], **options)
+        for aspect, slides in rendered.items()
+    ]
+
+
+def load_posts(path):
+    """A post JSON file may hold one post or a list of posts (batch output)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+
+def named_posts(paths) -> list:
+    """
+    [(name, post)] for post files: the file stem, "-001"... for batch
+    files, and "-2", "-3"... when two inputs share a stem (outputs and
+    archive folders are keyed by these names).
+    """
+    named, used = [], set()
+    for path in paths:
+        posts = load_posts(path)
+        stem = Path(path).stem
+        for i, post in enumerate(posts):
+            base = stem if len(posts) == 1 else f"{stem}-{i + 1:03d}"
+            name, n = base, 1
+            while name in used:
+                n += 1
+                name = f"{base}-{n}"
+            used.add(name)
+            named.append((name, post))
+    return named
+
+
+def export_many(posts_with_names, out_dir, jobs=None, aspects=None, **options):
+    """Encode several posts in parallel across CPU cores (one MP4 per post and aspect)."""
+    jobs = jobs or os.cpu_count() or 1
+    # Split cores between concurrent encoders instead of oversubscribing.
+    options.setdefault("threads", max(1, (os.cpu_count() or 1) // jobs))
+    out_dir = Path(out_dir)
+    aspects = parse_aspects(aspects) if aspects else configured_aspects()
+
+    results = []
+    share_with_workers()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        if len(aspects) > 1:
+            futures = {
+                pool.submit(export_videos, post, out_dir, name, aspects, **options): name
+                for name, post in posts_with_names
+            }
+        else:
+            size = ASPECTS[aspects[0]]
+            futures = {
+                pool.submit(export_video, post, out_dir / f"{name}.mp4", size, **options): name
+                for name, post in posts_with_names
+            }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                paths = future.result()
+                paths = paths if isinstance(paths, list) else [paths]
+                results.extend(paths)
+                for path in paths:
+                    print(f"🎬 {path.name}")
+            except Exception as exc:
+                print(f"❌ {name}: {exc}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export posts as MP4 slideshows.")
+    parser.add_argument("posts", nargs="+", help="post JSON files (single post or list)")
+    parser.add_argument("--out-dir", default="exports")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION,
+                        help="seconds per slide")
+    parser.add_argument("--crossfade", type=float, default=DEFAULT_CROSSFADE,
+                        help="seconds of crossfade between slides (0 = hard cut)")
+    parser.add_argument("--fps", type=int, default=DEFAULT_FPS)
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="posts encoded in parallel (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="redraw every slide instead of reusing cached renders")
+    parser.add_argument("--aspects", type=parse_aspects, default=None,
+                        help=f"comma-separated, from {', '.join(ASPECTS)} "
+                             f"(default: ${ASPECTS_ENV} or {DEFAULT_ASPECT})")
+    args = parser.parse_args()
+
+    named = named_posts(args.posts)
+    export_many(named, args.out_dir, jobs=args.jobs, aspects=args.aspects, fps=args.fps,
+                duration=args.duration, crossfade=args.crossfade,
+                cache=None if args.no_cache else RenderCache())
+
+
+if __name__ == "__main__":
+    main()
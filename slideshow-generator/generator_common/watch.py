@@ -0,0 +1,409 @@
+"""
+Live preview server: watches post files, generator configs, preview
+templates and image folders, rebuilds only the preview pages a change
+affects and tells open browser tabs to reload (Server-Sent Events).
+
+Previews are built from stored post JSON, so nothing is generated and no
+LLM call is made. Run from slideshow-generator/:
+
+    python -m generator_common.watch lastr_generator/output.json posts/ --port 8766
+
+What triggers a rebuild:
+    post file            -> the pages from that file
+    preview.py           -> every page of that generator
+    data.json / images   -> config re-validated; that generator's pages when
+                            its error banner appears or clears
+    image file           -> the pages showing that image
+"""
+import argparse
+import hashlib
+import html
+import json
+import mimetypes
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+from . import generators
+
+DEFAULT_PORT = 8766
+DEFAULT_INTERVAL = 0.5    # seconds between filesystem polls
+INDEX_PAGE = "__index__"  # reload id of the page list
+KEEPALIVE = 15            # seconds between SSE keep-alive comments
+
+RELOAD_SCRIPT = """
+<script>
+(() => {
+  const page = %s;
+  const events = new EventSource("/events");
+  events.onmessage = (e) => {
+    const pages = JSON.parse(e.data);
+    if (pages.includes(page)) location.reload();
+  };
+})();
+</script>
+"""
+
+
+# ------------------------------------------------------------
+# FILESYSTEM SNAPSHOTS
+# ------------------------------------------------------------
+
+def _stamp(path: Path):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def snapshot(paths) -> dict:
+    """{path: (mtime_ns, size)} for the given files and every file under the given dirs."""
+    stamps = {}
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            for child in path.rglob("*"):
+                if child.is_file():
+                    stamps[child.resolve()] = _stamp(child)
+        else:
+            stamps[path.resolve()] = _stamp(path)
+    return stamps
+
+
+def changed_paths(before: dict, after: dict) -> set:
+    return {p for p in before.keys() | after.keys() if before.get(p) != after.get(p)}
+
+
+# ------------------------------------------------------------
+# PAGES
+# ------------------------------------------------------------
+
+def image_paths(post: dict) -> list:
+    paths = [s.get("image", "") for s in post.get("slides", [])]
+    if isinstance(post.get("hook"), dict):
+        paths.append(post["hook"].get("image", ""))
+    return [p for p in paths if p]
+
+
+def image_token(path) -> str:
+    return hashlib.sha1(str(path).encode("utf-8")).hexdigest()[:16]
+
+
+class PreviewSite:
+    """In-memory preview pages plus the dependency map used to rebuild them."""
+
+    def __init__(self, sources):
+        self.sources = [Path(s).resolve() for s in sources]
+        self.lock = threading.Lock()
+        self.pages = {}          # page id -> {"generator", "file", "post", "images", "html"}
+        self.images = {}         # token -> image path
+        self.templates = {}      # generator -> preview module
+        self.config_errors = {}  # generator -> error text (None when valid)
+        self.builds = 0
+        self.image_roots = {name: generators.image_root(name) for name in generators.GENERATORS}
+
+    # ---- inputs -------------------------------------------------
+
+    def post_files(self) -> list:
+        files = []
+        for source in self.sources:
+            if source.is_dir():
+                files.extend(sorted(source.rglob("*.json")))
+            elif source.exists():
+                files.append(source)
+        return files
+
+    def watched(self) -> list:
+        paths = list(self.sources)
+        for name, info in generators.GENERATORS.items():
+            paths += [info["dir"] / "preview.py", info["dir"] / "data.json", self.image_roots[name]]
+        return paths
+
+    def template(self, name):
+        if name not in self.templates:
+            self.templates[name] = generators.load_isolated(name, "preview")
+        return self.templates[name]
+
+    def check_config(self, name):
+        try:
+            generators.load_isolated(name, "config").compile_config()
+            error = None
+        except Exception as exc:
+            error = str(exc)
+        changed = self.config_errors.get(name, "unset") != error
+        self.config_errors[name] = error
+        return changed
+
+    # ---- building -----------------------------------------------
+
+    @staticmethod
+    def page_base(path: Path) -> str:
+        """
+        Page id of a post file: its path without suffix, relative to the
+        working directory when inside it ("lastr_generator/output"), so two
+        watched output.json files never share a page.
+        """
+        try:
+            relative = path.relative_to(Path.cwd())
+        except ValueError:
+            relative = path.relative_to(path.anchor)
+        return relative.with_suffix("").as_posix()
+
+    def _render(self, page_id, name, post) -> str:
+        page = self.template(name).build_html(post)
+        # Serve images over HTTP: file:// and bare paths do not load from an http:// page.
+        for path in sorted(set(image_paths(post)), key=len, reverse=True):
+            token = image_token(path)
+            self.images[token] = Path(path)
+            url = f"/img/{token}?v={(_stamp(Path(path)) or (0,))[0]}"
+            page = page.replace(f"file://{path}", url).replace(path, url)
+
+        banner = ""
+        if self.config_errors.get(name):
+            banner = (
+                '<pre style="background:#7f1d1d;color:#fff;padding:12px;margin:0;'
+                f'white-space:pre-wrap">{html.escape(self.config_errors[name])}</pre>'
+            )
+        page = page.replace("<body>", "<body>" + banner, 1)
+        return page.replace("</body>", RELOAD_SCRIPT % json.dumps(page_id) + "</body>", 1)
+
+    def build_file(self, path: Path) -> set:
+        """(Re)build every page from one post file. Returns the touched page ids."""
+        stale = {pid for pid, p in self.pages.items() if p["file"] == path}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as exc:
+            for pid in stale:
+                del self.pages[pid]
+            print(f"⚠️ {path.name}: {exc}")
+            return stale
+
+        posts = data if isinstance(data, list) else [data]
+        fresh = set()
+        for i, post in enumerate(posts):
+            if not isinstance(post, dict) or "slides" not in post:
+                continue
+            base = self.page_base(path)
+            page_id = base if len(posts) == 1 else f"{base}-{i + 1:03d}"
+            name = generators.detect_generator(post)
+            self.pages[page_id] = {
+                "generator": name,
+                "file": path,
+                "post": post,
+                "images": {str(Path(p).resolve()) for p in image_paths(post)},
+                "html": self._render(page_id, name, post),
+            }
+            fresh.add(page_id)
+            self.builds += 1
+
+        for pid in stale - fresh:
+            del self.pages[pid]
+        return stale | fresh
+
+    def rebuild(self, page_ids) -> set:
+        page_ids = set(page_ids)
+        for pid in page_ids:
+            page = self.pages[pid]
+            page["html"] = self._render(pid, page["generator"], page["post"])
+            self.builds += 1
+        return page_ids
+
+    def build_all(self):
+        with self.lock:
+            for name in generators.GENERATORS:
+                self.check_config(name)
+            for path in self.post_files():
+                self.build_file(path)
+
+    # ---- incremental updates ------------------------------------
+
+    def apply_changes(self, changed: set) -> set:
+        """Rebuild only what the changed paths feed into. Returns affected page ids."""
+        affected = set()
+        with self.lock:
+            known_files = {p["file"] for p in self.pages.values()}
+            post_files = set(self.post_files())
+            for path in changed & (known_files | post_files):
+                affected |= self.build_file(path)
+
+            for name, info in generators.GENERATORS.items():
+                gen_pages = {pid for pid, p in self.pages.items() if p["generator"] == name}
+                if info["dir"] / "preview.py" in changed:
+                    self.templates.pop(name, None)
+                    affected |= self.rebuild(gen_pages)
+
+                image_changes = {p for p in changed if self.image_roots[name] in p.parents}
+                if info["dir"] / "data.json" in changed or image_changes:
+                    if self.check_config(name):
+                        affected |= self.rebuild(gen_pages)
+
+            changed_images = {str(p) for p in changed}
+            affected |= self.rebuild(
+                pid for pid, p in self.pages.items()
+                if p["images"] & changed_images and pid not in affected
+            )
+        return affected
+
+    # ---- views --------------------------------------------------
+
+    def index_html(self) -> str:
+        rows = []
+        for pid in sorted(self.pages):
+            page = self.pages[pid]
+            error = " ⚠️ config error" if self.config_errors.get(page["generator"]) else ""
+            rows.append(
+                f'<li><a href="/p/{html.escape(quote(pid))}">{html.escape(pid)}</a> '
+                f'<small>{page["generator"]}{error}</small></li>'
+            )
+        body = "\n".join(rows) or "<li>No posts found in the watched paths.</li>"
+        return (
+            '<!DOCTYPE html><html><head><meta charset="UTF-8" /><title>Previews</title></head>'
+            '<body style="font-family:sans-serif;background:#0a0a0a;color:#f5f5f5;padding:32px">'
+            f"<h1>Previews</h1><ul>{body}</ul></body></html>"
+        ).replace("</body>", RELOAD_SCRIPT % json.dumps(INDEX_PAGE) + "</body>", 1)
+
+
+# ------------------------------------------------------------
+# RELOAD CHANNEL
+# ------------------------------------------------------------
+
+class ReloadChannel:
+    """Broadcasts lists of changed page ids to every open /events stream."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.version = 0
+        self.pages = []
+
+    def publish(self, page_ids):
+        with self.cond:
+            self.version += 1
+            self.pages = sorted(page_ids)
+            self.cond.notify_all()
+
+    def wait(self, version, timeout):
+        with self.cond:
+            self.cond.wait_for(lambda: self.version != version, timeout)
+            return self.version, self.pages
+
+
+# ------------------------------------------------------------
+# SERVER
+# ------------------------------------------------------------
+
+def build_server(site: PreviewSite, channel: ReloadChannel, host, port):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status, body, content_type="text/html; charset=utf-8"):
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = unquote(self.path.split("?", 1)[0])
+            if path == "/":
+                with site.lock:
+                    self._send(200, site.index_html())
+            elif path.startswith("/p/"):
+                with site.lock:
+                    page = site.pages.get(path[3:])
+                    body = page["html"] if page else None
+                if body is None:
+                    self._send(404, "Unknown preview page")
+                else:
+                    self._send(200, body)
+            elif path.startswith("/img/"):
+                image = site.images.get(path[5:])
+                if image is None or not image.is_file():
+                    self._send(404, "Unknown image")
+                    return
+                content_type = mimetypes.guess_type(image.name)[0] or "application/octet-stream"
+                self._send(200, image.read_bytes(), content_type)
+            elif path == "/events":
+                self._stream()
+            else:
+                self._send(404, "Not found")
+
+        def _stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            version = channel.version
+            try:
+                while True:
+                    new_version, pages = channel.wait(version, KEEPALIVE)
+                    if new_version == version:
+                        self.wfile.write(b": keep-alive\n\n")
+                    else:
+                        version = new_version
+                        self.wfile.write(f"data: {json.dumps(pages)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def watch_loop(site: PreviewSite, channel: ReloadChannel, interval=DEFAULT_INTERVAL, stop=None):
+    """Poll the watched paths and push reloads for the pages each change affects."""
+    stop = stop or threading.Event()
+    before = snapshot(site.watched())
+    while not stop.wait(interval):
+        after = snapshot(site.watched())
+        changed = changed_paths(before, after)
+        before = after
+        if not changed:
+            continue
+        started = time.perf_counter()
+        affected = site.apply_changes(changed)
+        if affected:
+            # the index lists pages, so it reloads whenever anything changes
+            channel.publish(affected | {INDEX_PAGE})
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"🔄 Rebuilt {len(affected)} page(s) in {elapsed:.0f} ms: {', '.join(sorted(affected))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live-reloading preview server.")
+    parser.add_argument("sources", nargs="*",
+                        default=[str(generators.GENERATORS["lastr"]["dir"] / "output.json")],
+                        help="post JSON files or folders of them")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL)
+    args = parser.parse_args()
+
+    site = PreviewSite(args.sources)
+    site.build_all()
+    channel = ReloadChannel()
+    server = build_server(site, channel, args.host, args.port)
+    threading.Thread(target=watch_loop, args=(site, channel, args.interval), daemon=True).start()
+
+    print(f"👀 Watching {len(site.pages)} preview page(s) on http://{args.host}:{args.port}/")
+    for name, error in site.config_errors.items():
+        if error:
+            print(f"⚠️ [{name}] config error: {error}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
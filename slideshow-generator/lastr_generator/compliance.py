@@ -0,0 +1,66 @@
+import random
+from functools import lru_cache
+
+import _paths  # noqa: F401  (generator_common on sys.path)
+from config import FORBIDDEN_TERMS, get_config
+from regenerate import _route, regenerate_slide
+from generator_common.compliance import ComplianceStats, TermFilter, enforce
+
+COMPLIANCE_STATS = ComplianceStats("lastr compliance")
+
+
+# ------------------------------------------------------------
+# COMPLIANCE FILTER
+# ------------------------------------------------------------
+# The prompt's forbidden list (config.FORBIDDEN_TERMS, also enforced on
+# the phrase banks) checked on the model's output. Numbering matches the
+# BetAI filter: 1 is the hook, 2–7 the six slides. Offending slides get
+# their text rewritten (regenerate.py), the hook is redrawn from the
+# route's phrase bank. A/B variants are checked one by one, the first
+# one being the post itself.
+
+@lru_cache(maxsize=None)
+def get_filter():
+    return TermFilter({term: "forbidden" for term in FORBIDDEN_TERMS})
+
+
+def scan_post(post) -> list:
+    term_filter = get_filter()
+    texts = [post.get("hook", "")] + [s.get("text", "") for s in post["slides"]]
+    return [
+        {"slide": number, "term": term, "rule": rule}
+        for number, text in enumerate(texts, start=1)
+        for term, rule in term_filter.find(text)
+    ]
+
+
+def check_post(post, offline=False, strict=False, config=None, rng=random):
+    """
+    Scan a post and each of its variants, rewrite offending slides; flag
+    (or raise, strict) what is left.
+    """
+    config = config or get_config()
+
+    def fix(post, slides, last_round):
+        for number in slides:
+            if number == 1:
+                hooks = config["phrases"][_route(post, config)]["hooks"]
+                post = {**post, "hook": rng.choice(hooks)}
+            else:
+                post = regenerate_slide(post, number - 1, "text", offline or last_round, config, rng)
+        return post
+
+    variants = post.get("variants")
+    post = {k: v for k, v in post.items() if k != "variants"}
+    post = enforce(post, scan_post, fix, strict=strict, stats=COMPLIANCE_STATS)
+    if variants:
+        # variant 0 is the post itself: keep it in sync with the fixed copy,
+        # compliance flags included, shaped like the others (no route)
+        checked = [{k: v for k, v in post.items() if k != "route"}]
+        for variant in variants[1:]:
+            variant = enforce({**variant, "route": post.get("route")}, scan_post, fix,
+                              strict=strict, stats=COMPLIANCE_STATS)
+            variant.pop("route")
+            checked.append(variant)
+        post["variants"] = checked
+    return post
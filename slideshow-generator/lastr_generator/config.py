@@ -0,0 +1,264 @@
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+
+# ------------------------------------------------------------
+# PATHS
+# ------------------------------------------------------------
+ROOT = Path(__file__).parent
+CONFIG_PATH = ROOT / "data.json"
+PICS_ROOT = ROOT.parent.parent / "public" / "images" / "Lastr_pics"
+
+LAYOUT_STATS_NAME = "layout_stats.json"   # built by generator_common.image_stats
+TAGS_SUFFIX = ".tags"                      # sidecar next to each image: 1.png.tags
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+SLIDES_PER_POST = 6
+DEFAULT_ROUTE = "story"
+CTA_CATEGORY = "app"
+HOOK_EXCLUDED_CATEGORIES = ("health",)    # food pics never open a post
+
+# Phrase-bank rules (same as the GPT brief): PG-13 vocabulary, slide 1
+# opens on breathing/control, slide 5 pivots to Lastr, lines stay short.
+FORBIDDEN_TERMS = ("sex", "sexual", "cum", "penis", "vagina", "thrusting")
+OPENER_TERMS = ("breath", "control")
+BRAND = "Lastr"
+MAX_PHRASE_CHARS = 90
+
+
+# ------------------------------------------------------------
+# IMAGE CATALOG
+# ------------------------------------------------------------
+
+def list_images(folder: Path):
+    """Return every image in a folder, sorted so the catalog is stable."""
+    if not folder.is_dir():
+        return []
+    return sorted(
+        p for p in folder.iterdir()
+        if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS
+    )
+
+
+def load_layout_styles(root: Path):
+    """
+    Per-image text style {position, text_color, ...} from the layout stats
+    catalog, keyed like the image catalog. Empty until the catalog is built.
+    """
+    path = Path(root) / LAYOUT_STATS_NAME
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f).get("images", {})
+    return {str(Path(root) / rel): entry["style"] for rel, entry in entries.items()}
+
+
+# ------------------------------------------------------------
+# IMAGE TAGS
+# ------------------------------------------------------------
+# Each image may have a sidecar "<file>.tags" (comma/newline separated,
+# editable by hand; `python tags.py seed` writes them). Images without
+# one use their category's seed tags from data.json "tags".
+
+_SUFFIXES = ("ing", "ed", "es", "s", "e")
+
+
+def stem(word: str) -> str:
+    """Crude suffix stripping so breathe/breathing/breath share a key."""
+    word = word.lower().replace("’", "'").split("'")[0]
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> set:
+    return {stem(w) for w in re.findall(r"[A-Za-z’']+", text)}
+
+
+def read_tags(image_path, seeds=()) -> tuple:
+    """Tags from an image's sidecar, else the category seeds."""
+    sidecar = Path(f"{image_path}{TAGS_SUFFIX}")
+    if not sidecar.is_file():
+        return tuple(seeds)
+    text = sidecar.read_text(encoding="utf-8")
+    return tuple(t.strip() for t in re.split(r"[,\n]", text) if t.strip())
+
+
+def compile_tag_index(images, seeds):
+    """({path: tag stems}, {stem: paths}) over every catalog image."""
+    image_tags = {}
+    index = {}
+    for category, files in images.items():
+        for path in files:
+            stems = frozenset().union(*(tokenize(t) for t in read_tags(path, seeds.get(category, ()))))
+            image_tags[path] = stems
+            for key in stems:
+                index.setdefault(key, []).append(path)
+    return image_tags, {key: tuple(paths) for key, paths in index.items()}
+
+
+# ------------------------------------------------------------
+# PHRASE BANKS
+# ------------------------------------------------------------
+
+def _phrase_problems(text, slot=None):
+    problems = []
+    if len(text) > MAX_PHRASE_CHARS:
+        problems.append(f"longer than {MAX_PHRASE_CHARS} chars")
+    forbidden = [t for t in FORBIDDEN_TERMS if re.search(rf"\b{t}\b", text, re.IGNORECASE)]
+    if forbidden:
+        problems.append(f"forbidden terms {forbidden}")
+    if slot == 0 and not any(t in text.lower() for t in OPENER_TERMS):
+        problems.append(f"slide 1 must mention one of {list(OPENER_TERMS)}")
+    if slot == SLIDES_PER_POST - 2 and BRAND not in text:
+        problems.append(f"slide {SLIDES_PER_POST - 1} must mention {BRAND}")
+    return problems
+
+
+def compile_phrases(raw_phrases, modes, routes, errors):
+    """
+    Per-route banks {hooks, slides: 5 option lists} for the template engine.
+    A route with "mode" also draws from that mode's hooks, and overlay i
+    joins slide i's options. Rule violations are appended to `errors`.
+    """
+    banks = {}
+    for route in routes:
+        raw = raw_phrases.get(route)
+        if raw is None:
+            errors.append(f"route '{route}': no phrase bank")
+            continue
+        mode = modes.get(raw.get("mode"), {}) if raw.get("mode") else {}
+        if raw.get("mode") and not mode:
+            errors.append(f"phrases '{route}': unknown mode '{raw['mode']}'")
+
+        hooks = list(raw.get("hooks", [])) + list(mode.get("hooks", []))
+        slots = [list(options) for options in raw.get("slides", [])]
+        if len(slots) != SLIDES_PER_POST - 1:
+            errors.append(
+                f"phrases '{route}': expected {SLIDES_PER_POST - 1} slide slots, got {len(slots)}"
+            )
+            continue
+        for i, overlay in enumerate(mode.get("overlays", [])[:len(slots)]):
+            slots[i].append(overlay)
+
+        if not hooks:
+            errors.append(f"phrases '{route}': no hooks")
+        for hook in hooks:
+            errors.extend(f"phrases '{route}' hook {hook!r}: {p}" for p in _phrase_problems(hook))
+        for i, options in enumerate(slots):
+            if not options:
+                errors.append(f"phrases '{route}': slide {i + 1} has no options")
+            for text in options:
+                errors.extend(
+                    f"phrases '{route}' slide {i + 1} {text!r}: {p}"
+                    for p in _phrase_problems(text, i)
+                )
+
+        banks[route] = {
+            "hooks": tuple(dict.fromkeys(hooks)),
+            "slides": tuple(tuple(dict.fromkeys(options)) for options in slots),
+        }
+    return banks
+
+
+# ------------------------------------------------------------
+# CONFIG COMPILER
+# ------------------------------------------------------------
+
+def compile_config(path=CONFIG_PATH, pics_root=PICS_ROOT):
+    """
+    Load data.json once, index every image folder it names and validate
+    the route sequences against that index.
+
+    data.json keys:
+    - "images":    category -> folder name inside Lastr_pics
+    - "sequences": route -> 6 categories (hook image first, CTA image last).
+                   Hook should be aesthetic/stress/muscle, never health
+                   (food pics), and the CTA slide is always the app.
+    - "modes":     hook/overlay copy banks
+    - "phrases":   route -> template engine bank (hooks + 5 slide option
+                   lists, optionally extended by a mode), see templates.py
+    - "tags":      category -> seed tags for images without a .tags
+                   sidecar; compiled into an inverted index (see tags.py)
+
+    Raises ValueError listing every problem found, so a broken config fails
+    at startup instead of in the middle of a batch.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    errors = []
+
+    images = {}
+    for category, folder_name in raw.get("images", {}).items():
+        folder = Path(pics_root) / folder_name
+        files = list_images(folder)
+        if not folder.is_dir():
+            errors.append(f"image category '{category}': folder not found ({folder})")
+        elif not files:
+            errors.append(f"image category '{category}': no images in {folder}")
+        images[category] = tuple(str(p) for p in files)
+
+    sequences = {}
+    for route, sequence in raw.get("sequences", {}).items():
+        if len(sequence) != SLIDES_PER_POST:
+            errors.append(
+                f"route '{route}': expected {SLIDES_PER_POST} categories, got {len(sequence)}"
+            )
+        unknown = [c for c in sequence if c not in images]
+        if unknown:
+            errors.append(f"route '{route}': unknown image categories {unknown}")
+        if sequence and sequence[-1] != CTA_CATEGORY:
+            errors.append(f"route '{route}': last slide must be '{CTA_CATEGORY}'")
+        if sequence and sequence[0] in HOOK_EXCLUDED_CATEGORIES:
+            errors.append(f"route '{route}': '{sequence[0]}' can't open a post")
+        sequences[route] = tuple(sequence)
+
+    if DEFAULT_ROUTE not in sequences:
+        errors.append(f"default route '{DEFAULT_ROUTE}' has no image sequence")
+
+    for mode, copy in raw.get("modes", {}).items():
+        for key in ("hooks", "overlays"):
+            if not copy.get(key):
+                errors.append(f"mode '{mode}': '{key}' is empty")
+
+    phrases = compile_phrases(raw.get("phrases", {}), raw.get("modes", {}), sequences, errors)
+
+    if errors:
+        raise ValueError(
+            f"Invalid lastr config ({path}):\n - " + "\n - ".join(errors)
+        )
+
+    styles = load_layout_styles(pics_root)
+    image_tags, tag_index = compile_tag_index(images, raw.get("tags", {}))
+    return {
+        "routes": tuple(sequences),
+        "sequences": sequences,
+        "images": images,
+        "layout": {p: styles[p] for files in images.values() for p in files if p in styles},
+        "modes": raw.get("modes", {}),
+        "phrases": phrases,
+        "image_category": {p: c for c, files in images.items() for p in files},
+        "image_tags": image_tags,
+        "tag_index": tag_index,
+    }
+
+
+@lru_cache(maxsize=None)
+def get_config():
+    """Compiled config for this process (loaded and validated once)."""
+    return compile_config()
+
+
+# ------------------------------------------------------------
+# EXECUTE
+# ------------------------------------------------------------
+
+if __name__ == "__main__":
+    config = get_config()
+    print(f"✅ Config OK: {len(config['routes'])} routes")
+    for category, files in config["images"].items():
+        print(f"   {category:<10} {len(files)} images")
@@ -1,69 +1,49 @@
 import json
 import random
+import sys
 from pathlib import Path
-from gpt_overlay import generate_overlay_and_hook
+import _paths  # noqa: F401  (generator_common on sys.path)
+from compliance import COMPLIANCE_STATS, check_post
+from config import DEFAULT_ROUTE, get_config
+from gpt_overlay import (
+    OVERLAY_STATS,
+    generate_overlay_and_hook,
+    generate_overlay_variants,
+)
+from tags import match_images
+from templates import compose_overlay
+from generator_common.hedging import get_hedger
+from generator_common.tracing import span
 
 
 # ------------------------------------------------------------
 # PATHS
 # ------------------------------------------------------------
 ROOT = Path(__file__).parent
-PICS_ROOT = ROOT.parent.parent / "public" / "images" / "Lastr_pics"
 OUTPUT_PATH = ROOT / "output.json"
 
 
-# ------------------------------------------------------------
-# IMAGE CATEGORIES
-# ------------------------------------------------------------
-CATEGORIES = {
-    "aesthetic": PICS_ROOT / "aesthetic",
-    "couple": PICS_ROOT / "Couple",
-    "health": PICS_ROOT / "Health",
-    "muscle": PICS_ROOT / "Muscle",
-    "room": PICS_ROOT / "Room",
-    "mirror": PICS_ROOT / "Mirror",
-    "stress": PICS_ROOT / "stress",
-    "app": PICS_ROOT / "App",
-}
-
-# Image sequences per format
-# Hook (slide 1) should be: aesthetic, stress, or muscle - NOT health (food pics)
-# Health = food/nutrition pics - use for middle slides only
-# CTA (last slide) = always app
-IMAGE_SEQUENCES = {
-    "tips": ["muscle", "health", "room", "couple", "mirror", "app"],
-    "story": ["stress", "room", "couple", "mirror", "aesthetic", "app"],
-    "reasons": ["aesthetic", "stress", "room", "couple", "mirror", "app"],
-    "myth": ["muscle", "room", "health", "couple", "mirror", "app"],
-    "killing": ["stress", "health", "room", "mirror", "couple", "app"],
-    "pov": ["aesthetic", "couple", "mirror", "room", "muscle", "app"],
-}
-
-
 # ------------------------------------------------------------
 # IMAGE PICKING UTILITIES
 # ------------------------------------------------------------
+# Image categories and per-route sequences live in data.json and are
+# compiled once by config.get_config(); picking only touches memory.
 
-def pick_random_image(folder: Path):
-    """Pick a random image from a folder."""
-    images = (
-        list(folder.glob("*.jpg")) +
-        list(folder.glob("*.jpeg")) +
-        list(folder.glob("*.png"))
-    )
+def pick_random_image(category: str, config=None):
+    """Pick a random image from a catalog category."""
+    config = config or get_config()
+    images = config["images"].get(category)
     if not images:
-        raise Exception(f"No images found in: {folder}")
-    return str(random.choice(images))
+        raise Exception(f"No images found for category: {category}")
+    return random.choice(images)
 
 
-def generate_image_sequence(route: str):
+def generate_image_sequence(route: str, config=None):
     """Return 6 image paths based on the route/format."""
-    sequence = IMAGE_SEQUENCES.get(route, IMAGE_SEQUENCES["story"])
-    slides = []
-    for category in sequence:
-        folder = CATEGORIES[category]
-        slides.append(pick_random_image(folder))
-    return slides
+    config = config or get_config()
+    sequences = config["sequences"]
+    sequence = sequences.get(route, sequences[DEFAULT_ROUTE])
+    return [pick_random_image(category, config) for category in sequence]
 
 
 # ------------------------------------------------------------
@@ -80,7 +60,7 @@ def choose_route():
     - 'killing'   (things killing your stamina)
     - 'pov'       (POV: you finally lasted)
     """
-    return random.choice(["tips", "story", "reasons", "myth", "killing", "pov"])
+    return random.choice(get_config()["routes"])
 
 
 # ------------------------------------------------------------
@@ -105,29 +85,73 @@ def build_input_structure(route, image_sequence):
 # MAIN GENERATOR
 # ------------------------------------------------------------
 
-def generate_post():
-    route = choose_route()
-    images = generate_image_sequence(route)
+def attach_images(output, images, layout=None):
+    """
+    Pair GPT hook + slide texts with the picked images. `layout` is the
+    config's per-image text style; analyzed images carry it as "layout".
+    """
+    layout = layout or {}
+    slides = []
+    for i, text in enumerate(output["slides"]):
+        slide = {"text": text, "image": images[i]}
+        if images[i] in layout:
+            slide["layout"] = layout[images[i]]
+        slides.append(slide)
+    return {"hook": output["hook"], "slides": slides}
+
+
+def generate_post(output_path=OUTPUT_PATH, variants=1, route=None, offline=False, strict=False):
+    """
+    Generate one post; pass output_path=None to skip writing output.json.
+    `route` forces a route (default: random, see choose_route).
+    offline=True skips GPT and writes the copy with the template engine.
+    strict=True raises ComplianceError when the copy still uses a
+    forbidden term after targeted rewrites (default: the post is flagged).
+
+    variants > 1 asks GPT for that many hook + slides sets in one call.
+    The first one is the post itself; all of them are stored under
+    "variants" (same images) for A/B testing.
+    """
+    routes = get_config()["routes"]
+    if route is not None and route not in routes:
+        raise ValueError(f"Unknown lastr route '{route}' (valid routes: {', '.join(routes)})")
+    with span("route choice"):
+        route = route or choose_route()
+    with span("image selection", route=route):
+        images = generate_image_sequence(route)
     input_json = build_input_structure(route, images)
 
-    # Call GPT
-    output = generate_overlay_and_hook(input_json)
+    # Call GPT (or the local template engine)
+    if offline:
+        with span("template copy"):
+            outputs = [compose_overlay(route) for _ in range(max(1, variants))]
+    elif variants > 1:
+        outputs = generate_overlay_variants(input_json, variants)
+    else:
+        outputs = [generate_overlay_and_hook(input_json)]
 
-    # Add images back into final output
-    output_structured = {
-        "hook": output["hook"],
-        "slides": []
-    }
+    # Re-pick images whose tags best match the copy (tag index, no disk access)
+    with span("image match"):
+        images = match_images(route, outputs[0], images)
 
-    for i, text in enumerate(output["slides"]):
-        output_structured["slides"].append({
-            "text": text,
-            "image": images[i]
-        })
+    # Add images back into final output
+    with span("merge"):
+        layout = get_config()["layout"]
+        output_structured = attach_images(outputs[0], images, layout)
+        output_structured["route"] = route   # lets regenerate.py rewrite single slides
+        if variants > 1:
+            output_structured["variants"] = [
+                attach_images(output, images, layout) for output in outputs
+            ]
+
+    # Forbidden-term filter; offending slides are rewritten one by one
+    output_structured = check_post(output_structured, offline=offline, strict=strict)
 
     # Save final JSON
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(output_structured, f, indent=2)
+    if output_path:
+        with span("file write"):
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(output_structured, f, indent=2)
 
     return output_structured
 
@@ -137,5 +161,23 @@ def generate_post():
 # ------------------------------------------------------------
 
 if __name__ == "__main__":
-    post = generate_post()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a Lastr post.")
+    parser.add_argument("--variants", type=int, default=1,
+                        help="hook + slides variants to request in one call (A/B)")
+    parser.add_argument("--route", choices=get_config()["routes"],
+                        help="force a route instead of picking one at random")
+    parser.add_argument("--offline", action="store_true",
+                        help="no GPT call: copy from the data.json phrase banks")
+    parser.add_argument("--strict", action="store_true",
+                        help="fail instead of flagging a post that uses a forbidden term")
+    args = parser.parse_args()
+
+    post = generate_post(variants=args.variants, route=args.route, offline=args.offline,
+                         strict=args.strict)
     print(json.dumps(post, indent=2))
+    print(OVERLAY_STATS.report(), file=sys.stderr)
+    print(COMPLIANCE_STATS.report(), file=sys.stderr)
+    if get_hedger():
+        print(get_hedger().report(), file=sys.stderr)
@@ -1,24 +1,47 @@
 import os
 import json
 import re
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-CTA_SENTENCES = [
-    "You promised yourself this wouldn't happen again.",
-    "You know exactly why you can't slip again.",
-    "You remember how it felt last time — never again.",
-    "You know what losing control feels like.",
-    "You still hear that moment replaying in your head.",
-    "You know the feeling you're trying to avoid.",
-    "You know the look she gave you — don't relive it.",
-    "You remember how fast confidence can disappear.",
-    "You know the moment you wish you could redo.",
-    "You know exactly what night you're trying to forget."
-]
+from functools import lru_cache
+
+import _paths  # noqa: F401  (generator_common on sys.path)
+from generator_common.structured import (
+    RetryStats,
+    json_schema_format,
+    parse_structured,
+    strict_object,
+    string_array,
+    validate,
+)
+from generator_common.hedging import HedgeCancelled, create_response, hedged
+from generator_common.rate_limit import estimate_tokens, get_limiter
+from generator_common.tracing import span
+from templates import CTA_SENTENCES, compose_overlay, format_cta_slide
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    """Create the OpenAI client on first use (loads .env, imports the SDK)."""
+    from dotenv import load_dotenv
+    from openai import OpenAI
+
+    load_dotenv()
+    # SDK retries are off: 429s must reach the rate limiter, and our own
+    # attempt loop already retries.
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+
+MAX_ATTEMPTS = 3
+OUTPUT_TOKENS = 600        # per hook + slides set, for the TPM estimate
+
+# Structured-output schema: 5 slides, CTA sentence from the list, 8–10 repeats
+OVERLAY_SCHEMA = strict_object({
+    "hook": {"type": "string"},
+    "slides": string_array(5),
+    "cta_sentence": {"type": "string", "enum": CTA_SENTENCES},
+    "cta_repeats": {"type": "integer", "minimum": 8, "maximum": 10},
+})
+
+OVERLAY_STATS = RetryStats("lastr overlay")
 
 
 def clean_json_output(text: str):
@@ -35,35 +58,27 @@ def clean_json_output(text: str):
         return json.loads(match.group(0))
 
 
-def format_cta_slide(sentence: str, repeat_count: int) -> str:
-    """Repeat the CTA sentence 8–10 times, then add the Lastr signature."""
-    try:
-        repeats = int(repeat_count)
-    except (TypeError, ValueError):
-        repeats = 8
-    repeats = max(8, min(10, repeats))
-    block = "\n".join(sentence for _ in range(repeats))
-    return f"{block}\n\nTry Lastr."
-
-
 def generate_overlay_and_hook(post_json):
     """
     Ask GPT for hook + slides. Retries up to 3 times when the model
-    returns malformed output, then falls back to a deterministic script
+    returns malformed output, then falls back to the template engine
     so the pipeline never crashes.
     """
-    for attempt in range(3):
+    for attempt in range(MAX_ATTEMPTS):
         result = _request_overlay(post_json, attempt + 1)
         if result:
+            OVERLAY_STATS.record_call(attempt + 1)
             return result
 
-    print("⚠️ Falling back to deterministic overlay copy.")
-    return _fallback_overlay(post_json)
+    OVERLAY_STATS.record_call(MAX_ATTEMPTS, fell_back=True)
+    print("⚠️ Falling back to template overlay copy.")
+    return compose_overlay(post_json.get("route"))
 
 
-def _request_overlay(post_json, attempt):
+def build_overlay_prompt(post_json, variants=1):
+    """Full creative brief; with variants > 1 it asks for K independent sets."""
     cta_list = json.dumps(CTA_SENTENCES, indent=2)
-    prompt = f"""
+    return f"""
 SYSTEM:
 You are a top-tier creative director for TikTok carousels about performance confidence.
 You write hooks and overlays that feel raw, emotional, and PG-13 compliant.
@@ -114,8 +129,12 @@ CTA FORMAT (MANDATORY):
 INPUT JSON:
 {json.dumps(post_json, indent=2)}
 
-OUTPUT (RETURN EXACTLY THIS JSON):
-{{
+{_output_instructions(variants)}
+"""
+
+
+def _output_instructions(variants):
+    single = """{
   "hook": "<rewritten hook>",
   "slides": [
     "<slide_1_text>",
@@ -126,74 +145,224 @@ OUTPUT (RETURN EXACTLY THIS JSON):
   ],
   "cta_sentence": "<exact sentence copied from CTA list>",
   "cta_repeats": <integer between 8 and 10>
-}}
-"""
+}"""
+    if variants == 1:
+        return f"OUTPUT (RETURN EXACTLY THIS JSON):\n{single}"
+
+    return f"""VARIANTS (A/B TEST):
+- Write {variants} complete, independent versions (hook + slides + CTA fields).
+- Every variant follows the same route and rules, but each one uses a clearly
+  different hook angle and different slide wording.
+
+OUTPUT (RETURN EXACTLY THIS JSON, "variants" holds {variants} objects):
+{{
+  "variants": [
+    {single},
+    ...
+  ]
+}}"""
 
+
+def _call_model(prompt, schema, name, attempt, sets=1, cancelled=None, output_tokens=None):
+    """One structured request; returns the parsed JSON or None on API/parse errors."""
+    output_tokens = output_tokens or OUTPUT_TOKENS * sets
     try:
-        response = client.responses.create(
-            model="gpt-4.1",
-            input=prompt
-        )
+        limiter = get_limiter()
+        with limiter.request(estimate_tokens(prompt, output_tokens)) as ticket:
+            with span("llm request", cat="llm", schema=name, attempt=attempt):
+                response = create_response(
+                    get_client(),
+                    cancelled,
+                    model="gpt-4.1",
+                    input=prompt,
+                    text=json_schema_format(name, schema),
+                )
+            limiter.settle(ticket, getattr(response.usage, "total_tokens", None))
+    except HedgeCancelled:
+        raise
     except Exception as exc:
+        OVERLAY_STATS.record_attempt("api_error")
         print("❌ OpenAI API error:", exc)
         return None
 
     raw_output = response.output_text
 
     try:
-        parsed = clean_json_output(raw_output)
+        with span("json cleanup"):
+            return parse_structured(raw_output, clean_json_output)
     except Exception as exc:
+        OVERLAY_STATS.record_attempt("parse_error")
         print("❌ INVALID JSON RETURNED (attempt", attempt, "):")
         print(raw_output)
         print(exc)
         return None
 
-    slides = parsed.get("slides", [])
-    if len(slides) != 5:
-        print(f"❌ GPT did not return exactly 5 slides on attempt {attempt}: {slides}")
+
+def _request_overlay(post_json, attempt):
+    with span("prompt build"):
+        prompt = build_overlay_prompt(post_json)
+    # OPENAI_HEDGE=1: a slow attempt gets a duplicate, first valid one wins
+    return hedged(lambda cancelled: _overlay_attempt(prompt, attempt, cancelled), "lastr_overlay")
+
+
+def _overlay_attempt(prompt, attempt, cancelled=None):
+    parsed = _call_model(prompt, OVERLAY_SCHEMA, "lastr_overlay", attempt, cancelled=cancelled)
+    if parsed is None:
         return None
 
-    hook = (parsed.get("hook") or "").strip() or post_json.get("hook")
+    errors = validate(parsed, OVERLAY_SCHEMA)
+    if errors:
+        OVERLAY_STATS.record_attempt("invalid")
+        print(f"❌ GPT output failed validation on attempt {attempt}: {errors}")
+        return None
 
-    cta_sentence = (parsed.get("cta_sentence") or "").strip()
-    if cta_sentence not in CTA_SENTENCES:
-        print("⚠️ CTA sentence invalid. Falling back to default.")
-        cta_sentence = CTA_SENTENCES[0]
+    OVERLAY_STATS.record_attempt("ok")
+    return build_overlay_result(parsed)
 
-    final_slide = format_cta_slide(cta_sentence, parsed.get("cta_repeats", 8))
-    slides = [s.strip() for s in slides]
-    slides.append(final_slide)
 
-    return {
-        "hook": hook,
-        "slides": slides
-    }
+def _variants_attempt(prompt, schema, k, attempt, invalid, cancelled=None):
+    """
+    One variants request: the valid variants, or None (no leg wins with an
+    invalid reply; `invalid` notes that validation, not the API, failed).
+    """
+    parsed = _call_model(prompt, schema, "lastr_overlay_variants", attempt,
+                         sets=k, cancelled=cancelled)
+    if parsed is None:
+        return None
+
+    raw_variants = parsed.get("variants") if isinstance(parsed, dict) else None
+    valid = []
+    for i, variant in enumerate(raw_variants or []):
+        errors = validate(variant, OVERLAY_SCHEMA, f"$.variants[{i}]")
+        if errors:
+            print(f"⚠️ Dropping variant {i + 1}: {errors}")
+        else:
+            valid.append(build_overlay_result(variant))
+    if not valid:
+        invalid.append(attempt)
+        return None
+    return valid
+
+
+def generate_overlay_variants(post_json, k):
+    """
+    Ask for K complete hook + slides sets in ONE request (A/B hooks).
+    Each variant is validated on its own; invalid ones are dropped, and
+    the call is retried only when none survive.
+    """
+    schema = strict_object({
+        "variants": {
+            "type": "array",
+            "items": OVERLAY_SCHEMA,
+            "minItems": k,
+            "maxItems": k,
+        },
+    })
+    with span("prompt build", variants=k):
+        prompt = build_overlay_prompt(post_json, variants=k)
 
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        invalid = []
+        valid = hedged(
+            lambda cancelled: _variants_attempt(prompt, schema, k, attempt, invalid, cancelled),
+            "lastr_overlay_variants",
+        )
+        if valid:
+            OVERLAY_STATS.record_attempt("ok")
+            OVERLAY_STATS.record_call(attempt)
+            if len(valid) < k:
+                print(f"⚠️ Only {len(valid)}/{k} variants passed validation.")
+            return valid
+        if invalid:
+            # counted once per attempt, whichever hedge leg(s) failed
+            OVERLAY_STATS.record_attempt("invalid")
+
+    OVERLAY_STATS.record_call(MAX_ATTEMPTS, fell_back=True)
+    print("⚠️ Falling back to template overlay copy.")
+    return [compose_overlay(post_json.get("route")) for _ in range(k)]
+
+
+# ------------------------------------------------------------
+# SINGLE-SLIDE REWRITE (targeted regeneration)
+# ------------------------------------------------------------
+SLIDE_SCHEMA = strict_object({"text": {"type": "string"}})
+SLIDE_OUTPUT_TOKENS = 60
+
+ROUTE_BRIEFS = {
+    "tips": "actionable micro-tips, instructive",
+    "story": "panic → tension → shame → realization → Lastr, emotional",
+    "reasons": "one distinct reason for struggling with stamina per slide, reflective",
+    "myth": "one busted stamina myth per slide, eye-opening",
+    "killing": "one habit that hurts stamina per slide, direct wake-up call",
+    "pov": "life after mastering control, dreamy and aspirational",
+}
+
+SLIDE_RULES = {
+    1: "This slide opens the carousel: reference breathing or control.",
+    5: "This slide pivots to Lastr (benefit, proof or invitation) and names Lastr.",
+}
+
+
+def build_slide_prompt(context):
+    """
+    Minimal brief for one slide: route tone, text rules and only the
+    neighbouring copy (hook, previous and next slide) as context.
+    """
+    number = context["slide"]
+    brief = ROUTE_BRIEFS.get(context.get("route"), "")
+    neighbours = {k: context[k] for k in ("hook", "previous", "next") if context.get(k)}
+    return f"""Rewrite slide {number} of a 6-slide TikTok carousel for Lastr (route "{context.get('route')}": {brief}).
+Rules: 1–2 short punchy lines, PG-13. Allowed vocab: control, pressure, lasting longer, stamina,
+panic, fear, confidence, rushing, losing control, breathing, rhythm, focus. Never use explicit
+sexual terms (sex, sexual, cum, penis, vagina, thrusting, etc.).
+{SLIDE_RULES.get(number, "Continue the arc between the neighbouring slides; say something new.")}
+Neighbouring slides (context only): {json.dumps(neighbours, ensure_ascii=False)}
+Current text to replace: {json.dumps(context.get("current", ""), ensure_ascii=False)}
+Return JSON: {{"text": "<new slide text>"}}"""
+
+
+def _slide_attempt(prompt, attempt, invalid, cancelled=None):
+    """One slide request: the stripped text, or None when missing/invalid."""
+    parsed = _call_model(prompt, SLIDE_SCHEMA, "lastr_slide", attempt,
+                         cancelled=cancelled, output_tokens=SLIDE_OUTPUT_TOKENS)
+    if parsed is None:
+        return None
+    if validate(parsed, SLIDE_SCHEMA) or not parsed["text"].strip():
+        invalid.append(attempt)
+        return None
+    return parsed["text"].strip()
+
+
+def generate_slide_text(context):
+    """
+    New text for one slide (1–5) from a minimal prompt. Returns None after
+    MAX_ATTEMPTS failures so the caller can fall back to the phrase bank.
+    """
+    with span("prompt build", slide=context["slide"]):
+        prompt = build_slide_prompt(context)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        invalid = []
+        text = hedged(
+            lambda cancelled: _slide_attempt(prompt, attempt, invalid, cancelled),
+            "lastr_slide",
+        )
+        if text is not None:
+            OVERLAY_STATS.record_attempt("ok")
+            OVERLAY_STATS.record_call(attempt)
+            return text
+        if invalid:
+            OVERLAY_STATS.record_attempt("invalid")
+
+    OVERLAY_STATS.record_call(MAX_ATTEMPTS, fell_back=True)
+    return None
+
+
+def build_overlay_result(parsed):
+    """Turn a validated overlay object into hook + 6 slide texts."""
+    slides = [s.strip() for s in parsed["slides"]]
+    slides.append(format_cta_slide(parsed["cta_sentence"], parsed["cta_repeats"]))
 
-def _fallback_overlay(post_json):
-    route = post_json.get("route", "story")
-    if route == "tips":
-        hook = "5 quick moves to last longer tonight."
-        slides = [
-            "Start with a deep 4-4 breath. Control begins there.",
-            "Drop your shoulders. A tense body finishes faster.",
-            "Lock your eyes on one point to stop racing thoughts.",
-            "Switch rhythm the second you feel panic creeping in.",
-            "Track every rep inside Lastr before the real moment."
-        ]
-    else:
-        hook = "When panic hits mid-moment, here’s how you steal back control."
-        slides = [
-            "Breathe slow when the rush spikes.",
-            "Panic tells you tonight will end the same way.",
-            "Shame shows up the second you start rushing.",
-            "Control returns when you rehearse the calm.",
-            "Lastr is where you rebuild that calm daily."
-        ]
-
-    slides.append(format_cta_slide(CTA_SENTENCES[0], 8))
     return {
-        "hook": hook,
+        "hook": parsed["hook"].strip(),
         "slides": slides
     }
-
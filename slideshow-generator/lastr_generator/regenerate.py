@@ -0,0 +1,128 @@
+import copy
+import json
+import random
+import sys
+
+import _paths  # noqa: F401  (generator_common on sys.path)
+from config import CTA_CATEGORY, DEFAULT_ROUTE, SLIDES_PER_POST, get_config
+from gpt_overlay import OVERLAY_STATS, generate_slide_text
+from tags import score_images
+from templates import CTA_REPEATS, CTA_SENTENCES, format_cta_slide
+from generator_common.tracing import span
+
+
+# ------------------------------------------------------------
+# TARGETED SINGLE-SLIDE REGENERATION
+# ------------------------------------------------------------
+# Re-rolls the text and/or image of ONE slide of a stored post instead of
+# the whole post. The text prompt carries only the route, the rules and
+# the neighbouring copy, so a fix costs a small fraction of a full
+# generate_post() call; images are re-picked from memory (tag index).
+# Slides are numbered 1–6 like the carousel; slide 6 is the CTA.
+
+PARTS = ("text", "image", "both")
+
+
+def _route(post, config):
+    route = post.get("route")
+    return route if route in config["sequences"] else DEFAULT_ROUTE
+
+
+def slide_context(post, number, route):
+    """Route, hook and the slides right before/after `number` (1-based)."""
+    slides = post["slides"]
+    return {
+        "route": route,
+        "slide": number,
+        "hook": post.get("hook", "") if number == 1 else "",
+        "previous": slides[number - 2]["text"] if number > 1 else "",
+        "next": slides[number]["text"] if number < SLIDES_PER_POST - 1 else "",
+        "current": slides[number - 1]["text"],
+    }
+
+
+def new_text(post, number, route, config, offline=False, rng=random):
+    """Slides 1–5: GPT (phrase bank when offline or failing). Slide 6: a new CTA."""
+    if number == SLIDES_PER_POST:
+        return format_cta_slide(rng.choice(CTA_SENTENCES), rng.randint(*CTA_REPEATS))
+    text = None
+    if not offline:
+        text = generate_slide_text(slide_context(post, number, route))
+    if text is None:
+        current = post["slides"][number - 1]["text"]
+        options = config["phrases"][route]["slides"][number - 1]
+        text = rng.choice([o for o in options if o != current] or options)
+    return text
+
+
+def new_image(post, number, route, config, rng=random):
+    """
+    Another image of the slide's category, not already in the post,
+    preferring the ones whose tags best match the slide text.
+    """
+    current = post["slides"][number - 1]["image"]
+    sequence = config["sequences"][route]
+    category = config["image_category"].get(current) or sequence[number - 1]
+    used = {s["image"] for s in post["slides"]}
+    candidates = [p for p in config["images"][category] if p not in used]
+    if not candidates:
+        return current
+    if category != CTA_CATEGORY:
+        scores = score_images(post["slides"][number - 1]["text"], config)
+        best = max(scores.get(p, 0) for p in candidates)
+        candidates = [p for p in candidates if scores.get(p, 0) == best]
+    return rng.choice(candidates)
+
+
+def regenerate_slide(post, number, part="both", offline=False, config=None, rng=random):
+    """
+    Return a copy of `post` with slide `number` (1–6) rewritten: its text,
+    its image or both (text first, so the image can match the new copy).
+    Other slides, the hook and any variants are left untouched.
+    """
+    config = config or get_config()
+    if part not in PARTS:
+        raise ValueError(f"part must be one of {PARTS}")
+    if not 1 <= number <= len(post["slides"]):
+        raise ValueError(f"slide must be between 1 and {len(post['slides'])}")
+
+    post = copy.deepcopy(post)
+    route = _route(post, config)
+    slide = post["slides"][number - 1]
+    with span("regenerate slide", slide=number, part=part):
+        if part in ("text", "both"):
+            slide["text"] = new_text(post, number, route, config, offline, rng)
+        if part in ("image", "both"):
+            slide["image"] = new_image(post, number, route, config, rng)
+            slide.pop("layout", None)
+            if slide["image"] in config["layout"]:
+                slide["layout"] = config["layout"][slide["image"]]
+    return post
+
+
+# ------------------------------------------------------------
+# EXECUTE
+# ------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+
+    from generate import OUTPUT_PATH
+
+    parser = argparse.ArgumentParser(description="Regenerate one slide of a stored Lastr post.")
+    parser.add_argument("slide", type=int, help="slide number, 1–6 (6 = CTA)")
+    parser.add_argument("--post", default=str(OUTPUT_PATH), help="post JSON file")
+    parser.add_argument("--part", choices=PARTS, default="both")
+    parser.add_argument("--offline", action="store_true",
+                        help="no GPT call: new text from the data.json phrase banks")
+    parser.add_argument("--in-place", action="store_true", help="write the result back to --post")
+    args = parser.parse_args()
+
+    with open(args.post, "r", encoding="utf-8") as f:
+        post = json.load(f)
+    post = regenerate_slide(post, args.slide, args.part, args.offline)
+    if args.in_place:
+        with open(args.post, "w", encoding="utf-8") as f:
+            json.dump(post, f, indent=2)
+    print(json.dumps(post["slides"][args.slide - 1], indent=2))
+    print(OVERLAY_STATS.report(), file=sys.stderr)
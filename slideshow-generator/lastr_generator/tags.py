@@ -0,0 +1,134 @@
+import json
+import random
+from collections import Counter
+from pathlib import Path
+
+from config import (
+    CONFIG_PATH,
+    CTA_CATEGORY,
+    DEFAULT_ROUTE,
+    HOOK_EXCLUDED_CATEGORIES,
+    TAGS_SUFFIX,
+    get_config,
+    read_tags,
+    tokenize,
+)
+
+
+# ------------------------------------------------------------
+# TEXT -> IMAGE MATCHING
+# ------------------------------------------------------------
+# The route's folder sequence picks images before GPT writes anything, so
+# a slide about breathing can land on a food photo. Once the copy exists,
+# each slide looks its words up in the compiled tag index (config
+# "tag_index": stem -> images) and takes the image sharing the most tags,
+# preferring its own category. Only images of the route's categories are
+# eligible and nothing touches the filesystem.
+
+SAME_CATEGORY_BONUS = 0.5
+
+
+def slide_texts(output):
+    """One text per slide; slide 1 also carries the hook."""
+    texts = list(output["slides"])
+    if texts:
+        texts[0] = f"{output.get('hook', '')} {texts[0]}"
+    return texts
+
+
+def score_images(text, config=None) -> Counter:
+    """{image: number of tags it shares with the text} (matches only)."""
+    config = config or get_config()
+    index = config["tag_index"]
+    scores = Counter()
+    for key in tokenize(text):
+        for path in index.get(key, ()):
+            scores[path] += 1
+    return scores
+
+
+def match_images(route, output, images, config=None, rng=random):
+    """
+    Re-pick the images of a post from its copy. `images` is the folder pick
+    (kept for slides whose text matches no tag, and for the CTA slide).
+    """
+    config = config or get_config()
+    sequences = config["sequences"]
+    sequence = sequences.get(route, sequences[DEFAULT_ROUTE])
+    image_category = config["image_category"]
+    allowed = set(sequence) - {CTA_CATEGORY}
+
+    matched = list(images)
+    used = set(images)
+    for i, text in enumerate(slide_texts(output)):
+        if i >= len(sequence) or sequence[i] == CTA_CATEGORY:
+            continue
+        eligible = allowed - set(HOOK_EXCLUDED_CATEGORIES) if i == 0 else allowed
+
+        ranked = {}
+        for path, overlap in score_images(text, config).items():
+            category = image_category.get(path)
+            if category not in eligible or (path in used and path != matched[i]):
+                continue
+            ranked[path] = overlap + (SAME_CATEGORY_BONUS if category == sequence[i] else 0)
+        if not ranked:
+            continue
+
+        best = max(ranked.values())
+        if ranked.get(matched[i], 0) >= best:
+            continue   # the folder pick is already as good as it gets
+        choice = rng.choice([p for p, score in ranked.items() if score == best])
+        used.discard(matched[i])
+        used.add(choice)
+        matched[i] = choice
+    return matched
+
+
+# ------------------------------------------------------------
+# SIDECARS
+# ------------------------------------------------------------
+
+def seed_sidecars(config=None, overwrite=False):
+    """Write <image>.tags for every catalog image from its category seeds."""
+    config = config or get_config()
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        seeds = json.load(f).get("tags", {})
+    written = 0
+    for category, files in config["images"].items():
+        for path in files:
+            sidecar = Path(f"{path}{TAGS_SUFFIX}")
+            if sidecar.exists() and not overwrite:
+                continue
+            sidecar.write_text(", ".join(seeds.get(category, ())) + "\n", encoding="utf-8")
+            written += 1
+    return written
+
+
+# ------------------------------------------------------------
+# EXECUTE
+# ------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Image tags for text-based image matching.")
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("seed", help="write missing .tags sidecars from data.json seeds")
+    p.add_argument("--overwrite", action="store_true")
+    p = sub.add_parser("match", help="show the best images for a slide text")
+    p.add_argument("text")
+    args = parser.parse_args()
+
+    config = get_config()
+    if args.command == "seed":
+        print(f"🏷️ {seed_sidecars(config, args.overwrite)} sidecars written")
+    elif args.command == "match":
+        for path, overlap in score_images(args.text, config).most_common(8):
+            tags = ", ".join(sorted(config["image_tags"][path]))
+            print(f"{overlap}  {Path(path).parent.name}/{Path(path).name}  [{tags}]")
+    else:
+        sidecars = sum(
+            Path(f"{p}{TAGS_SUFFIX}").is_file() for files in config["images"].values() for p in files
+        )
+        print(f"✅ {len(config['tag_index'])} tags over {len(config['image_tags'])} images "
+              f"({sidecars} with a sidecar)")
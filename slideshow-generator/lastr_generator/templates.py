@@ -0,0 +1,75 @@
+import random
+from math import prod
+
+from config import DEFAULT_ROUTE, get_config
+
+
+# ------------------------------------------------------------
+# CTA (slide 6)
+# ------------------------------------------------------------
+CTA_SENTENCES = [
+    "You promised yourself this wouldn't happen again.",
+    "You know exactly why you can't slip again.",
+    "You remember how it felt last time — never again.",
+    "You know what losing control feels like.",
+    "You still hear that moment replaying in your head.",
+    "You know the feeling you're trying to avoid.",
+    "You know the look she gave you — don't relive it.",
+    "You remember how fast confidence can disappear.",
+    "You know the moment you wish you could redo.",
+    "You know exactly what night you're trying to forget."
+]
+CTA_REPEATS = (8, 10)
+
+
+def format_cta_slide(sentence: str, repeat_count: int) -> str:
+    """Repeat the CTA sentence 8–10 times, then add the Lastr signature."""
+    try:
+        repeats = int(repeat_count)
+    except (TypeError, ValueError):
+        repeats = 8
+    repeats = max(8, min(10, repeats))
+    block = "\n".join(sentence for _ in range(repeats))
+    return f"{block}\n\nTry Lastr."
+
+
+# ------------------------------------------------------------
+# TEMPLATE ENGINE
+# ------------------------------------------------------------
+# Posts are assembled from the per-route phrase banks in data.json
+# ("phrases", compiled and rule-checked by config.compile_phrases): one
+# hook, one option per slide slot, then a CTA. Every combination is valid
+# copy, so this needs no model call and runs in microseconds — it is the
+# fallback when GPT fails and the whole copy source in offline mode.
+
+def compose_overlay(route, config=None, rng=random):
+    """Hook + 6 slide texts for a route, same shape as a GPT overlay."""
+    config = config or get_config()
+    bank = config["phrases"].get(route) or config["phrases"][DEFAULT_ROUTE]
+    slides = [rng.choice(options) for options in bank["slides"]]
+    slides.append(format_cta_slide(rng.choice(CTA_SENTENCES), rng.randint(*CTA_REPEATS)))
+    return {
+        "hook": rng.choice(bank["hooks"]),
+        "slides": slides,
+    }
+
+
+def combinations(route, config=None) -> int:
+    """How many distinct posts the bank can produce for a route."""
+    config = config or get_config()
+    bank = config["phrases"][route]
+    repeats = CTA_REPEATS[1] - CTA_REPEATS[0] + 1
+    return len(bank["hooks"]) * prod(len(o) for o in bank["slides"]) * len(CTA_SENTENCES) * repeats
+
+
+# ------------------------------------------------------------
+# EXECUTE
+# ------------------------------------------------------------
+
+if __name__ == "__main__":
+    import json
+
+    config = get_config()
+    for route in config["routes"]:
+        print(f"{route:<10} {combinations(route, config):>12,} combinations")
+    print(json.dumps(compose_overlay(random.choice(config["routes"]), config), indent=2))